@@ -0,0 +1,21 @@
+"""
+Summariser backend registry.
+
+Backends are imported on first use: the batch client starts an event loop
+thread, and future direct-API backends (openai/pydantic) should not be paid
+for by lookups that only go through the proxy.
+"""
+
+import os
+
+from utils.registry import LazyRegistry
+
+# Read here rather than in ai/batch_client.py so callers can check it without importing the client.
+CF_WORKER_BATCH_URL = os.getenv("CF_WORKER_BATCH_URL", "")
+
+# Backends are called as backend(raw_data, on_section) (see ai/summarizer.py: summarize), except
+# "local_key", which takes the user's API key instead.
+SUMMARIZERS = LazyRegistry("summariser backend")
+SUMMARIZERS.register("proxy", "ai.summarizer:summarize_via_proxy")
+SUMMARIZERS.register("local_key", "ai.summarizer:summarize_with_local_key")
+SUMMARIZERS.register("batch", "ai.batch_client:summarize_blocking")
@@ -0,0 +1,202 @@
+"""
+Async micro-batching client for the summary proxy.
+
+Pending summaries are collected into micro-batches (up to SUMMARY_BATCH_SIZE items
+or SUMMARY_BATCH_WINDOW_MS, whichever comes first) and sent to the proxy's batch
+endpoint in one request, with at most SUMMARY_MAX_CONCURRENCY batches in flight.
+Items the proxy fails on, or whole failed batches, fall back to the local demo
+summary per item, and gaps in incomplete items are filled from it. Complete
+answers go through the same summary cache as `summarize_via_proxy`. Batches are
+posted through utils/http_client.py like every other upstream call (per-host
+breaker and politeness scheduler, at the most urgent priority of the items in
+the batch), on a worker thread so the event loop keeps collecting.
+
+Batch protocol (CF_WORKER_BATCH_URL):
+    request:  {"items": [{"raw_data": {...}}, ...]}   (prompt data, see ai/prompts.py)
+    response: {"results": [<summary dict> | {"error": "..."}, ...]}   (same order)
+
+Async callers use `BatchSummarizer.summarize` (or `summarize_with_outcome`, which also
+says whether the proxy answered); thread-based callers (batch pipeline, Flask views) use
+`summarize_blocking`, which runs the client on a background event loop.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from ai.backends import CF_WORKER_BATCH_URL
+from ai.prompts import prompt_data
+from ai.summarizer import SectionCallback, _build_demo_summary, _fill_gaps
+from ai.summary_cache import get_summary, put_summary, summary_key
+from report.formatter import SummaryRecord, format_summary
+from utils import http_client, metrics
+from utils.host_scheduler import current_priority, priority
+from utils.records import dumps
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "8"))
+SUMMARY_BATCH_WINDOW_MS = float(os.getenv("SUMMARY_BATCH_WINDOW_MS", "50"))
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+SUMMARY_BATCH_TIMEOUT_S = float(os.getenv("SUMMARY_BATCH_TIMEOUT_S", "30"))
+
+# (summary, outcome): "live", "partial" (gaps filled from the demo), "cached" or "fallback".
+_Answer = Tuple[SummaryRecord, str]
+# (raw_data, summary key, scheduler priority, future)
+_Pending = Tuple[Dict[str, Any], str, int, "asyncio.Future[_Answer]"]
+
+
+class BatchSummarizer:
+    """Collects summaries on the running event loop and sends them to the proxy in micro-batches."""
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        batch_size: int = SUMMARY_BATCH_SIZE,
+        window_ms: float = SUMMARY_BATCH_WINDOW_MS,
+        max_concurrency: int = SUMMARY_MAX_CONCURRENCY,
+        timeout_s: float = SUMMARY_BATCH_TIMEOUT_S,
+    ) -> None:
+        self.url = CF_WORKER_BATCH_URL if url is None else url
+        self.batch_size = max(1, batch_size)
+        self.window_s = window_ms / 1000.0
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout_s = timeout_s
+        self._queue: Optional["asyncio.Queue[_Pending]"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional["asyncio.Task[None]"] = None
+        self._inflight: "set[asyncio.Task[None]]" = set()
+
+    def _ensure_started(self) -> "asyncio.Queue[_Pending]":
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch_loop())
+        return self._queue
+
+    async def summarize(self, raw_data: Dict[str, Any], level: Optional[int] = None) -> SummaryRecord:
+        """
+        Summarise one raw_data; never raises, falls back to the demo summary. `level` is the scheduler
+        priority (the caller's context priority by default).
+        """
+        summary, _ = await self.summarize_with_outcome(raw_data, level)
+        return summary
+
+    async def summarize_with_outcome(self, raw_data: Dict[str, Any], level: Optional[int] = None) -> _Answer:
+        """`summarize`, plus how the proxy answered: "live", "partial", "cached" or "fallback"."""
+        if not self.url:
+            return _build_demo_summary(raw_data), "fallback"
+        key = summary_key(raw_data)
+        cached = get_summary(key)
+        if cached is not None:
+            return cached, "cached"
+        queue = self._ensure_started()
+        future: "asyncio.Future[_Answer]" = asyncio.get_running_loop().create_future()
+        level = current_priority() if level is None else level
+        await queue.put((raw_data, key, level, future))
+        return await future
+
+    async def _dispatch_loop(self) -> None:
+        assert self._queue is not None and self._semaphore is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[_Pending] = [await self._queue.get()]
+            deadline = loop.time() + self.window_s
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._semaphore.acquire()
+            task = loop.create_task(self._send(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task: "asyncio.Task[None]") -> None:
+        self._inflight.discard(task)
+        assert self._semaphore is not None
+        self._semaphore.release()
+
+    async def _send(self, batch: List[_Pending]) -> None:
+        results: List[Any] = []
+        try:
+            # Each item carries only its token-budgeted prompt data, like the single-item proxy call.
+            items = ",".join(f'{{"raw_data":{dumps(prompt_data(raw_data))}}}' for raw_data, _, _, _ in batch)
+            # to_thread copies this task's context, so the slot is taken at the batch's most urgent priority.
+            with priority(min(level for _, _, level, _ in batch)):
+                resp = await asyncio.to_thread(
+                    http_client.post,
+                    self.url,
+                    data=f'{{"items":[{items}]}}'.encode("utf-8"),
+                    headers={"Content-Type": "application/json"},
+                    timeout=self.timeout_s,
+                )
+            if resp.status_code == 200:
+                results = resp.json().get("results") or []
+            else:
+                logger.warning("Batch proxy status %s, falling back to demo for %d items.", resp.status_code, len(batch))
+        except Exception as exc:  # pragma: no cover - network/parse errors
+            logger.warning("Batch proxy call failed: %s, falling back to demo for %d items.", exc, len(batch))
+
+        for idx, (raw_data, key, _, future) in enumerate(batch):
+            if future.done():
+                continue
+            result = results[idx] if idx < len(results) else None
+            if not isinstance(result, dict) or "error" in result:
+                future.set_result((_build_demo_summary(raw_data), "fallback"))
+                continue
+            # Like single-item answers, only complete summaries are cached.
+            summary, gaps = _fill_gaps(result, raw_data)
+            future.set_result((format_summary(summary), "partial") if gaps else (put_summary(key, summary), "live"))
+
+    async def aclose(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        self._queue = None
+        self._dispatcher = None
+
+
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_SUMMARIZER: Optional[BatchSummarizer] = None
+_LOOP_LOCK = threading.Lock()
+
+
+def _background_loop() -> Tuple[asyncio.AbstractEventLoop, BatchSummarizer]:
+    global _LOOP, _SUMMARIZER
+    with _LOOP_LOCK:
+        if _LOOP is None or _SUMMARIZER is None:
+            _LOOP = asyncio.new_event_loop()
+            _SUMMARIZER = BatchSummarizer()
+            threading.Thread(target=_LOOP.run_forever, name="summary-batcher", daemon=True).start()
+        return _LOOP, _SUMMARIZER
+
+
+def summarize_blocking(
+    raw_data: Dict[str, Any], on_section: Optional[SectionCallback] = None, timeout: Optional[float] = None
+) -> SummaryRecord:
+    """
+    Thread-safe entry point: concurrent callers from any thread share micro-batches
+    on one background event loop. Batched answers arrive whole, so `on_section` is not
+    called here; `summarize` reports the sections once the summary is in.
+    """
+    with metrics.span("summarize", "batch_proxy", "fallback") as span:
+        if not CF_WORKER_BATCH_URL:
+            return _build_demo_summary(raw_data)
+        loop, summarizer = _background_loop()
+        # The loop thread has its own context, so the caller's priority is passed along explicitly.
+        future = asyncio.run_coroutine_threadsafe(summarizer.summarize_with_outcome(raw_data, current_priority()), loop)
+        try:
+            summary, span.outcome = future.result(timeout=timeout or SUMMARY_BATCH_TIMEOUT_S + 5)
+        except Exception as exc:  # pragma: no cover - loop stalled or timed out
+            logger.warning("Batched summary failed: %s, falling back to demo.", exc)
+            future.cancel()
+            return _build_demo_summary(raw_data)
+        return summary
@@ -1,12 +1,155 @@
 """
-Prompt templates for AI summarization.
+Prompt templates for AI summarization, and the prompt data builder.
+
+`prompt_data` reduces raw_data to what the model needs: the ranked, de-duplicated
+parcel/zoning/regulation fields, with regulation snippets trimmed so the whole
+prompt stays within PROMPT_TOKEN_BUDGET (estimated at CHARS_PER_TOKEN). It keeps
+raw_data's shape, so the proxy receives it as `raw_data` unchanged, and it is
+what the summary cache key hashes: lookups that give the model the same prompt
+share one summary.
 """
 
+import hashlib
+import os
+from typing import Any, Dict, List, Optional
+
+from utils.records import dumps
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1000"))
+# A snippet trimmed below this says nothing useful; the regulation is dropped instead.
+PROMPT_MIN_SNIPPET_CHARS = int(os.getenv("PROMPT_MIN_SNIPPET_CHARS", "80"))
+# Rough average for GPT tokenizers on mixed Slovenian/English text.
+CHARS_PER_TOKEN = 4
+
 SYSTEM_PROMPT = (
     "You are an assistant summarizing spatial and legal data for lokacijska preverba. "
     "Return structured JSON with short and long fields."
 )
 
-USER_PROMPT_TEMPLATE = "Summarize the following raw data: {raw_data}"
+USER_PROMPT_TEMPLATE = (
+    "Summarize the following data (regulations in order of relevance, snippets are excerpts): {raw_data}"
+)
+
+# Parcel fields given to the model; zoning contributes zone_name and layers. Everything else
+# (query echoes, WFS status, overlay hits, canonical IDs) is left out of the prompt.
+PARCEL_FIELDS = ("parcel_id", "ko", "namenska_raba", "area_m2", "other")
+# Snippet texts written by scrapers/pisrs_api.py when PISRS could not be read.
+_UNAVAILABLE_SNIPPETS = ("Povzetek ni na voljo", "Kratek povzetek trenutno ni na voljo")
+_ELLIPSIS = "…"
+
+# Derived from the prompt text and budget, so any prompt edit invalidates cached summaries automatically.
+PROMPT_VERSION = hashlib.sha256(
+    f"{SYSTEM_PROMPT}\n{USER_PROMPT_TEMPLATE}\n{PROMPT_TOKEN_BUDGET}".encode("utf-8")
+).hexdigest()[:12]
+
+
+def _present(value: Any) -> bool:
+    return value not in (None, "", "—") and value != [] and value != ()
+
+
+def _trim(text: str, max_chars: int) -> str:
+    """`text` cut to at most `max_chars` at a word boundary, with an ellipsis when shortened."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[: max(0, max_chars - len(_ELLIPSIS))]
+    space = cut.rfind(" ")
+    if space > len(cut) // 2:
+        cut = cut[:space]
+    return cut.rstrip(" ,;:") + _ELLIPSIS
+
+
+def _rank_regulations(regulations: Any) -> List[Dict[str, Any]]:
+    """De-duplicated regulations, specific articles first, each with its (untrimmed) snippet."""
+    seen = set()
+    ranked = []
+    for position, reg in enumerate(regulations or ()):
+        law, article = reg.get("law"), reg.get("article")
+        snippet = str(reg.get("snippet") or "").strip()
+        if snippet.startswith(_UNAVAILABLE_SNIPPETS):
+            snippet = ""
+        identity = (law, article if _present(article) else None, snippet)
+        if not _present(law) or identity in seen:
+            continue
+        seen.add(identity)
+        item: Dict[str, Any] = {"law": law}
+        if _present(article):
+            item["article"] = article
+        if snippet:
+            item["snippet"] = snippet
+        # Article-level matches (local index) carry more than a law-wide snippet; keep input order otherwise.
+        ranked.append((0 if "article" in item else 1, position, item))
+    return [item for _, _, item in sorted(ranked, key=lambda entry: entry[:2])]
+
+
+def _fit_snippets(regulations: List[Dict[str, Any]], budget_chars: int) -> List[Dict[str, Any]]:
+    """
+    Share `budget_chars` between the snippets: short snippets keep their full text and pass what
+    they do not use on to longer ones. While that would leave any snippet under
+    PROMPT_MIN_SNIPPET_CHARS, the lowest ranked regulation is dropped.
+    """
+    kept = list(regulations)
+    while kept:
+        overhead = sum(len(dumps({**reg, "snippet": ""} if "snippet" in reg else reg)) + 1 for reg in kept)
+        available = budget_chars - overhead
+        pending = sum(1 for reg in kept if "snippet" in reg)
+        if available >= 0 and available >= PROMPT_MIN_SNIPPET_CHARS * pending:
+            break
+        kept.pop()
+    else:
+        return []
+
+    fitted = list(kept)
+    for i in sorted((i for i, reg in enumerate(kept) if "snippet" in reg), key=lambda i: len(kept[i]["snippet"])):
+        text = _trim(kept[i]["snippet"], available // pending)
+        fitted[i] = {**kept[i], "snippet": text}
+        available -= len(text)
+        pending -= 1
+    return fitted
+
+
+def prompt_data(raw_data: Dict[str, Any], budget_tokens: Optional[int] = None) -> Dict[str, Any]:
+    """
+    The part of raw_data the model sees, in raw_data's shape: inputs, parcel and zoning fields
+    without empty, placeholder or repeated values, then regulations ranked and trimmed so the
+    encoded prompt fits `budget_tokens` (PROMPT_TOKEN_BUDGET by default).
+    """
+    budget_tokens = PROMPT_TOKEN_BUDGET if budget_tokens is None else budget_tokens
+    raw_data = raw_data or {}
+    inputs = raw_data.get("input") or {}
+    parcel = raw_data.get("parcel") or {}
+    zoning = raw_data.get("zoning") or {}
+
+    data: Dict[str, Any] = {}
+    parcel_out = {field: parcel[field] for field in PARCEL_FIELDS if _present(parcel.get(field))}
+    if parcel_out:
+        data["parcel"] = parcel_out
+
+    address = inputs.get("normalized_address") or inputs.get("original_address")
+    parcel_query = inputs.get("normalized_parcel") or inputs.get("original_parcel")
+    input_out = {}
+    if _present(address):
+        input_out["address"] = address
+    if _present(parcel_query) and parcel_query != parcel_out.get("parcel_id"):
+        input_out["parcel"] = parcel_query
+    if input_out:
+        data["input"] = input_out
 
+    zoning_out: Dict[str, Any] = {}
+    if _present(zoning.get("zone_name")):
+        zoning_out["zone_name"] = zoning["zone_name"]
+    layers: List[str] = []
+    for layer in zoning.get("layers") or ():
+        if _present(layer) and layer != zoning_out.get("zone_name") and layer not in layers:
+            layers.append(layer)
+    if layers:
+        zoning_out["layers"] = layers
+    if zoning_out:
+        data["zoning"] = zoning_out
 
+    regulations = _rank_regulations(raw_data.get("regulations"))
+    if regulations:
+        fixed_chars = len(USER_PROMPT_TEMPLATE) + len(dumps(data)) + len(',"regulations":[]')
+        regulations = _fit_snippets(regulations, budget_tokens * CHARS_PER_TOKEN - fixed_chars)
+    if regulations:
+        data["regulations"] = regulations
+    return data
@@ -0,0 +1,149 @@
+"""
+Local stand-in for the Cloudflare Worker summary proxy.
+
+Answers the single-item endpoint (POST /, {"raw_data": ...}) and the batch
+endpoint (POST /batch, {"items": [...]}) with the local demo summary, with
+configurable latency and error rates. A single-item request with "stream": true
+is answered as chunked NDJSON, one section per line with the latency spread
+between them, then {"done": true} (the protocol in ai/summarizer.py). Used to
+exercise the proxy clients offline (tests/) and by the benchmarks; `sections`
+and `stream_done` make it answer with an incomplete summary or cut a stream off.
+
+    python -m ai.standin_proxy --port 8787 --latency-ms 300
+    CF_WORKER_PROXY_URL=http://127.0.0.1:8787/ CF_WORKER_BATCH_URL=http://127.0.0.1:8787/batch flask --app app.py run
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+from ai.summarizer import _build_demo_summary
+from report.formatter import SummaryRecord
+from utils.records import dumps
+
+
+class StandinConfig:
+    """Mutable knobs shared by all handler threads."""
+
+    def __init__(self, latency_s: float = 0.0, error_rate: float = 0.0, item_error_rate: float = 0.0) -> None:
+        self.latency_s = latency_s
+        self.error_rate = error_rate
+        self.item_error_rate = item_error_rate
+        # Answer with only the first `sections` summary sections (None: all of them).
+        self.sections: Optional[int] = None
+        # Whether a stream ends with {"done": true}; without it the body just ends (a cut-off stream).
+        self.stream_done = True
+        self.requests = 0
+        self.items = 0
+        self.lock = threading.Lock()
+
+
+def _make_handler(config: StandinConfig) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Streamed sections are small writes a few ms apart; Nagle would hold each one for the client's delayed ACK.
+        disable_nagle_algorithm = True
+
+        def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+            body = dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self, summary: Dict[str, Any]) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            names = [name for name in SummaryRecord.FIELDS if name in summary]
+            messages = [{"section": name, "value": summary[name]} for name in names]
+            messages += [{"done": True}] if config.stream_done else []
+            if "error" in summary:
+                messages = [summary]
+            if not messages:
+                self.wfile.write(b"0\r\n\r\n")
+            for position, message in enumerate(messages, start=1):
+                if "section" in message:
+                    time.sleep(config.latency_s / len(names))
+                line = (dumps(message) + "\n").encode("utf-8")
+                # The last message goes out with the terminating chunk, in one write.
+                end = b"0\r\n\r\n" if position == len(messages) else b""
+                self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n" + end)
+                self.wfile.flush()
+
+        def do_POST(self) -> None:  # noqa: N802 - http.server naming
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._reply(400, {"error": "invalid json"})
+                return
+
+            is_batch = self.path.rstrip("/").endswith("/batch")
+            items = payload.get("items", []) if is_batch else [payload]
+            with config.lock:
+                config.requests += 1
+                config.items += len(items)
+
+            stream = not is_batch and bool(payload.get("stream"))
+            if not stream:
+                time.sleep(config.latency_s)
+            if random.random() < config.error_rate:
+                self._reply(502, {"error": "stand-in upstream error"})
+                return
+
+            results = []
+            for item in items:
+                if random.random() < config.item_error_rate:
+                    results.append({"error": "stand-in item error"})
+                else:
+                    summary = _build_demo_summary(item.get("raw_data") or {})
+                    keep = SummaryRecord.FIELDS[: config.sections]
+                    results.append({name: value for name, value in summary.items() if name in keep})
+            if stream:
+                self._stream(results[0])
+                return
+            self._reply(200, {"results": results} if is_batch else results[0])
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - keep test output quiet
+            pass
+
+    return Handler
+
+
+def start_standin_proxy(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    config: Optional[StandinConfig] = None,
+) -> Tuple[ThreadingHTTPServer, StandinConfig, str]:
+    """Start the stand-in on a daemon thread; returns (server, config, base_url). Port 0 picks a free port."""
+    config = config or StandinConfig()
+    server = ThreadingHTTPServer((host, port), _make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="standin-proxy", daemon=True).start()
+    return server, config, f"http://{host}:{server.server_port}/"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the local stand-in summary proxy.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--item-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = StandinConfig(args.latency_ms / 1000.0, args.error_rate, args.item_error_rate)
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(config))
+    print(f"Stand-in proxy on http://{args.host}:{server.server_port}/ (batch: /batch)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,44 @@ AI summariser for parcel/zoning data.
 
 Builds a structured summary (parcel, building, zoning, regulations, summary, sources)
 via a Cloudflare Worker proxy or a local demo pathway.
+
+The proxy receives the token-budgeted prompt data (ai/prompts.py), not the whole
+raw_data. Callers that pass `on_section` get each section as it is ready; with
+CF_WORKER_STREAM on, the proxy is asked to stream:
+
+    request:  {"raw_data": {...}, "stream": true}
+    response: application/x-ndjson, one message per line:
+              {"section": "parcel_section", "value": {...}}   (any order, each at most once)
+              {"done": true}                                  (last line)
+              {"error": "..."}                                (aborts, demo fallback)
+
+A proxy that ignores "stream" and answers with one JSON body still works. Only a
+summary with every SummaryRecord field in the expected shape is cached; fields a
+stream or body lacks (or has malformed) are filled from the demo summary.
 """
 
+import json
 import os
 import logging
-from typing import Any, Dict, List
+import time
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import requests
-from flask import session
+from flask import has_request_context, session
+
+from ai.backends import SUMMARIZERS
+from ai.prompts import prompt_data
+from ai.summary_cache import get_summary, put_summary, summary_key
+from report.formatter import SummaryRecord, format_summary
+from utils import http_client, metrics
+from utils.records import dumps
+from utils.singleflight import SingleFlight
 
 CF_WORKER_PROXY_URL = os.getenv("CF_WORKER_PROXY_URL", "")
+CF_WORKER_STREAM = os.getenv("CF_WORKER_STREAM", "1") not in ("0", "false", "no", "")
+# Called as on_section(name, value) for each summary section (a SummaryRecord field) once known.
+SectionCallback = Callable[[str, Any], None]
+_PROXY_CALLS = SingleFlight("summary_proxy")
 logger = logging.getLogger(__name__)
 
 
@@ -20,7 +48,7 @@ def _safe(value: Any, default: str = "—") -> str:
     return default if value is None or value == "" else str(value)
 
 
-def _build_demo_summary(raw_data: Dict[str, Any]) -> Dict[str, Any]:
+def _build_demo_summary(raw_data: Dict[str, Any]) -> SummaryRecord:
     """Build the demo summary derived from raw_data."""
     parcel = raw_data.get("parcel", {}) or {}
     zoning = raw_data.get("zoning", {}) or {}
@@ -79,38 +107,140 @@ def _build_demo_summary(raw_data: Dict[str, Any]) -> Dict[str, Any]:
         "Priporočamo pregled podrobnih določil in slojev."
     )
 
-    return {
+    return format_summary({
         "parcel_section": {"short": parcel_short, "long": parcel_long},
         "zoning_section": {"short": zoning_short, "long": zoning_long},
         "regulations_section": regs_section,
         "summary_section": {"short": summary_short, "long": summary_long},
         "building_section": {"short": building_short, "long": building_long},
         "sources": ["eProstor", "PISRS", "Urbinfo"],
-    }
+    })
+
+
+def _valid_section(name: str, value: Any) -> bool:
+    """Whether `value` has the shape of the SummaryRecord field `name`."""
+    if name == "sources":
+        return isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value)
+    if name == "regulations_section":
+        return isinstance(value, (list, tuple)) and all(isinstance(item, Mapping) for item in value)
+    return isinstance(value, Mapping) and all(isinstance(value.get(key), str) for key in ("short", "long"))
 
 
-def summarize_via_proxy(raw_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Use the Cloudflare Worker proxy when CF_WORKER_PROXY_URL is provided; fall back to local build on error."""
-    if not CF_WORKER_PROXY_URL or not CF_WORKER_PROXY_URL.strip():
-        logger.info("Proxy URL not configured; using demo summariser.")
-        return _build_demo_summary(raw_data)
+def _fill_gaps(summary: Any, raw_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """`summary` with every missing or malformed field taken from the demo summary, and those fields' names."""
+    summary = summary if isinstance(summary, Mapping) else {}
+    gaps = [name for name in SummaryRecord.FIELDS if not _valid_section(name, summary.get(name))]
+    if not gaps:
+        return dict(summary), gaps
+    demo = _build_demo_summary(raw_data)
+    return {**summary, **{name: demo[name] for name in gaps}}, gaps
 
+
+def _notify(on_section: Optional[SectionCallback], name: str, value: Any) -> None:
+    if on_section is None:
+        return
     try:
-        resp = requests.post(
-            CF_WORKER_PROXY_URL,
-            json={"raw_data": raw_data},
-            timeout=15,
-        )
-        if resp.status_code == 200:
-            return resp.json()
-        logger.warning("Proxy status %s, falling back to demo.", resp.status_code)
-        return _build_demo_summary(raw_data)
-    except Exception as exc:  # pragma: no cover - network/parse errors
-        logger.warning("Proxy call failed: %s, falling back to demo.", exc)
-        return _build_demo_summary(raw_data)
+        on_section(name, value)
+    except Exception as exc:  # pragma: no cover - progress reporting must never break a summary
+        logger.warning("Section callback failed for %s: %s", name, exc)
+
+
+def _read_stream(resp: Any, on_section: Optional[SectionCallback]) -> Optional[Dict[str, Any]]:
+    """Collect an NDJSON section stream into a summary dict; None on an error message or a cut-off stream."""
+    started = time.perf_counter()
+    sections: Dict[str, Any] = {}
+    done = False
+    for line in resp.iter_lines():
+        # Read on to the end of the body after "done", so the pooled connection can be reused.
+        if not line or done:
+            continue
+        message = json.loads(line)
+        if "error" in message:
+            logger.warning("Proxy stream error: %s, falling back to demo.", message["error"])
+            return None
+        done = bool(message.get("done"))
+        name = message.get("section")
+        if name not in SummaryRecord.FIELDS or not _valid_section(name, message.get("value")):
+            continue
+        if not sections:
+            metrics.observe("summarize", "proxy_first_section", "live", time.perf_counter() - started)
+        sections[name] = format_summary({name: message.get("value")})[name]
+        _notify(on_section, name, sections[name])
+    if done:
+        return sections
+    logger.warning("Proxy stream ended without a done message, falling back to demo.")
+    return None
+
+
+def _call_proxy(
+    raw_data: Dict[str, Any], key: str, on_section: Optional[SectionCallback] = None
+) -> Optional[Tuple[SummaryRecord, bool]]:
+    """
+    One proxy round-trip: (summary, complete), or None on a non-200 answer or a failed stream.
+    A complete summary is cached under `key`; an incomplete one has its gaps filled from the demo
+    summary and is not cached.
+    """
+    stream = on_section is not None and CF_WORKER_STREAM
+    # Prompt data is small and canonical, so the body is spliced rather than re-encoded.
+    body = f'{{"raw_data":{dumps(prompt_data(raw_data))}' + (',"stream":true}' if stream else "}")
+    resp = http_client.post(
+        CF_WORKER_PROXY_URL,
+        data=body.encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        timeout=15,
+        stream=stream,
+    )
+    with resp:
+        if resp.status_code != 200:
+            logger.warning("Proxy status %s, falling back to demo.", resp.status_code)
+            return None
+        if resp.headers.get("Content-Type", "").startswith("application/x-ndjson"):
+            summary = _read_stream(resp, on_section)
+        else:
+            summary = resp.json()
+    if summary is None:
+        return None
+    summary, gaps = _fill_gaps(summary, raw_data)
+    if gaps:
+        logger.warning("Proxy summary lacks %s; filled from the demo summary, not cached.", ", ".join(gaps))
+        return format_summary(summary), False
+    return put_summary(key, summary), True
+
+
+def summarize_via_proxy(raw_data: Dict[str, Any], on_section: Optional[SectionCallback] = None) -> SummaryRecord:
+    """
+    Use the Cloudflare Worker proxy when CF_WORKER_PROXY_URL is provided; fall back to local build on error.
+    Complete proxy answers are memoised by content (see ai/summary_cache.py); incomplete ones and demo
+    fallbacks are not cached.
+    Concurrent requests for the same content share one proxy call; `on_section` only hears the
+    sections streamed to the caller that made it (`summarize` replays the rest).
+    """
+    with metrics.span("summarize", "proxy") as span:
+        if not CF_WORKER_PROXY_URL or not CF_WORKER_PROXY_URL.strip():
+            logger.info("Proxy URL not configured; using demo summariser.")
+            span.outcome = "fallback"
+            return _build_demo_summary(raw_data)
+
+        key = summary_key(raw_data)
+        cached = get_summary(key)
+        if cached is not None:
+            span.outcome = "cached"
+            return cached
+
+        span.outcome = "fallback"
+        try:
+            answer, _ = _PROXY_CALLS.do(key, _call_proxy, raw_data, key, on_section)
+        except Exception as exc:  # pragma: no cover - network/parse errors
+            logger.warning("Proxy call failed: %s, falling back to demo.", exc)
+            return _build_demo_summary(raw_data)
+        if answer is None:
+            return _build_demo_summary(raw_data)
+        summary, complete = answer
+        span.outcome = "live" if complete else "partial"
+        return summary
 
 
-def summarize_with_local_key(raw_data: Dict[str, Any], api_key: str) -> Dict[str, Any]:
+def summarize_with_local_key(raw_data: Dict[str, Any], api_key: str) -> SummaryRecord:
     """
     Placeholder for future direct OpenAI call using user-provided key.
     TODO: Use api_key with OpenAI SDK to produce structured summary.
@@ -119,14 +249,36 @@ def summarize_with_local_key(raw_data: Dict[str, Any], api_key: str) -> Dict[str
     return _build_demo_summary(raw_data)
 
 
-def summarize(raw_data: Dict[str, Any]) -> Dict[str, Any]:
+def summarize(
+    raw_data: Dict[str, Any],
+    on_section: Optional[SectionCallback] = None,
+    backend: str = "proxy",
+    api_key: Optional[str] = None,
+) -> SummaryRecord:
     """
-    Entry point used by Flask: choose between user-provided key (future path) and proxy.
-    Always returns the same structured dict schema.
+    Entry point used by Flask, background jobs and batch runs: the user-provided key (future path)
+    when there is one, otherwise the `backend` registered in ai/backends.py ("proxy" or "batch").
+    `api_key` defaults to the session's key inside a request; background jobs run outside the
+    request and pass it explicitly. Always returns the same structured schema (a read-only SummaryRecord).
+    `on_section` is told about every section of the returned summary exactly once per value:
+    streamed sections as they arrive, then any the stream did not deliver (cache hits, shared
+    proxy calls, demo fallbacks) or delivered differently, in SummaryRecord.FIELDS order.
     """
-    user_key = session.get("user_openai_key")
+    emitted: Dict[str, Any] = {}
+
+    def forward(name: str, value: Any) -> None:
+        emitted[name] = value
+        _notify(on_section, name, value)
+
+    user_key = api_key or (session.get("user_openai_key") if has_request_context() else None)
     if user_key:
-        return summarize_with_local_key(raw_data, user_key)
-    return summarize_via_proxy(raw_data)
+        summary = SUMMARIZERS.get("local_key")(raw_data, user_key)
+    else:
+        summary = SUMMARIZERS.get(backend)(raw_data, forward if on_section is not None else None)
+    if on_section is not None:
+        for name in SummaryRecord.FIELDS:
+            if name in summary and emitted.get(name) != summary[name]:
+                _notify(on_section, name, summary[name])
+    return summary
 
 
@@ -0,0 +1,47 @@
+"""
+Content-addressed cache for AI summaries.
+
+Summaries are keyed by a hash of the prompt data (ai/prompts.py: the ranked,
+trimmed fields the model actually sees) plus PROMPT_VERSION, so lookups that
+give the model the same prompt skip the proxy and a prompt change starts a
+fresh cache. Two tiers: in-memory LRU and a size-capped
+disk directory.
+"""
+
+import hashlib
+import os
+from typing import Any, Dict, Optional
+
+from ai.prompts import PROMPT_VERSION, prompt_data
+from report.formatter import SummaryRecord, format_summary
+from utils.cache import CACHE_DIR, DiskCache, LRUCache
+from utils.records import dumps
+
+SUMMARY_CACHE_ITEMS = int(os.getenv("SUMMARY_CACHE_ITEMS", "512"))
+SUMMARY_CACHE_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+_MEMORY = LRUCache(max_items=SUMMARY_CACHE_ITEMS)
+_DISK = DiskCache(os.path.join(CACHE_DIR, "summaries"), max_bytes=SUMMARY_CACHE_MAX_BYTES)
+
+
+def summary_key(raw_data: Dict[str, Any]) -> str:
+    """Stable hash of the prompt data built from raw_data and the prompt version."""
+    canonical = dumps(prompt_data(raw_data))
+    return hashlib.sha256(f"{PROMPT_VERSION}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+def get_summary(key: str) -> Optional[SummaryRecord]:
+    summary = _MEMORY.get(key)
+    if summary is None:
+        summary = format_summary(_DISK.get(key))
+        if summary is not None:
+            _MEMORY.set(key, summary)
+    return summary
+
+
+def put_summary(key: str, summary: Dict[str, Any]) -> SummaryRecord:
+    """Cache `summary` (as a SummaryRecord, shared read-only by every hit) and return the record."""
+    record = format_summary(summary)
+    _MEMORY.set(key, record)
+    _DISK.set(key, record)
+    return record
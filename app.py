@@ -5,19 +5,42 @@ Orchestrates input normalization, data fetchers (eProstor/PISRS/Urbinfo stubs),
 and AI summarisation via a Cloudflare Worker proxy.
 """
 
+import cProfile
+import io
+import json
 import os
+import pstats
+import time
 from typing import Any, Dict, Optional
 
 import logging
 from dotenv import load_dotenv
-from flask import Flask, Response, redirect, render_template, request, session, url_for
+from flask import (
+    Flask,
+    Response,
+    before_render_template,
+    g,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    session,
+    stream_with_context,
+    template_rendered,
+    url_for,
+)
 
-from utils.input_normalization import normalize_address, normalize_parcel
 from ai import summarizer
-from scrapers.eprostor_api import fetch_parcel_data
-from scrapers.eprostor_browser import fetch_parcel_data_browser
-from scrapers.pisrs_api import fetch_regulations
-from scrapers.urbinfo_api import fetch_zoning_layers
+from batch.pipeline import iter_ndjson, iter_report_zip, iter_rows, run_batch
+from jobs.runner import QueueFullError, get_job_runner
+from report.builder import FORMATS, report_filename, report_mimetype, stream_report
+from scrapers.orchestrator import build_raw_data
+from scrapers.router import get_router
+from utils import metrics
+from utils.address_index import get_resolver
+from utils.host_scheduler import get_scheduler
+from utils.http_client import breaker_states
+from utils.result_store import get_result_store
 
 # Load environment variables early; prototype-level configuration.
 load_dotenv()
@@ -28,35 +51,55 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret-key")
 
+# Per-request profiling via the X-Profile header; off unless explicitly enabled.
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "profiles"))
 
-def build_report_text(ai_summary: Dict[str, Any]) -> str:
-    """Build a plain-text report based on the AI summary."""
-    parcel_text = ai_summary.get("parcel_section", {}).get("short", "—")
-    building_section = ai_summary.get("building_section") or {}
-    building_text = building_section.get("short") or "Podatki o vrsti pozidave niso na voljo."
-    zoning_text = ai_summary.get("zoning_section", {}).get("short", "—")
-    summary_text = ai_summary.get("summary_section", {}).get("short", "—")
-
-    regs = ai_summary.get("regulations_section") or []
-    regs_lines = [f"- {r.get('law', '—')}: {r.get('short', '—')}" for r in regs] or ["- Ni navedenih predpisov."]
-
-    parts = [
-        "Lokacija / parcela:",
-        parcel_text,
-        "",
-        "Vrsta pozidave:",
-        building_text,
-        "",
-        "Prostorski pogoji:",
-        zoning_text,
-        "",
-        "Relevantni predpisi:",
-        "\n".join(regs_lines),
-        "",
-        "Sklep / povzetek:",
-        summary_text,
-    ]
-    return "\n".join(parts)
+
+@app.before_request
+def _start_request_timing():
+    g.request_started = time.perf_counter()
+    if PROFILE_REQUESTS and request.headers.get("X-Profile"):
+        metrics.start_collecting()
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+@app.after_request
+def _finish_request_timing(response: Response) -> Response:
+    started = g.pop("request_started", None)
+    if started is not None:
+        metrics.observe("request", request.endpoint or "unknown", f"{response.status_code // 100}xx", time.perf_counter() - started)
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return response
+    profiler.disable()
+    spans = metrics.stop_collecting()
+    # Spans recorded on this thread (normalise, per-source waits, summary, render) as Server-Timing.
+    response.headers["Server-Timing"] = ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in spans)
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{int(time.time() * 1000)}-{request.endpoint or 'unknown'}.prof")
+    profiler.dump_stats(path)
+    response.headers["X-Profile-File"] = os.path.basename(path)
+    if logger.isEnabledFor(logging.INFO):
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(15)
+        logger.info("Profile for %s %s (%s):\n%s", request.method, request.path, path, report.getvalue())
+    return response
+
+
+def _render_started(sender: Flask, template: Any, context: Dict[str, Any], **extra: Any) -> None:
+    g.render_started = time.perf_counter()
+
+
+def _render_finished(sender: Flask, template: Any, context: Dict[str, Any], **extra: Any) -> None:
+    started = g.pop("render_started", None)
+    if started is not None:
+        metrics.observe("render", template.name or "", "ok", time.perf_counter() - started)
+
+
+before_render_template.connect(_render_started, app)
+template_rendered.connect(_render_finished, app)
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -81,34 +124,19 @@ def index():
                 user_openai_key=bool(session.get("user_openai_key")),
             )
 
-        normalized_address = normalize_address(address)
-        normalized_parcel = normalize_parcel(parcel)
-
-        # Data fetch pipeline: mix of demo/stub calls (eProstor/Urbinfo) and partial live PISRS snippets.
-        if mode == "browser":
-            parcel_data = fetch_parcel_data_browser(address, parcel)
-        else:
-            parcel_data = fetch_parcel_data(address, parcel)
-        regulations_data = fetch_regulations(parcel_data)
-        zoning_data = fetch_zoning_layers(parcel_data)
-
-        raw_data = {
-            "input": {
-                "original_address": address,
-                "normalized_address": normalized_address,
-                "original_parcel": parcel,
-                "normalized_parcel": normalized_parcel,
-            },
-            "parcel": parcel_data,
-            "regulations": regulations_data,
-            "zoning": zoning_data,
-        }
-
-        logger.info("RAW_DATA: %s", raw_data)
+        # Data fetch pipeline: mix of demo/stub calls (eProstor/Urbinfo) and partial live PISRS snippets,
+        # fanned out concurrently with per-source deadlines (see scrapers/orchestrator.py).
+        raw_data = build_raw_data(address, parcel, mode)
+
+        # Debug only; the record's canonical JSON is cached and reused by the summary key,
+        # the proxy request and the result store.
+        logger.debug("RAW_DATA: %s", raw_data)
 
         # AI summary (currently local/proxy demo path).
         ai_summary = summarizer.summarize(raw_data)
-        session["last_ai_summary"] = ai_summary
+        # Only the result ID goes into the (cookie) session; the result itself stays server-side.
+        session["last_result_id"] = get_result_store().put({"raw_data": raw_data, "ai_summary": ai_summary})
+        session.pop("last_ai_summary", None)
 
     return render_template(
         "index.html",
@@ -119,21 +147,156 @@ def index():
     )
 
 
+@app.route("/lookup", methods=["POST"])
+def lookup():
+    """Queue a lookup as a background job; progress streams from /jobs/<id>/events."""
+    address = request.form.get("address", "").strip()
+    parcel = request.form.get("parcel", "").strip()
+    mode = request.form.get("mode", "api")
+    if not address and not parcel:
+        return jsonify({"error": "Prosim vnesite naslov ali parcelno številko."}), 400
+    try:
+        job = get_job_runner().submit(address, parcel, mode, api_key=session.get("user_openai_key"))
+    except QueueFullError:
+        return jsonify({"error": "Preveč hkratnih poizvedb, poskusite znova čez nekaj sekund."}), 503
+    return jsonify({"job_id": job.id, "events_url": url_for("job_events", job_id=job.id)}), 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id: str):
+    job = get_job_runner().get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(job.snapshot())
+
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id: str):
+    """Server-Sent Events: replays the job's progress so far, then follows it until it finishes."""
+    job = get_job_runner().get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    last_event_id = request.headers.get("Last-Event-ID", 0, type=int) or 0
+
+    def generate():
+        for event in job.follow(last_event_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/results/<result_id>", methods=["GET"])
+def result_partial(result_id: str):
+    """Rendered result cards for a finished job; also makes it the session's downloadable result."""
+    result = get_result_store().get(result_id)
+    if not result:
+        return Response("", status=404)
+    session["last_result_id"] = result_id
+    return render_template("_results.html", raw_data=result["raw_data"], ai_summary=result["ai_summary"])
+
+
 @app.route("/download-report", methods=["POST"])
 def download_report():
-    """Build and return a plain-text report from the last AI summary stored in session."""
-    ai_summary = session.get("last_ai_summary")
-    if not ai_summary:
+    """Stream the last result referenced by the session as a txt / html / pdf report ("format" field)."""
+    result = get_result_store().get(session.get("last_result_id"))
+    if not result:
         return redirect(url_for("index"))
+    fmt = request.form.get("format", "txt")
+    if fmt not in FORMATS:
+        fmt = "txt"
 
-    report_text = build_report_text(ai_summary)
     return Response(
-        report_text,
-        mimetype="text/plain",
-        headers={"Content-Disposition": "attachment; filename=porocilo.txt"},
+        stream_report(result.get("raw_data"), result["ai_summary"], fmt),
+        content_type=report_mimetype(fmt),
+        headers={"Content-Disposition": f"attachment; filename={report_filename(fmt)}"},
     )
 
 
+@app.route("/batch", methods=["POST"])
+def batch():
+    """
+    Bulk pre-check: upload a CSV/NDJSON file ("file") and stream NDJSON results as rows complete,
+    or a ZIP of reports when a "zip" field names a report format (txt / html / pdf).
+    """
+    upload = request.files.get("file")
+    if upload is None or not upload.filename:
+        return Response('{"error": "missing file"}\n', status=400, mimetype="application/x-ndjson")
+    mode = request.form.get("mode", "api")
+    fmt = request.form.get("format") or ("ndjson" if upload.filename.lower().endswith((".ndjson", ".jsonl")) else None)
+    zip_format = request.form.get("zip")
+    if zip_format and zip_format not in FORMATS:
+        return Response('{"error": "unsupported report format"}\n', status=400, mimetype="application/x-ndjson")
+
+    # Request teardown closes uploaded files as soon as this view returns, before the response
+    # is streamed; detach the spooled upload so the generator owns (and closes) it instead.
+    upload_stream = upload.stream
+    upload.stream = io.BytesIO()
+
+    def generate():
+        with io.TextIOWrapper(upload_stream, encoding="utf-8", newline="") as stream:
+            results = run_batch(iter_rows(stream, fmt), mode=mode)
+            yield from iter_report_zip(results, zip_format) if zip_format else iter_ndjson(results)
+
+    if zip_format:
+        return Response(
+            stream_with_context(generate()),
+            mimetype="application/zip",
+            headers={"Content-Disposition": "attachment; filename=porocila.zip"},
+        )
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@app.route("/autocomplete", methods=["GET"])
+def autocomplete():
+    """Address / k.o. suggestions from the local prefix index: ?q=<partial input>&limit=<n>."""
+    query = request.args.get("q", "").strip()
+    limit = min(request.args.get("limit", 10, type=int) or 10, 50)
+    if len(query) < 2:
+        return jsonify([])
+    return jsonify(get_resolver().autocomplete(query, limit))
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Stage latency histograms, circuit-breaker states, routing and host scheduler statistics in Prometheus text format."""
+    breaker_values = {(("host", host), ("state", state)): 1 for host, state in breaker_states().items()}
+    gauges = {"datascraper_circuit_breaker_state": ("Current circuit breaker state per upstream host.", breaker_values)}
+    routing = get_router().snapshot()
+    for field, help_text in (
+        ("score_s", "Routing score per eProstor backend (p50 + error penalty, seconds; lower is preferred)."),
+        ("error_rate", "Share of unusable answers in the backend's rolling window."),
+        ("p95_s", "Rolling p95 latency per backend; the hedge delay when it is the primary."),
+        ("primary", "Lookups routed to the backend first."),
+        ("hedges", "Hedged lookups started on the backend."),
+        ("wins", "Lookups answered by the backend."),
+    ):
+        values = {(("backend", name),): stats[field] for name, stats in routing["backends"].items() if stats[field] is not None}
+        gauges[f"datascraper_router_{field}"] = (help_text, values)
+    hosts = get_scheduler().snapshot()
+    for field, help_text in (
+        ("rate_per_s", "Current allowed request rate per upstream host (halved on 429/503, recovering after)."),
+        ("in_flight", "Requests to the host holding a scheduler slot."),
+        ("queued", "Requests waiting for a scheduler slot on the host."),
+        ("paused_s", "Seconds left of the host's pause after a 429/503."),
+    ):
+        values = {(("host", host),): stats[field] for host, stats in hosts.items() if stats[field] is not None}
+        gauges[f"datascraper_host_{field}"] = (help_text, values)
+    return Response(metrics.render_prometheus(gauges), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/routing", methods=["GET"])
+def routing_stats():
+    """Rolling per-backend statistics behind auto-mode routing and hedging."""
+    return jsonify(get_router().snapshot())
+
+
 @app.route("/set-api-key", methods=["POST"])
 def set_api_key():
     """Store a user-provided OpenAI key (future direct-call path instead of proxy)."""
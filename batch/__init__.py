@@ -0,0 +1 @@
+# Package marker for batch processing helpers.
@@ -0,0 +1,238 @@
+"""
+Bulk pre-check pipeline for CSV/NDJSON lists of addresses and parcels.
+
+Rows are read lazily, normalised, deduplicated on the normalised address/parcel
+key and run through the fetchers and the summariser with bounded concurrency.
+Results are yielded as soon as they complete, so memory stays flat regardless of
+input size (apart from one small digest per unique key for deduplication).
+
+CLI:
+    python -m batch.pipeline parcels.csv > results.ndjson
+    python -m batch.pipeline parcels.ndjson --mode api --concurrency 8 -o results.ndjson
+    python -m batch.pipeline parcels.csv --zip pdf -o reports.zip
+    python -m batch.pipeline parcels.csv --overlay -o zoning.ndjson
+
+CSV input needs an `address` and/or `parcel` column; NDJSON lines are objects with the same keys.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ai import summarizer
+from ai.backends import CF_WORKER_BATCH_URL
+from report.builder import FORMATS, stream_zip
+from scrapers.orchestrator import build_raw_data
+from scrapers.parcel_store import get_parcel_store, lookup_parcel
+from scrapers.zoning_overlay import get_overlay_engine, zoning_from_hits
+from utils.address_index import canonical_id
+from utils.geometry import Geometry
+from utils.host_scheduler import BATCH, priority
+from utils.input_normalization import normalize_inputs
+from utils.records import dumps
+
+logger = logging.getLogger(__name__)
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+
+def iter_rows(stream: IO[str], fmt: Optional[str] = None) -> Iterator[Dict[str, str]]:
+    """
+    Yield {"address", "parcel"} rows from a CSV or NDJSON text stream.
+    `fmt` is "csv" or "ndjson"; when omitted it is sniffed from the first non-empty line.
+    """
+    if fmt is None:
+        first = ""
+        for first in stream:
+            if first.strip():
+                break
+        fmt = "ndjson" if first.lstrip().startswith("{") else "csv"
+        lines: Iterable[str] = _chain_first(first, stream)
+    else:
+        lines = stream
+
+    if fmt == "ndjson":
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                obj = {}
+            yield {"address": str(obj.get("address") or ""), "parcel": str(obj.get("parcel") or "")}
+    else:
+        for record in csv.DictReader(lines):
+            row = {(k or "").strip().lower(): (v or "") for k, v in record.items()}
+            yield {"address": row.get("address", ""), "parcel": row.get("parcel", "")}
+
+
+def _chain_first(first: str, rest: Iterable[str]) -> Iterator[str]:
+    yield first
+    yield from rest
+
+
+def row_key(address: str, parcel: str) -> str:
+    """Deduplication key: the resolver's canonical ID, so spelling variants of one parcel/address collapse."""
+    normalized_address, normalized_parcel = normalize_inputs(address, parcel)
+    return canonical_id(normalized_address, normalized_parcel)
+
+
+def _unique_rows(rows: Iterable[Dict[str, str]]) -> Iterator[Tuple[int, str, str, Optional[Dict[str, Any]]]]:
+    """
+    Number and strip the rows: (row_no, address, parcel, skipped). `skipped` is the finished
+    result for empty and duplicate rows, which need no lookup; None for rows to process.
+    """
+    first_row_for_key: Dict[bytes, int] = {}
+    for row_no, row in enumerate(rows, start=1):
+        address = row.get("address", "").strip()
+        parcel = row.get("parcel", "").strip()
+        if not address and not parcel:
+            yield row_no, address, parcel, {"row": row_no, "status": "error", "error": "empty_input"}
+            continue
+
+        digest = hashlib.blake2b(row_key(address, parcel).encode("utf-8"), digest_size=12).digest()
+        if digest in first_row_for_key:
+            yield row_no, address, parcel, {"row": row_no, "status": "duplicate", "duplicate_of": first_row_for_key[digest]}
+            continue
+        first_row_for_key[digest] = row_no
+        yield row_no, address, parcel, None
+
+
+def _process(row_no: int, address: str, parcel: str, mode: str) -> Dict[str, Any]:
+    try:
+        # Batch rows yield every upstream slot to interactive lookups (utils/host_scheduler.py).
+        with priority(BATCH):
+            raw_data = build_raw_data(address, parcel, mode)
+            # With a batch endpoint configured, concurrent rows share micro-batched proxy calls.
+            ai_summary = summarizer.summarize(raw_data, backend="batch" if CF_WORKER_BATCH_URL else "proxy")
+        return {"row": row_no, "status": "ok", "raw_data": raw_data, "ai_summary": ai_summary}
+    except Exception as exc:  # pragma: no cover - fetchers/summariser guard their own errors
+        logger.warning("Batch row %s failed: %s", row_no, exc)
+        return {"row": row_no, "status": "error", "error": exc.__class__.__name__}
+
+
+def run_batch(
+    rows: Iterable[Dict[str, str]],
+    mode: str = "api",
+    concurrency: int = BATCH_CONCURRENCY,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Process rows with at most `concurrency` lookups in flight and yield one result dict per row,
+    in completion order. Duplicate and empty rows are reported without doing any fetches.
+    """
+    pending: Set["Future[Dict[str, Any]]"] = set()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as pool:
+        for row_no, address, parcel, skipped in _unique_rows(rows):
+            if skipped is not None:
+                yield skipped
+                continue
+
+            # Backpressure: do not read further input until a slot frees up.
+            while len(pending) >= concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(pool.submit(_process, row_no, address, parcel, mode))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def run_overlay(rows: Iterable[Dict[str, str]]) -> Iterator[Dict[str, Any]]:
+    """
+    Zoning-only pass over the local stores, without fetchers or the summariser: each row is
+    resolved in the parcel store and all rows stream through OverlayEngine.evaluate_many.
+    Yields one result dict per row, in input order; unresolved rows are "not_found".
+    """
+    engine = get_overlay_engine()
+    if engine is None or get_parcel_store() is None:
+        raise RuntimeError("the overlay pass needs the local parcel and zoning stores")
+
+    def items() -> Iterator[Tuple[Dict[str, Any], Optional[Geometry]]]:
+        for row_no, address, parcel, skipped in _unique_rows(rows):
+            if skipped is not None:
+                yield skipped, None
+                continue
+            record = lookup_parcel(address, parcel, with_geometry=True)
+            if record is None or not record.get("geometry"):
+                yield {"row": row_no, "status": "not_found"}, None
+            else:
+                yield {"row": row_no, "status": "ok", "parcel_ref": record["parcel_no"]}, record["geometry"]
+
+    for result, hits in engine.evaluate_many(items()):
+        if result["status"] == "ok":
+            result["zoning"] = zoning_from_hits(hits, result.pop("parcel_ref"))
+        yield result
+
+
+def iter_ndjson(results: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for result in results:
+        yield dumps(result) + "\n"
+
+
+def iter_report_zip(results: Iterable[Dict[str, Any]], fmt: str = "txt") -> Iterator[bytes]:
+    """
+    Stream a ZIP with one report per successful row (row-00001.<fmt>, ...) and a trailing
+    manifest.ndjson listing every row's status, so duplicates and errors are not lost.
+    """
+    manifest: List[str] = []
+
+    def entries() -> Iterator[Tuple[str, Any]]:
+        for result in results:
+            status = {k: v for k, v in result.items() if k not in ("raw_data", "ai_summary")}
+            if result["status"] == "ok":
+                status["file"] = f"row-{result['row']:05d}.{FORMATS[fmt][2]}"
+                yield status["file"], (result["raw_data"], result["ai_summary"])
+            manifest.append(dumps(status))
+        yield "manifest.ndjson", ("\n".join(manifest) + "\n").encode("utf-8")
+
+    return stream_zip(entries(), fmt)
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the parcel pre-check over a CSV/NDJSON file.")
+    parser.add_argument("input", help="CSV or NDJSON file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="input format (default: sniffed)")
+    parser.add_argument("--mode", default="api", choices=["api", "auto", "browser"])
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--zip", choices=sorted(FORMATS), help="write a ZIP of reports in this format instead of NDJSON")
+    parser.add_argument("--overlay", action="store_true", help="zoning from the local stores only: no fetches, no summaries")
+    args = parser.parse_args(argv)
+    if args.overlay and args.zip:
+        parser.error("--overlay writes NDJSON; it cannot be combined with --zip")
+    if args.overlay and (get_overlay_engine() is None or get_parcel_store() is None):
+        print("--overlay needs the local parcel and zoning stores.", file=sys.stderr)
+        return 1
+
+    src = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8", newline="")
+    if args.zip:
+        dst: IO[Any] = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    else:
+        dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        rows = iter_rows(src, args.format)
+        results = run_overlay(rows) if args.overlay else run_batch(rows, mode=args.mode, concurrency=args.concurrency)
+        for chunk in iter_report_zip(results, args.zip) if args.zip else iter_ndjson(results):
+            dst.write(chunk)
+            dst.flush()
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst not in (sys.stdout, sys.stdout.buffer):
+            dst.close()
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
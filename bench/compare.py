@@ -0,0 +1,73 @@
+"""
+Compare two bench.run result files scenario by scenario.
+
+    python -m bench.compare bench/results/<before>.json bench/results/<after>.json
+
+Prints throughput and p50/p95/p99 for both runs with the relative change.
+A warning is printed when the two runs used different settings.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _change(before: Optional[float], after: Optional[float]) -> str:
+    if not before or after is None:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def _describe(report: Dict[str, Any]) -> str:
+    git = report.get("meta", {}).get("git") or {}
+    sha = (git.get("sha") or "unknown")[:10] + ("+dirty" if git.get("dirty") else "")
+    label = report.get("meta", {}).get("label")
+    return f"{sha} ({label})" if label else sha
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One row per scenario and metric present in both runs."""
+    rows = []
+    for name in before.get("scenarios", {}):
+        if name not in after.get("scenarios", {}):
+            continue
+        old, new = before["scenarios"][name], after["scenarios"][name]
+        for metric in METRICS:
+            rows.append(
+                {
+                    "scenario": name,
+                    "metric": metric,
+                    "before": old.get(metric),
+                    "after": new.get(metric),
+                    "change": _change(old.get(metric), new.get(metric)),
+                }
+            )
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args(argv)
+
+    before, after = _load(args.before), _load(args.after)
+    if before.get("config") != after.get("config"):
+        print(f"warning: runs used different settings: {before.get('config')} vs {after.get('config')}", file=sys.stderr)
+    print(f"before: {_describe(before)}  after: {_describe(after)}")
+    print(f"{'scenario':18} {'metric':15} {'before':>12} {'after':>12} {'change':>9}")
+    for row in compare(before, after):
+        print(f"{row['scenario']:18} {row['metric']:15} {row['before']!s:>12} {row['after']!s:>12} {row['change']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Cold-start report: `python -X importtime` for the app, parsed and summarised.
+
+Runs a fresh interpreter per repeat that imports the app and then resolves
+everything an API-mode lookup uses (fetchers, fallbacks, proxy summariser),
+without making any requests. Reports the median total import time, process
+wall time, the slowest modules, and which optional heavy dependencies got
+imported (none of them should be on the API path).
+
+    python -m bench.importtime
+    python -m bench.importtime --repeat 5 --top 15 --json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("playwright", "httpx", "openai", "pydantic", "greenlet")
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+_API_PATH = """
+import json, sys
+import app
+from scrapers.registry import FALLBACKS, FETCHERS
+from ai.backends import SUMMARIZERS
+for name in ("parcel", "regulations", "zoning"):
+    FETCHERS.get(name)
+    FALLBACKS.get(name)
+SUMMARIZERS.get("proxy")
+print(json.dumps(sorted(m for m in sys.modules if m.split(".")[0] in %r)))
+""" % (HEAVY_MODULES,)
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of {"module", "self_us", "cumulative_us", "depth"} from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append({"module": module, "self_us": int(self_us), "cumulative_us": int(cumulative_us), "depth": len(indent) // 2})
+    return rows
+
+
+def run_once(code: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    rows = parse_importtime(proc.stderr)
+    return {
+        "wall_ms": wall_ms,
+        "import_ms": sum(row["self_us"] for row in rows) / 1000,
+        "rows": rows,
+        "heavy_loaded": json.loads(proc.stdout.strip().splitlines()[-1]) if proc.stdout.strip() else [],
+    }
+
+
+def report(repeat: int = 3, top: int = 10) -> Dict[str, Any]:
+    runs = [run_once(_API_PATH) for _ in range(repeat)]
+    fastest = min(runs, key=lambda run: run["import_ms"])
+    own_packages = ("app", "ai", "batch", "jobs", "report", "scrapers", "utils")
+    rows = fastest["rows"]
+    return {
+        "repeat": repeat,
+        "import_ms_median": round(statistics.median(run["import_ms"] for run in runs), 1),
+        "wall_ms_median": round(statistics.median(run["wall_ms"] for run in runs), 1),
+        "modules": len(rows),
+        "heavy_loaded": sorted({m.split(".")[0] for run in runs for m in run["heavy_loaded"]}),
+        "slowest_cumulative": [
+            {"module": row["module"], "ms": round(row["cumulative_us"] / 1000, 1)}
+            for row in sorted((r for r in rows if r["depth"] == 0), key=lambda r: -r["cumulative_us"])[:top]
+        ],
+        "slowest_self": [
+            {"module": row["module"], "ms": round(row["self_us"] / 1000, 1)}
+            for row in sorted(rows, key=lambda r: -r["self_us"])[:top]
+        ],
+        "own_modules": [
+            {"module": row["module"], "self_ms": round(row["self_us"] / 1000, 1)}
+            for row in sorted(rows, key=lambda r: -r["self_us"])
+            if row["module"].split(".")[0] in own_packages
+        ][:top],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report app import time on the API lookup path.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    result = report(args.repeat, args.top)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+    print(f"import: {result['import_ms_median']} ms  process: {result['wall_ms_median']} ms  modules: {result['modules']}")
+    print(f"heavy optional modules loaded: {', '.join(result['heavy_loaded']) or 'none'}")
+    for title, key in (("slowest top-level imports (cumulative)", "slowest_cumulative"), ("slowest modules (self)", "slowest_self")):
+        print(title + ":")
+        for row in result[key]:
+            print(f"  {row['ms']:8.1f} ms  {row['module']}")
+    print("project modules (self):")
+    for row in result["own_modules"]:
+        print(f"  {row['self_ms']:8.1f} ms  {row['module']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Closed-loop load generator: `concurrency` workers call a function back to
+back until `requests` calls have been made, and the per-call latencies are
+summarised as throughput and percentiles.
+
+The called function may return a short outcome label ("live", "cached",
+"fallback", an HTTP status ...) which is counted; an exception counts as an
+error and its latency is still recorded.
+"""
+
+import itertools
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Task = Callable[[int], Optional[str]]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of `values` (which need not be sorted)."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def summarize_latencies(latencies_ms: List[float], wall_s: float) -> Dict[str, Any]:
+    if not latencies_ms:
+        return {"throughput_rps": 0.0}
+    return {
+        "throughput_rps": round(len(latencies_ms) / wall_s, 2) if wall_s > 0 else 0.0,
+        "mean_ms": round(statistics.mean(latencies_ms), 3),
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "max_ms": round(max(latencies_ms), 3),
+    }
+
+
+def run_load(task: Task, requests: int, concurrency: int = 1, warmup: int = 0) -> Dict[str, Any]:
+    """
+    Call `task(i)` for i in range(requests) from `concurrency` threads and return
+    {"requests", "concurrency", "errors", "outcomes", "wall_s", "throughput_rps", "mean_ms", "p50_ms", ...}.
+    `warmup` extra calls (negative i) run first and are not measured.
+    """
+    for i in range(warmup):
+        try:
+            task(-1 - i)
+        except Exception:
+            pass
+
+    counter = itertools.count()
+    lock = threading.Lock()
+    results: List[Tuple[float, str]] = []
+
+    def worker() -> None:
+        while True:
+            i = next(counter)
+            if i >= requests:
+                return
+            started = time.perf_counter()
+            try:
+                outcome = task(i) or "ok"
+            except Exception as exc:
+                outcome = f"error:{exc.__class__.__name__}"
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with lock:
+                results.append((elapsed_ms, outcome))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load") as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    wall_s = time.perf_counter() - started
+
+    outcomes: Dict[str, int] = {}
+    for _, outcome in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return {
+        "requests": len(results),
+        "concurrency": concurrency,
+        "errors": sum(count for outcome, count in outcomes.items() if outcome.startswith("error")),
+        "outcomes": dict(sorted(outcomes.items())),
+        "wall_s": round(wall_s, 3),
+        **summarize_latencies([latency for latency, _ in results], wall_s),
+    }
@@ -0,0 +1,110 @@
+"""
+Report rendering benchmark: time and peak traced memory per report for each
+format, plus a bulk ZIP run to show memory stays flat as the archive grows.
+
+    python -m bench.report_render
+    python -m bench.report_render --reports 500 --regulations 40 --json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+from bench.load import percentile
+from report.builder import FORMATS, stream_report, stream_zip
+
+
+def sample_result(regulations: int = 10) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """A raw_data / ai_summary pair shaped like the summariser output, with long regulation texts."""
+    raw_data = {
+        "input": {"normalized_parcel": "1234/5 k.o. Center"},
+        "parcel": {"parcel_id": "1234/5", "ko": "1722 K.O. Center", "namenska_raba": "SSse", "area_m2": 512},
+        "zoning": {
+            "zone_name": "SSse – Stanovanjska območja",
+            "layer_hits": [
+                {"title": "Poplavno območje", "label": "Q100", "code": "", "overlap_pct": 35.0},
+                {"title": "Kulturna dediščina", "label": "EŠD 1005", "code": "", "overlap_pct": 100.0},
+            ],
+        },
+    }
+    text = "Gradnja objektov v območju je dopustna pod pogoji iz prostorskega akta in soglasij upravljavcev. " * 6
+    ai_summary = {
+        "parcel_section": {"short": "Parcela 1234/5 v 1722 K.O. Center.", "long": "Parcela 1234/5 v 1722 K.O. Center, 512 m²."},
+        "building_section": {"short": "Vrsta pozidave: SSse.", "long": "Predvidena raba SSse – čisto stanovanjska."},
+        "zoning_section": {"short": "Območje: SSse; št. slojev: 2.", "long": "Poplavno območje (35 %), kulturna dediščina (100 %)."},
+        "regulations_section": [
+            {"law": f"Predpis {i}", "short": text[:160], "long": text} for i in range(regulations)
+        ],
+        "summary_section": {"short": "Gradnja je pogojno dopustna.", "long": "Gradnja je pogojno dopustna; potrebna so soglasja."},
+        "sources": ["eProstor", "PISRS", "Urbinfo"],
+    }
+    return raw_data, ai_summary
+
+
+def bench_format(fmt: str, reports: int, regulations: int) -> Dict[str, Any]:
+    raw_data, ai_summary = sample_result(regulations)
+    for _ in stream_report(raw_data, ai_summary, fmt):  # warm the template cache
+        pass
+
+    timings = []
+    size = 0
+    for _ in range(reports):
+        started = time.perf_counter()
+        size = sum(len(chunk) for chunk in stream_report(raw_data, ai_summary, fmt))
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    for _ in stream_report(raw_data, ai_summary, fmt):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "format": fmt,
+        "bytes": size,
+        "mean_ms": round(statistics.mean(timings), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def bench_zip(fmt: str, reports: int, regulations: int) -> Dict[str, Any]:
+    raw_data, ai_summary = sample_result(regulations)
+    entries = ((f"row-{i:05d}.{fmt}", (raw_data, ai_summary)) for i in range(reports))
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in stream_zip(entries, fmt))
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "format": f"zip/{fmt}",
+        "reports": reports,
+        "bytes": size,
+        "total_s": round(elapsed, 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark report rendering.")
+    parser.add_argument("--reports", type=int, default=200)
+    parser.add_argument("--regulations", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = [bench_format(fmt, args.reports, args.regulations) for fmt in FORMATS]
+    results.extend(bench_zip(fmt, args.reports, args.regulations) for fmt in FORMATS)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    for row in results:
+        print("  ".join(f"{key}={value}" for key, value in row.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
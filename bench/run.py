@@ -0,0 +1,357 @@
+"""
+Load and latency benchmarks against local upstream stand-ins.
+
+Starts the WFS, PISRS and summary proxy stand-ins (bench/standins.py), points
+the app at them through the usual environment variables, and drives each
+scenario with the closed-loop load generator (bench/load.py). Local stores
+and indexes are switched off and caches start empty, so runs on different
+commits measure the same thing. Results are written as JSON for
+`python -m bench.compare`.
+
+    python -m bench.run
+    python -m bench.run --scenarios parcel,app_lookup --concurrency 16 --requests 400 --latency-ms 120
+    python -m bench.compare bench/results/<before>.json bench/results/<after>.json
+
+Scenarios:
+    parcel             eProstor fetcher (WFS GetCapabilities round-trip)
+    wfs_paged          paged WFS GetFeature + streaming GML parse of the whole layer per call
+    regulations_cold   PISRS snippet, cache miss on every call
+    regulations        fetch_regulations with warm snippet caches
+    summarize          summary proxy, a distinct prompt per call (no summary cache hits)
+    summarize_stream   as summarize, streamed section by section (stages include time to first section)
+    app_index          POST / on a threaded server (fetch + summarise + render)
+    app_index_same     POST / with one address for every call (concurrent identical lookups coalesce)
+    app_lookup         POST /lookup, then follow the SSE stream until the job is done
+
+Only run when named (they need Chromium: `playwright install chromium`):
+    zoning_browser     Urbinfo viewer scraper against the fixture viewer; after each browser worker's first
+                       lookup, one feature-info request per parcel (see the "urbinfo" upstream counters)
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from bench.load import Task, run_load
+
+if TYPE_CHECKING:
+    from bench.standins import Standins
+
+SCENARIOS = ("parcel", "wfs_paged", "regulations_cold", "regulations", "summarize", "summarize_stream", "app_index", "app_index_same", "app_lookup")
+BROWSER_SCENARIOS = ("zoning_browser",)
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+WFS_BENCH_FEATURES = 2000
+
+
+def _isolate(workdir: str) -> None:
+    """Fresh cache, no local stores or indexes. Must run before any app module is imported (settings are read at import)."""
+    missing = os.path.join(workdir, "missing")
+    os.environ.update(
+        {
+            "CACHE_DIR": os.path.join(workdir, "cache"),
+            "PARCEL_STORE_PATH": os.path.join(missing, "parcels.sqlite"),
+            "ZONING_STORE_PATH": os.path.join(missing, "zoning.sqlite"),
+            "PISRS_INDEX_DIR": os.path.join(missing, "pisrs_index"),
+            "ADDRESS_INDEX_DIR": os.path.join(missing, "address_index"),
+            "PROFILE_REQUESTS": "0",
+            # The stand-ins are local; the politeness limits would measure the scheduler, not the code.
+            "HOST_RATE_PER_S": "0",
+            "HOST_MAX_CONCURRENCY": "0",
+            "HOST_LIMITS": "",
+        }
+    )
+
+
+def _point_at(standins: "Standins") -> None:
+    """Route upstream calls to the stand-ins; the summariser is already imported by the proxy stand-in."""
+    from ai import summarizer
+    from scrapers import pisrs_api
+
+    os.environ.update(
+        {
+            "WFS_CAPABILITIES_URL": standins.urls["wfs_capabilities"],
+            "WFS_URL": standins.urls["wfs"],
+            "CF_WORKER_PROXY_URL": standins.urls["proxy"],
+            "CF_WORKER_BATCH_URL": standins.urls["proxy"] + "batch",
+        }
+    )
+    summarizer.CF_WORKER_PROXY_URL = standins.urls["proxy"]
+    pisrs_api.PISRS_URLS.clear()
+    pisrs_api.PISRS_URLS.update(standins.urls["pisrs"])
+
+
+def _git_revision() -> Dict[str, Any]:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root, capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"sha": None, "dirty": None}
+    return {"sha": sha, "dirty": dirty}
+
+
+def _parcel_task() -> Task:
+    from scrapers.eprostor_api import fetch_parcel_data
+    from scrapers.orchestrator import _classify
+
+    def task(i: int) -> str:
+        return _classify("parcel", fetch_parcel_data(address=f"Slovenska cesta {i}, Ljubljana"))
+
+    return task
+
+
+def _wfs_paged_task(standins: "Standins") -> Task:
+    from scrapers.wfs_client import iter_parcels
+
+    standins.wfs_config.features = WFS_BENCH_FEATURES
+
+    def task(i: int) -> str:
+        count = sum(1 for _ in iter_parcels(url=standins.urls["wfs"], type_name="kn:parcela", page_size=500))
+        return "ok" if count == WFS_BENCH_FEATURES else f"short_{count}"
+
+    return task
+
+
+def _regulations_cold_task(standins: "Standins") -> Task:
+    from scrapers import pisrs_api
+
+    urls = list(standins.urls["pisrs"].values())
+    unavailable = ("Povzetek ni na voljo", "Kratek povzetek trenutno ni na voljo")
+
+    def task(i: int) -> str:
+        # A distinct query string per call makes every call a cache miss.
+        snippet = pisrs_api._fetch_snippet(f"{urls[i % len(urls)]}&bench={i}")
+        return "fallback" if snippet.startswith(unavailable) else "live"
+
+    return task
+
+
+def _regulations_task() -> Task:
+    from scrapers.orchestrator import _classify
+    from scrapers.pisrs_api import fetch_regulations
+
+    def task(i: int) -> str:
+        return _classify("regulations", fetch_regulations({}, None))
+
+    return task
+
+
+def _summarize_task(stream: bool = False) -> Task:
+    from ai.summarizer import summarize_via_proxy
+    from bench.report_render import sample_result
+
+    raw_data = sample_result()[0]
+    on_section = (lambda name, value: None) if stream else None
+    # The summary cache keys on the prompt data, so vary a field the prompt keeps.
+    prefix = "stream" if stream else "bench"
+
+    def task(i: int) -> None:
+        address = f"{prefix} {i}"
+        summarize_via_proxy({**raw_data, "input": {**raw_data["input"], "normalized_address": address}}, on_section)
+
+    return task
+
+
+def _zoning_browser_task(standins: "Standins") -> Task:
+    from scrapers import urbinfo_browser
+    from scrapers.orchestrator import _classify
+
+    urbinfo_browser.URBINFO_VIEWER_URL = standins.urls["urbinfo"]
+    urbinfo_browser.URBINFO_USERNAME = urbinfo_browser.URBINFO_PASSWORD = "bench"
+
+    def task(i: int) -> str:
+        return _classify("zoning", urbinfo_browser.scrape_zoning_via_browser({"ko_id": "1722", "parcel_id": f"{i}/1"}))
+
+    return task
+
+
+class _AppServer:
+    """The Flask app on a threaded werkzeug server, with one HTTP session per load thread."""
+
+    def __init__(self) -> None:
+        import requests
+        from werkzeug.serving import make_server
+
+        from app import app
+
+        self._requests = requests
+        self.server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self._local = threading.local()
+        threading.Thread(target=self.server.serve_forever, name="bench-app", daemon=True).start()
+
+    def session(self) -> Any:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+        return session
+
+    def close(self) -> None:
+        self.server.shutdown()
+
+
+def _app_index_task(server: _AppServer, same_address: bool = False) -> Task:
+    def task(i: int) -> str:
+        address = "Prešernov trg 1, Ljubljana" if same_address else f"Slovenska cesta {i}, Ljubljana"
+        resp = server.session().post(f"{server.base_url}/", data={"address": address, "mode": "api"}, timeout=60)
+        return str(resp.status_code)
+
+    return task
+
+
+def _app_lookup_task(server: _AppServer) -> Task:
+    def task(i: int) -> str:
+        session = server.session()
+        # Different addresses from app_index, so summaries are not already cached.
+        resp = session.post(f"{server.base_url}/lookup", data={"address": f"Trubarjeva cesta {i}, Ljubljana", "mode": "api"}, timeout=10)
+        if resp.status_code != 202:
+            return str(resp.status_code)
+        events = session.get(server.base_url + resp.json()["events_url"], stream=True, timeout=60)
+        outcome = "incomplete"
+        for line in events.iter_lines(decode_unicode=True):
+            if line in ("event: done", "event: error"):
+                outcome = line.split(": ", 1)[1]
+        events.close()
+        return outcome
+
+    return task
+
+
+def _stage_deltas(before: Dict[Any, Any], after: Dict[Any, Any]) -> Dict[str, Dict[str, Any]]:
+    """Per stage/source/outcome count and mean latency observed during one scenario (utils/metrics.py)."""
+    deltas = {}
+    for labels, (count, total) in sorted(after.items()):
+        prev_count, prev_total = before.get(labels, (0, 0.0))
+        if count > prev_count:
+            deltas["/".join(part for part in labels if part)] = {
+                "count": count - prev_count,
+                "mean_ms": round((total - prev_total) / (count - prev_count) * 1000, 3),
+            }
+    return deltas
+
+
+def run_scenarios(names: List[str], standins: "Standins", requests: int, concurrency: int) -> Dict[str, Any]:
+    from utils import metrics
+
+    app_server: Optional[_AppServer] = None
+    factories: Dict[str, Callable[[], Task]] = {
+        "parcel": _parcel_task,
+        "wfs_paged": lambda: _wfs_paged_task(standins),
+        "regulations_cold": lambda: _regulations_cold_task(standins),
+        "regulations": _regulations_task,
+        "summarize": _summarize_task,
+        "summarize_stream": lambda: _summarize_task(stream=True),
+        "zoning_browser": lambda: _zoning_browser_task(standins),
+    }
+    # wfs_paged parses the whole layer per call; keep its call count proportionate.
+    scaled = {"wfs_paged": max(1, requests // 20)}
+
+    results = {}
+    try:
+        for name in names:
+            if name.startswith("app_") and app_server is None:
+                app_server = _AppServer()
+            if name in ("app_index", "app_index_same"):
+                task = _app_index_task(app_server, same_address=name == "app_index_same")
+            elif name == "app_lookup":
+                task = _app_lookup_task(app_server)
+            else:
+                task = factories[name]()
+            counters_before = standins.counters()
+            metrics_before = metrics.counts()
+            result = run_load(task, scaled.get(name, requests), concurrency, warmup=1)
+            counters_after = standins.counters()
+            result["stages"] = _stage_deltas(metrics_before, metrics.counts())
+            result["upstream"] = {
+                upstream: {key: value - counters_before[upstream][key] for key, value in values.items()}
+                for upstream, values in counters_after.items()
+            }
+            results[name] = result
+            print(
+                f"{name:18} {result['requests']:5d} req  {result['throughput_rps']:9.2f} rps  "
+                f"p50 {result.get('p50_ms', 0):9.2f} ms  p95 {result.get('p95_ms', 0):9.2f} ms  "
+                f"p99 {result.get('p99_ms', 0):9.2f} ms  errors {result['errors']}  {result['outcomes']}",
+                file=sys.stderr,
+            )
+    finally:
+        if app_server is not None:
+            app_server.close()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run load/latency benchmarks against local upstream stand-ins.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of: {', '.join(SCENARIOS + BROWSER_SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=200, help="calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="added latency per upstream request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of upstream requests answered with 503")
+    parser.add_argument("--payload-kb", type=float, default=64.0, help="WFS capabilities and PISRS page size")
+    parser.add_argument("--label", default="", help="free-form tag stored with the results")
+    parser.add_argument("-o", "--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--no-save", action="store_true", help="print the JSON instead of writing a file")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(SCENARIOS + BROWSER_SCENARIOS))
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    config = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "latency_ms": args.latency_ms,
+        "error_rate": args.error_rate,
+        "payload_kb": args.payload_kb,
+    }
+    # Before app.py's basicConfig(INFO), which then becomes a no-op: no per-request log lines.
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    workdir = tempfile.mkdtemp(prefix="datascraper-bench-")
+    _isolate(workdir)
+    from bench.standins import Standins
+
+    standins = Standins(args.latency_ms / 1000.0, args.error_rate, int(args.payload_kb * 1024))
+    try:
+        _point_at(standins)
+        scenarios = run_scenarios(names, standins, args.requests, args.concurrency)
+    finally:
+        standins.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    revision = _git_revision()
+    report = {
+        "meta": {
+            "git": revision,
+            "label": args.label,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": config,
+        "scenarios": scenarios,
+    }
+    if args.no_save:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return 0
+    os.makedirs(args.output_dir, exist_ok=True)
+    stem = time.strftime("%Y%m%d-%H%M%S") + (f"-{revision['sha'][:10]}" if revision["sha"] else "")
+    path = os.path.join(args.output_dir, f"{stem}{'-' + args.label if args.label else ''}.json")
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2, ensure_ascii=False)
+    print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,356 @@
+"""
+Local stand-ins for the upstream services, for reproducible benchmarks.
+
+- WFS: GetCapabilities (the eProstor reachability check) and paged
+  GetFeature answering with parcel features (scrapers/wfs_client.py).
+- PISRS: regulation pages with numbered articles; honours If-None-Match.
+- Summary proxy: ai/standin_proxy.py.
+- Urbinfo: a fixture map viewer behind a login form. The viewer page loads
+  its layer catalogue (/api/layers) and, on every hash route change
+  (#parcel=<ko_id>/<parcel_id>), a map tile and a GetFeatureInfo JSON answer
+  for that parcel (scrapers/urbinfo_browser.py).
+
+Each server has its own UpstreamConfig with latency, error rate (answered
+with 503) and payload size, and counts the requests it served.
+
+    python -m bench.standins --latency-ms 80 --payload-kb 256
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import secrets
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, parse_qsl, urlparse
+
+from ai.standin_proxy import StandinConfig, start_standin_proxy
+
+_GML_HEAD = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b'<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs/2.0" '
+    b'xmlns:gml="http://www.opengis.net/gml/3.2" xmlns:kn="urn:standin:kn">'
+)
+_GML_TAIL = b"</wfs:FeatureCollection>"
+_FILLER = "Gradnja objektov v območju je dopustna pod pogoji iz prostorskega akta. "
+
+_URBINFO_LAYERS = [
+    {"name": "opn_eup", "title": "OPN namenska raba", "kind": "zone"},
+    {"name": "dediscina", "title": "Kulturna dediščina", "kind": "overlay"},
+    {"name": "poplave", "title": "Poplavno območje", "kind": "overlay"},
+    {"name": "varovana", "title": "Varovana območja narave", "kind": "overlay"},
+]
+_URBINFO_ZONES = [("SSse", "Stanovanjska območja"), ("CU", "Osrednja območja centralnih dejavnosti"), ("IG", "Gospodarske cone")]
+_URBINFO_LOGIN = (
+    b'<html><body><form method="post" action="/login">'
+    b'<input name="username"><input name="password" type="password"><button type="submit">Prijava</button>'
+    b"</form></body></html>"
+)
+_URBINFO_VIEWER = b"""<html><body><div id="map"></div><script>
+let layers = [];
+async function identify() {
+  const m = location.hash.match(/^#parcel=([^/]+)[/](.+)$/);
+  if (!m) return;
+  const parcel = `${decodeURIComponent(m[1])}/${decodeURIComponent(m[2])}`;
+  const map = document.getElementById('map');
+  map.style.backgroundImage = `url(/wms?REQUEST=GetMap&PARCEL=${encodeURIComponent(parcel)})`;
+  const params = new URLSearchParams({
+    SERVICE: 'WMS', REQUEST: 'GetFeatureInfo', INFO_FORMAT: 'application/json',
+    QUERY_LAYERS: layers.map((l) => l.name).join(','), PARCEL: parcel,
+  });
+  const resp = await fetch(`/wms?${params}`);
+  map.dataset.features = resp.ok ? (await resp.json()).features.length : 'error';
+}
+fetch('/api/layers').then((r) => r.json()).then((data) => {
+  layers = data;
+  document.body.dataset.viewerReady = '1';
+  identify();
+});
+window.addEventListener('hashchange', identify);
+</script></body></html>"""
+
+
+class UpstreamConfig:
+    """Mutable knobs shared by all handler threads of one stand-in."""
+
+    def __init__(self, latency_s: float = 0.0, error_rate: float = 0.0, payload_bytes: int = 64 * 1024, features: int = 5000) -> None:
+        self.latency_s = latency_s
+        self.error_rate = error_rate
+        self.payload_bytes = payload_bytes
+        self.features = features
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        # Requests still to be answered 503 before the random error_rate applies.
+        self.fail_next = 0
+        self.lock = threading.Lock()
+
+    def counters(self) -> Dict[str, int]:
+        with self.lock:
+            return {"requests": self.requests, "errors": self.errors, "not_modified": self.not_modified}
+
+
+def _padded(head: bytes, tail: bytes, filler: bytes, size: int) -> bytes:
+    missing = max(0, size - len(head) - len(tail))
+    return head + (filler * (missing // len(filler) + 1))[:missing] + tail
+
+
+def _feature(i: int) -> bytes:
+    x, y = 460000 + (i % 100) * 20, 100000 + (i // 100) * 20
+    ring = f"{x} {y} {x + 20} {y} {x + 20} {y + 20} {x} {y + 20} {x} {y}"
+    return (
+        f'<wfs:member><kn:parcela gml:id="p.{i}"><kn:KO_ID>1722</kn:KO_ID><kn:ST_PARCELE>{i}</kn:ST_PARCELE>'
+        f"<kn:POVRSINA>400</kn:POVRSINA><kn:geom><gml:Polygon><gml:exterior><gml:LinearRing>"
+        f"<gml:posList>{ring}</gml:posList></gml:LinearRing></gml:exterior></gml:Polygon></kn:geom>"
+        f"</kn:parcela></wfs:member>"
+    ).encode("utf-8")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # The PISRS snippet reader hangs up once it has enough text; that is not an error.
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: UpstreamConfig
+
+    def _begin(self) -> bool:
+        """Count the request, apply latency and error injection; False when an error was sent."""
+        config = self.config
+        with config.lock:
+            config.requests += 1
+        time.sleep(config.latency_s)
+        with config.lock:
+            failing = config.fail_next > 0
+            config.fail_next -= failing
+        if failing or random.random() < config.error_rate:
+            with config.lock:
+                config.errors += 1
+            self._reply(503, b"stand-in upstream error", "text/plain")
+            return False
+        return True
+
+    def _reply(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - keep benchmark output quiet
+        pass
+
+
+class _WfsHandler(_Handler):
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        if not self._begin():
+            return
+        query = {key.lower(): value for key, value in parse_qsl(urlparse(self.path).query)}
+        if query.get("request", "").lower() != "getfeature":
+            body = _padded(
+                b'<?xml version="1.0"?><wfs:WFS_Capabilities xmlns:wfs="http://www.opengis.net/wfs/2.0"><!--',
+                b"--></wfs:WFS_Capabilities>",
+                b"FeatureTypeList ",
+                self.config.payload_bytes,
+            )
+            self._reply(200, body, "text/xml")
+            return
+
+        start = int(query.get("startindex", 0))
+        count = int(query.get("count") or query.get("maxfeatures") or self.config.features)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml; subtype=gml/3.2")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in (_GML_HEAD, *(_feature(i) for i in range(start, min(self.config.features, start + count))), _GML_TAIL):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class _PisrsHandler(_Handler):
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        if not self._begin():
+            return
+        page_id = dict(parse_qsl(urlparse(self.path).query)).get("id", "")
+        body = self._page(page_id)
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            with self.config.lock:
+                self.config.not_modified += 1
+            self._reply(304, b"", "text/html; charset=utf-8", {"ETag": etag})
+            return
+        self._reply(200, body, "text/html; charset=utf-8", {"ETag": etag})
+
+    def _page(self, page_id: str) -> bytes:
+        law = "Uredba o razvrščanju objektov" if page_id.startswith("URED") else "Gradbeni zakon"
+        head = f"<html><head><title>{law}</title></head><body><h1>{law}</h1>".encode("utf-8")
+        articles = []
+        size = len(head)
+        number = 1
+        while size < self.config.payload_bytes:
+            article = f"<h4>{number}. člen</h4><p>{_FILLER * 4}</p>".encode("utf-8")
+            articles.append(article)
+            size += len(article)
+            number += 1
+        return head + b"".join(articles) + b"</body></html>"
+
+
+class ViewerConfig(UpstreamConfig):
+    """UpstreamConfig plus the viewer's own counters: page loads, logins and map tiles."""
+
+    def __init__(self, latency_s: float = 0.0, error_rate: float = 0.0, payload_bytes: int = 64 * 1024) -> None:
+        super().__init__(latency_s, error_rate, payload_bytes)
+        self.page_loads = 0
+        self.logins = 0
+        self.tiles = 0
+        self.sessions: set = set()
+        # Status of API calls without a valid session (the real viewer answers 401 or 403).
+        self.denied_status = 401
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def counters(self) -> Dict[str, int]:
+        counters = super().counters()
+        with self.lock:
+            counters.update(page_loads=self.page_loads, logins=self.logins, tiles=self.tiles)
+        return counters
+
+
+def urbinfo_features(parcel: str) -> Dict[str, Any]:
+    """The fixture's GetFeatureInfo answer: a zone and some overlays, fixed per parcel."""
+    digest = hashlib.sha1(parcel.encode("utf-8")).digest()
+    code, label = _URBINFO_ZONES[digest[0] % len(_URBINFO_ZONES)]
+    features = [{"type": "Feature", "id": f"opn_eup.{digest[1]}", "properties": {"eup": code, "naziv": label}, "geometry": None}]
+    for i, (layer, label) in enumerate((("dediscina", "EŠD"), ("poplave", "Q"), ("varovana", "SI")), start=2):
+        if digest[i] % 2:
+            features.append({"type": "Feature", "id": f"{layer}.{digest[i]}", "properties": {"ime": f"{label} {digest[i]}"}, "geometry": None})
+    return {"type": "FeatureCollection", "features": features}
+
+
+class _UrbinfoHandler(_Handler):
+    config: ViewerConfig
+
+    def _logged_in(self) -> bool:
+        cookie = self.headers.get("Cookie") or ""
+        sessions = {part.strip()[len("session="):] for part in cookie.split(";") if part.strip().startswith("session=")}
+        with self.config.lock:
+            return bool(sessions & self.config.sessions)
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        url = urlparse(self.path)
+        query = {key.lower(): value for key, value in parse_qsl(url.query)}
+        if url.path == "/login":
+            self._reply(200, _URBINFO_LOGIN, "text/html; charset=utf-8")
+        elif url.path == "/viewer":
+            if not self._logged_in():
+                self._reply(303, b"", "text/plain", {"Location": "/login"})
+                return
+            self.config.count("page_loads")
+            self._reply(200, _URBINFO_VIEWER, "text/html; charset=utf-8")
+        elif not self._logged_in():
+            self._reply(self.config.denied_status, b'{"error":"login required"}', "application/json")
+        elif url.path == "/api/layers":
+            self._reply(200, json.dumps(_URBINFO_LAYERS).encode("utf-8"), "application/json")
+        elif url.path == "/wms" and query.get("request", "").lower() == "getmap":
+            self.config.count("tiles")
+            self._reply(200, b"\x89PNG\r\n\x1a\n", "image/png")
+        elif url.path == "/wms" and query.get("request", "").lower() == "getfeatureinfo":
+            if not self._begin():
+                return
+            body = json.dumps(urbinfo_features(query.get("parcel", "")), ensure_ascii=False).encode("utf-8")
+            self._reply(200, body, "application/json")
+        else:
+            self._reply(404, b"", "text/plain")
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        length = int(self.headers.get("Content-Length") or 0)
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        if urlparse(self.path).path != "/login" or not form.get("username"):
+            self._reply(303, b"", "text/plain", {"Location": "/login"})
+            return
+        token = secrets.token_urlsafe(8)
+        with self.config.lock:
+            self.config.sessions.add(token)
+        self.config.count("logins")
+        self._reply(303, b"", "text/plain", {"Location": "/viewer", "Set-Cookie": f"session={token}; Path=/"})
+
+
+def _serve(handler: type, config: UpstreamConfig, name: str, host: str, port: int) -> Tuple[_Server, str]:
+    server = _Server((host, port), type(handler.__name__, (handler,), {"config": config}))
+    threading.Thread(target=server.serve_forever, name=f"standin-{name}", daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+class Standins:
+    """The stand-ins started together; `urls` and `counters()` are what the benchmarks need."""
+
+    def __init__(self, latency_s: float = 0.0, error_rate: float = 0.0, payload_bytes: int = 64 * 1024, host: str = "127.0.0.1") -> None:
+        self.wfs_config = UpstreamConfig(latency_s, error_rate, payload_bytes)
+        self.pisrs_config = UpstreamConfig(latency_s, error_rate, payload_bytes)
+        self.wfs_server, wfs_base = _serve(_WfsHandler, self.wfs_config, "wfs", host, 0)
+        self.pisrs_server, pisrs_base = _serve(_PisrsHandler, self.pisrs_config, "pisrs", host, 0)
+        self.urbinfo_config = ViewerConfig(latency_s, error_rate, payload_bytes)
+        self.urbinfo_server, urbinfo_base = _serve(_UrbinfoHandler, self.urbinfo_config, "urbinfo", host, 0)
+        self.proxy_server, self.proxy_config, proxy_url = start_standin_proxy(host, 0, StandinConfig(latency_s, error_rate))
+        self.urls = {
+            "wfs": f"{wfs_base}/wfs",
+            "wfs_capabilities": f"{wfs_base}/wfs?service=WFS&request=GetCapabilities&version=2.0.0",
+            "pisrs": {
+                "GZ-1": f"{pisrs_base}/pregledPredpisa?id=ZAKO8244",
+                "Uredba o razvrščanju objektov": f"{pisrs_base}/pregledPredpisa?id=URED8497",
+            },
+            "proxy": proxy_url,
+            "urbinfo": f"{urbinfo_base}/viewer",
+        }
+
+    def counters(self) -> Dict[str, Dict[str, int]]:
+        with self.proxy_config.lock:
+            proxy = {"requests": self.proxy_config.requests, "items": self.proxy_config.items}
+        return {
+            "wfs": self.wfs_config.counters(),
+            "pisrs": self.pisrs_config.counters(),
+            "urbinfo": self.urbinfo_config.counters(),
+            "proxy": proxy,
+        }
+
+    def close(self) -> None:
+        for server in (self.wfs_server, self.pisrs_server, self.urbinfo_server, self.proxy_server):
+            server.shutdown()
+            server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the WFS, PISRS, Urbinfo and summary proxy stand-ins until interrupted.")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--payload-kb", type=float, default=64)
+    args = parser.parse_args()
+
+    standins = Standins(args.latency_ms / 1000.0, args.error_rate, int(args.payload_kb * 1024))
+    print(f"WFS_CAPABILITIES_URL={standins.urls['wfs_capabilities']}")
+    print(f"WFS_URL={standins.urls['wfs']}")
+    print(f"CF_WORKER_PROXY_URL={standins.urls['proxy']}")
+    print(f"URBINFO_VIEWER_URL={standins.urls['urbinfo']}")
+    for law, url in standins.urls["pisrs"].items():
+        print(f"PISRS {law}: {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        standins.close()
+
+
+if __name__ == "__main__":
+    main()
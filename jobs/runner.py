@@ -0,0 +1,168 @@
+"""
+In-process background jobs for interactive lookups.
+
+A lookup (fetch all sources + summarise) runs on a small worker pool instead
+of the request thread. Each job keeps an append-only list of progress events
+(one per source, one per summary section as the proxy streams it, then the
+summary and a final "done"), which the SSE endpoint
+replays and then follows, so clients can connect late or reconnect with
+Last-Event-ID. Finished jobs are dropped after JOB_TTL_S.
+"""
+
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+from ai import summarizer
+from scrapers.orchestrator import build_raw_data
+from utils.result_store import get_result_store
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "64"))
+JOB_TTL_S = float(os.getenv("JOB_TTL_S", "600"))
+
+SOURCES = ("parcel", "zoning", "regulations", "summary")
+
+
+class QueueFullError(RuntimeError):
+    """Raised when too many jobs are queued or running."""
+
+
+def _safe(value: Any, default: str = "—") -> str:
+    return default if value is None or value == "" else str(value)
+
+
+def preview(source: str, data: Any) -> str:
+    """One-line text shown for a source while the rest of the lookup is still running."""
+    if source == "parcel":
+        return f"Parcela {_safe(data.get('parcel_id'))} v {_safe(data.get('ko'))} (namenska raba: {_safe(data.get('namenska_raba'))})."
+    if source == "zoning":
+        layers = data.get("layers") or []
+        return f"Območje: {_safe(data.get('zone_name'))}; sloji: {', '.join(layers) if layers else 'brez seznama'}."
+    if source == "regulations":
+        return "; ".join(f"{_safe(r.get('law'))} (čl. {_safe(r.get('article'))})" for r in data) or "Ni navedenih predpisov."
+    if source == "summary":
+        return _safe((data.get("summary_section") or {}).get("short"))
+    return ""
+
+
+class Job:
+    def __init__(self, address: str, parcel: str, mode: str, api_key: Optional[str] = None) -> None:
+        self.id = secrets.token_urlsafe(9)
+        self.address = address
+        self.parcel = parcel
+        self.mode = mode
+        # The submitting session's own API key; the job runs outside the request, so it is carried here.
+        self.api_key = api_key
+        self.state = "queued"
+        self.result_id: Optional[str] = None
+        self.created_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+
+    def emit(self, event: str, data: Dict[str, Any]) -> None:
+        with self._cond:
+            self.events.append({"id": len(self.events) + 1, "event": event, "data": data})
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        with self._cond:
+            self.finished_at = time.monotonic()
+            self._cond.notify_all()
+
+    def follow(self, last_event_id: int = 0, keepalive_s: float = 15.0) -> Iterator[Optional[Dict[str, Any]]]:
+        """Yield events after `last_event_id` until the job is finished; None means "send a keep-alive"."""
+        position = last_event_id
+        while True:
+            with self._cond:
+                if position >= len(self.events) and self.finished_at is None:
+                    self._cond.wait(timeout=keepalive_s)
+                pending = self.events[position:]
+                finished = self.finished_at is not None
+            if not pending and not finished:
+                yield None
+            for event in pending:
+                yield event
+            position += len(pending)
+            if finished and position >= len(self.events):
+                return
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"job_id": self.id, "state": self.state, "result_id": self.result_id, "events": len(self.events)}
+
+
+class JobRunner:
+    """Bounded worker pool plus an in-memory job table."""
+
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = JOB_MAX_PENDING) -> None:
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, address: str, parcel: str, mode: str = "api", api_key: Optional[str] = None) -> Job:
+        job = Job(address, parcel, mode, api_key)
+        with self._lock:
+            self._prune()
+            active = sum(1 for j in self._jobs.values() if j.finished_at is None)
+            if active >= self.max_pending:
+                raise QueueFullError(f"{active} lookups already pending")
+            self._jobs[job.id] = job
+        job.emit("queued", {"state": "queued"})
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        expired = [jid for jid, j in self._jobs.items() if j.finished_at is not None and now - j.finished_at > JOB_TTL_S]
+        for jid in expired:
+            del self._jobs[jid]
+
+    def _run(self, job: Job) -> None:
+        started = time.monotonic()
+        job.state = "running"
+        job.emit("state", {"state": "running"})
+
+        def on_progress(source: str, data: Any) -> None:
+            elapsed_ms = round((time.monotonic() - started) * 1000)
+            job.emit("source", {"source": source, "elapsed_ms": elapsed_ms, "preview": preview(source, data)})
+
+        def on_section(name: str, value: Any) -> None:
+            job.emit("section", {"section": name, "value": value})
+
+        try:
+            raw_data = build_raw_data(job.address, job.parcel, job.mode, on_progress=on_progress)
+            ai_summary = summarizer.summarize(raw_data, on_section=on_section, api_key=job.api_key)
+            on_progress("summary", ai_summary)
+            job.result_id = get_result_store().put({"raw_data": raw_data, "ai_summary": ai_summary})
+            job.state = "done"
+            job.emit("done", {"state": "done", "result_id": job.result_id})
+        except Exception as exc:  # pragma: no cover - fetchers/summariser guard their own errors
+            logger.warning("Lookup job %s failed: %s", job.id, exc)
+            job.state = "error"
+            job.emit("error", {"state": "error", "error": exc.__class__.__name__})
+        finally:
+            job.finish()
+
+
+_RUNNER: Optional[JobRunner] = None
+_RUNNER_LOCK = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    global _RUNNER
+    with _RUNNER_LOCK:
+        if _RUNNER is None:
+            _RUNNER = JobRunner()
+        return _RUNNER
@@ -1,12 +1,181 @@
 """
-Optional report builder (text/PDF). Currently stubbed.
+Report engine: text, HTML and PDF reports rendered as byte streams.
+
+Templates under report/templates are compiled once per process (Jinja's
+template cache, no auto-reload) and rendered with `Template.generate`, so
+reports are produced chunk by chunk instead of being joined in memory. PDF
+output is laid out from the same section context by report/pdf.py.
+`stream_zip` packs many reports into one ZIP that is written as it streams.
 """
 
-from typing import Any, Dict
+import io
+import os
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from report.pdf import stream_pdf
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+CHUNK_SIZE = 16384
+REPORT_TITLE = "Poročilo o parceli"
+
+# format -> (template, mimetype, file extension); pdf has no template of its own.
+FORMATS = {
+    "txt": ("report.txt.j2", "text/plain; charset=utf-8", "txt"),
+    "html": ("report.html.j2", "text/html; charset=utf-8", "html"),
+    "pdf": (None, "application/pdf", "pdf"),
+}
+
+_ENV = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html", "html.j2"]),
+    auto_reload=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+
+
+def _texts(ai_summary: Dict[str, Any], key: str, default: str = "—") -> Tuple[str, str]:
+    """(short, long) text of one summary section; long falls back to short."""
+    section = ai_summary.get(key) or {}
+    short = section.get("short") or default
+    return short, section.get("long") or short
+
+
+def build_context(raw_data: Optional[Dict[str, Any]], ai_summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Sections shared by every format: short lines (text/PDF), long lines and detail rows (HTML)."""
+    raw_data = raw_data or {}
+    inputs = raw_data.get("input") or {}
+    parcel = raw_data.get("parcel") or {}
+    zoning = raw_data.get("zoning") or {}
+    regs = ai_summary.get("regulations_section") or []
+
+    parcel_short, parcel_long = _texts(ai_summary, "parcel_section")
+    building_short, building_long = _texts(ai_summary, "building_section", "Podatki o vrsti pozidave niso na voljo.")
+    zoning_short, zoning_long = _texts(ai_summary, "zoning_section")
+    summary_short, summary_long = _texts(ai_summary, "summary_section")
+    parcel_details = [
+        (label, parcel[key])
+        for label, key in (("Parcela", "parcel_id"), ("K.O.", "ko"), ("Namenska raba", "namenska_raba"), ("Površina (m²)", "area_m2"))
+        if parcel.get(key) not in (None, "")
+    ]
+    zoning_details = [
+        (
+            hit.get("title", ""),
+            f"{hit.get('label') or hit.get('code')}"
+            + (f" ({hit['overlap_pct']} %)" if hit.get("overlap_pct") is not None else ""),
+        )
+        for hit in zoning.get("layer_hits") or []
+    ]
+
+    sections = [
+        {"title": "Lokacija / parcela", "lines": [parcel_short], "long_lines": [parcel_long], "details": parcel_details},
+        {"title": "Vrsta pozidave", "lines": [building_short], "long_lines": [building_long], "details": []},
+        {"title": "Prostorski pogoji", "lines": [zoning_short], "long_lines": [zoning_long], "details": zoning_details},
+        {
+            "title": "Relevantni predpisi",
+            "lines": [f"- {r.get('law', '—')}: {r.get('short', '—')}" for r in regs] or ["- Ni navedenih predpisov."],
+            "long_lines": [r.get("long") or f"{r.get('law', '—')}: {r.get('short', '—')}" for r in regs] or ["Ni navedenih predpisov."],
+            "details": [],
+        },
+        {"title": "Sklep / povzetek", "lines": [summary_short], "long_lines": [summary_long], "details": []},
+    ]
+    return {
+        "title": REPORT_TITLE,
+        "subtitle": inputs.get("normalized_parcel") or inputs.get("normalized_address") or "",
+        "sections": sections,
+        "sources": ai_summary.get("sources") or [],
+    }
+
+
+def _chunked(pieces: Iterable[str]) -> Iterator[bytes]:
+    """Coalesce Jinja's many small string pieces into ~CHUNK_SIZE UTF-8 chunks."""
+    buf: List[str] = []
+    size = 0
+    for piece in pieces:
+        buf.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield "".join(buf).encode("utf-8")
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def _pdf_lines(context: Dict[str, Any]) -> Iterator[Tuple[str, bool]]:
+    yield context["title"], True
+    if context["subtitle"]:
+        yield context["subtitle"], False
+    for section in context["sections"]:
+        yield "", False
+        yield section["title"], True
+        for line in section["lines"]:
+            yield line, False
+
+
+def stream_report(raw_data: Optional[Dict[str, Any]], ai_summary: Dict[str, Any], fmt: str = "txt") -> Iterator[bytes]:
+    """Yield the report in `fmt` ("txt", "html" or "pdf") as byte chunks."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported report format: {fmt}")
+    context = build_context(raw_data, ai_summary)
+    template_name = FORMATS[fmt][0]
+    if template_name is None:
+        return stream_pdf(_pdf_lines(context), title=context["title"])
+    return _chunked(_ENV.get_template(template_name).generate(**context))
+
+
+def build_report(raw_data: Optional[Dict[str, Any]], ai_summary: Dict[str, Any], fmt: str = "txt") -> bytes:
+    """Whole report as bytes, for callers that need it in one piece."""
+    return b"".join(stream_report(raw_data, ai_summary, fmt))
+
+
+def report_mimetype(fmt: str) -> str:
+    return FORMATS[fmt][1]
+
+
+def report_filename(fmt: str, stem: str = "porocilo") -> str:
+    return f"{stem}.{FORMATS[fmt][2]}"
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable buffer that zipfile writes into and the generator drains."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
 
+    def write(self, data: Any) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
 
-def build_report(raw_data: Dict[str, Any], ai_summary: Dict[str, Any]) -> str:
-    # TODO: Generate downloadable report content.
-    return "Report generation is not implemented yet."
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
 
 
+def stream_zip(entries: Iterable[Tuple[str, Any]], fmt: str = "txt") -> Iterator[bytes]:
+    """
+    Yield a ZIP archive of reports while it is being written. `entries` are (name, payload) pairs
+    where payload is either a (raw_data, ai_summary) tuple, rendered in `fmt`, or ready-made bytes.
+    Only the current entry's chunks and the central directory are held in memory.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, payload in entries:
+            with archive.open(name, mode="w") as entry:
+                chunks = [payload] if isinstance(payload, bytes) else stream_report(payload[0], payload[1], fmt)
+                for chunk in chunks:
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
@@ -1,12 +1,97 @@
 """
-Formatter to merge and normalize raw fetch results.
+Typed records for raw_data and the AI summary.
+
+`format_raw_data` turns the orchestrator's nested dicts into read-only records
+(utils/records.py). They read like the dicts they replace, so the summariser,
+report builder and templates are unchanged, but they are safe to share between
+coalesced lookups and caches, and encode themselves to canonical JSON once no
+matter how often they are logged, posted or stored.
 """
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
+
+from utils.records import Record
+
+
+class InputRecord(Record):
+    FIELDS = ("original_address", "normalized_address", "original_parcel", "normalized_parcel", "canonical_id")
+
+
+class ParcelRecord(Record):
+    FIELDS = (
+        "parcel_id",
+        "ko",
+        "ko_id",
+        "namenska_raba",
+        "area_m2",
+        "other",
+        "address_query",
+        "parcel_query",
+        "source",
+        "wfs_status",
+        "wfs_length",
+    )
+
+
+class RegulationRecord(Record):
+    FIELDS = ("law", "article", "snippet")
+
+
+class ZoningRecord(Record):
+    FIELDS = ("zone_name", "layers", "layer_hits", "parcel_ref", "source")
+    _CONVERT = {"layers": tuple, "layer_hits": tuple}
+
+
+def _regulations(items: Any) -> Tuple[RegulationRecord, ...]:
+    return tuple(RegulationRecord.of(item) for item in items)
+
+
+class RawData(Record):
+    FIELDS = ("input", "parcel", "regulations", "zoning")
+    _CONVERT = {
+        "input": InputRecord.of,
+        "parcel": ParcelRecord.of,
+        "regulations": _regulations,
+        "zoning": ZoningRecord.of,
+    }
+
+
+class SectionRecord(Record):
+    FIELDS = ("short", "long")
+
+
+class RegulationSummaryRecord(Record):
+    FIELDS = ("law", "short", "long", "source")
+
+
+def _regulation_summaries(items: Any) -> Tuple[RegulationSummaryRecord, ...]:
+    return tuple(RegulationSummaryRecord.of(item) for item in items)
+
+
+class SummaryRecord(Record):
+    FIELDS = (
+        "parcel_section",
+        "building_section",
+        "zoning_section",
+        "regulations_section",
+        "summary_section",
+        "sources",
+    )
+    _CONVERT = {
+        "parcel_section": SectionRecord.of,
+        "building_section": SectionRecord.of,
+        "zoning_section": SectionRecord.of,
+        "regulations_section": _regulation_summaries,
+        "summary_section": SectionRecord.of,
+        "sources": tuple,
+    }
 
 
-def format_raw_data(raw_data: Dict[str, Any]) -> Dict[str, Any]:
-    # TODO: Implement real normalization/merging logic.
-    return raw_data
+def format_raw_data(raw_data: Dict[str, Any]) -> RawData:
+    """raw_data as a RawData record; already formatted data is returned unchanged."""
+    return RawData.of(raw_data)
 
 
+def format_summary(summary: Optional[Dict[str, Any]]) -> Optional[SummaryRecord]:
+    """An AI summary (proxy answer, cache entry or demo build) as a SummaryRecord."""
+    return SummaryRecord.of(summary)
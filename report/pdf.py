@@ -0,0 +1,122 @@
+"""
+Minimal streaming PDF writer for text reports.
+
+Writes PDF objects as soon as each page is laid out and keeps only the byte
+offsets needed for the cross-reference table, so memory does not grow with the
+report length. Uses the built-in Helvetica fonts (no embedding); Slovene
+characters missing from WinAnsiEncoding (č, ć, đ) are remapped via /Differences.
+"""
+
+import textwrap
+from typing import Iterable, Iterator, List, Tuple
+
+PAGE_WIDTH = 595  # A4 in points
+PAGE_HEIGHT = 842
+MARGIN = 56
+FONT_SIZE = 10
+LEADING = 14
+# Average Helvetica glyph width is ~0.5 em, so this is a safe wrap width for 10 pt.
+WRAP_CHARS = 92
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+
+# Unused WinAnsi code points re-assigned to glyphs of the standard Helvetica set.
+_EXTRA_GLYPHS = {"Č": (0x81, "Ccaron"), "č": (0x8D, "ccaron"), "Ć": (0x8F, "Cacute"), "ć": (0x90, "cacute"), "đ": (0x9D, "dcroat")}
+_DIFFERENCES = " ".join(f"{code} /{name}" for code, name in sorted(_EXTRA_GLYPHS.values()))
+# Per-character byte cache; Python's cp1252 codec rejects the re-assigned code points.
+_CHAR_BYTES = {ch: bytes([code]) for ch, (code, _) in _EXTRA_GLYPHS.items()}
+_CHAR_BYTES["Đ"] = b"\xd0"  # Eth is visually identical to Đ
+_CHAR_BYTES.update({"\\": b"\\\\", "(": b"\\(", ")": b"\\)"})
+
+# A line is (text, bold).
+Line = Tuple[str, bool]
+
+
+def _encode(text: str) -> bytes:
+    """WinAnsi bytes for a PDF string literal, with the /Differences remapping and escaping applied."""
+    out = bytearray()
+    for ch in text:
+        encoded = _CHAR_BYTES.get(ch)
+        if encoded is None:
+            encoded = _CHAR_BYTES[ch] = ch.encode("cp1252", errors="replace")
+        out += encoded
+    return bytes(out)
+
+
+def wrap_lines(lines: Iterable[Line]) -> Iterator[Line]:
+    for text, bold in lines:
+        if not text:
+            yield "", bold
+            continue
+        for part in textwrap.wrap(text, WRAP_CHARS, subsequent_indent="  " if text.startswith("- ") else ""):
+            yield part, bold
+
+
+def _page_content(lines: List[Line]) -> bytes:
+    out = [b"BT", f"{LEADING} TL {MARGIN} {PAGE_HEIGHT - MARGIN} Td".encode("ascii")]
+    current_font = None
+    for text, bold in lines:
+        font = b"/F2" if bold else b"/F1"
+        if font != current_font:
+            out.append(font + f" {FONT_SIZE} Tf".encode("ascii"))
+            current_font = font
+        out.append(b"(" + _encode(text) + b") Tj T*")
+    out.append(b"ET")
+    return b"\n".join(out)
+
+
+def stream_pdf(lines: Iterable[Line], title: str = "") -> Iterator[bytes]:
+    """Yield a complete PDF document page by page."""
+    offsets = {}
+    position = 0
+
+    def obj(number: int, body: bytes) -> bytes:
+        nonlocal position
+        offsets[number] = position
+        data = f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n"
+        position += len(data)
+        return data
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    position = len(header)
+    yield header
+    # 1: catalog, 2: page tree (written last, once the kids are known), 3/4: fonts, 5: info.
+    yield obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    encoding = f"<< /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences [{_DIFFERENCES}] >>".encode("ascii")
+    yield obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding " + encoding + b" >>")
+    yield obj(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding " + encoding + b" >>")
+    yield obj(5, b"<< /Title (" + _encode(title) + b") /Producer (DataScraper_Prototype) >>")
+
+    next_number = 6
+    kids: List[int] = []
+    page: List[Line] = []
+
+    def flush_page() -> Iterator[bytes]:
+        nonlocal next_number
+        content = _page_content(page)
+        page_number, content_number = next_number, next_number + 1
+        next_number += 2
+        kids.append(page_number)
+        yield obj(
+            page_number,
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_number} 0 R >>".encode("ascii"),
+        )
+        yield obj(content_number, f"<< /Length {len(content)} >>\nstream\n".encode("ascii") + content + b"\nendstream")
+
+    for line in wrap_lines(lines):
+        page.append(line)
+        if len(page) >= LINES_PER_PAGE:
+            yield from flush_page()
+            page = []
+    if page or not kids:
+        yield from flush_page()
+
+    kids_ref = " ".join(f"{k} 0 R" for k in kids)
+    yield obj(2, f"<< /Type /Pages /Kids [{kids_ref}] /Count {len(kids)} >>".encode("ascii"))
+
+    xref_at = position
+    size = next_number
+    xref = [f"xref\n0 {size}\n".encode("ascii"), b"0000000000 65535 f \n"]
+    xref.extend(f"{offsets[n]:010d} 00000 n \n".encode("ascii") for n in range(1, size))
+    yield b"".join(xref)
+    yield f"trailer\n<< /Size {size} /Root 1 0 R /Info 5 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode("ascii")
@@ -0,0 +1,177 @@
+"""
+Warm Playwright browser pool shared by the browser-based scrapers.
+
+Playwright's sync API must be driven from the thread that started it, so each
+pool slot is a worker thread owning one Chromium process and one pre-warmed
+context. Callers submit a function that receives a fresh page; the browser
+launch is paid once per worker, not once per lookup. Workers check browser
+health before each job and relaunch after BROWSER_MAX_USES jobs or any error.
+
+A job submitted with `session="name"` instead gets the worker's long-lived page
+for that name, which stays open (logged in, with its routes and app state)
+between jobs until the caller closes it or the worker relaunches.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from playwright.sync_api import Browser, BrowserContext, Page, Playwright, Route, sync_playwright
+
+logger = logging.getLogger(__name__)
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_MAX_USES = int(os.getenv("BROWSER_MAX_USES", "50"))
+# Resource types the scrapers never need; aborting them keeps navigations fast and memory low.
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+
+def _block_heavy_resources(route: Route) -> None:
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        route.abort()
+    else:
+        route.continue_()
+
+
+class _BrowserWorker(threading.Thread):
+    """One pool slot: owns a Playwright driver, a Chromium process and a warm context."""
+
+    def __init__(self, jobs: "queue.Queue[Optional[tuple]]", max_uses: int, name: str) -> None:
+        super().__init__(name=name, daemon=True)
+        self._jobs = jobs
+        self._max_uses = max_uses
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._context: Optional[BrowserContext] = None
+        self._sessions: Dict[str, Page] = {}
+        self._uses = 0
+
+    def _ensure_context(self) -> BrowserContext:
+        # Health check: a crashed or disconnected browser is replaced before the next job.
+        if self._browser is None or not self._browser.is_connected():
+            self._recycle()
+            assert self._playwright is not None
+            self._browser = self._playwright.chromium.launch(headless=True)
+        if self._context is None:
+            self._context = self._browser.new_context()
+            self._context.route("**/*", _block_heavy_resources)
+        return self._context
+
+    def _recycle(self) -> None:
+        for closable in (self._context, self._browser):
+            try:
+                if closable:
+                    closable.close()
+            except Exception:
+                pass
+        self._context = None
+        self._browser = None
+        self._sessions = {}
+        self._uses = 0
+
+    def _session_page(self, session: str) -> Page:
+        page = self._sessions.get(session)
+        if page is None or page.is_closed():
+            page = self._sessions[session] = self._ensure_context().new_page()
+        return page
+
+    def _run_job(self, fn: Callable[[Page], Any], future: "Future[Any]", session: Optional[str]) -> None:
+        page = None
+        try:
+            if session is None:
+                page = self._ensure_context().new_page()
+                future.set_result(fn(page))
+            else:
+                # Session pages outlive the job; a relaunch (error, BROWSER_MAX_USES) closes them.
+                future.set_result(fn(self._session_page(session)))
+        except Exception as exc:
+            future.set_exception(exc)
+            self._recycle()
+            return
+        finally:
+            try:
+                if page and not page.is_closed():
+                    page.close()
+            except Exception:
+                pass
+        self._uses += 1
+        if self._uses >= self._max_uses:
+            self._recycle()
+
+    def run(self) -> None:
+        with sync_playwright() as p:
+            self._playwright = p
+            try:
+                self._ensure_context()  # Pre-warm before the first lookup arrives.
+            except Exception as exc:  # pragma: no cover - missing browser binaries etc.
+                logger.warning("Browser pre-warm failed: %s", exc)
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                fn, future, session = job
+                if future.set_running_or_notify_cancel():
+                    self._run_job(fn, future, session)
+            self._recycle()
+
+
+class BrowserPool:
+    """Fixed-size pool of browser workers fed from one job queue; safe to share across threads."""
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_uses: int = BROWSER_MAX_USES) -> None:
+        self.size = size
+        self.max_uses = max_uses
+        self._jobs: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._workers: List[_BrowserWorker] = []
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        with self._lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            while len(self._workers) < self.size:
+                worker = _BrowserWorker(self._jobs, self.max_uses, name=f"browser-{len(self._workers)}")
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, fn: Callable[[Page], Any], session: Optional[str] = None) -> "Future[Any]":
+        """
+        Queue `fn(page)` for the next free worker. The page is closed afterwards, unless `session`
+        names the worker's long-lived page to run on instead.
+        """
+        self._start()
+        future: "Future[Any]" = Future()
+        self._jobs.put((fn, future, session))
+        return future
+
+    def run(self, fn: Callable[[Page], Any], timeout: Optional[float] = None, session: Optional[str] = None) -> Any:
+        """Run `fn(page)` on a pooled browser and wait for its result."""
+        future = self.submit(fn, session)
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for _ in self._workers:
+                self._jobs.put(None)
+            self._workers = []
+
+
+_POOL: Optional[BrowserPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Process-wide pool; workers start on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = BrowserPool()
+            atexit.register(_POOL.shutdown)
+        return _POOL
@@ -1,13 +1,27 @@
 """
 eProstor data fetcher.
 
-Currently returns structured demo parcel data and a placeholder HTTP path
-that can be replaced with a real eProstor/WFS integration.
+Answers from the local parcel store (scrapers/parcel_store.py) when an export
+has been ingested; otherwise returns structured demo parcel data and a
+placeholder HTTP path that can be replaced with a real eProstor/WFS integration.
 """
 
-from typing import Any, Dict, Optional
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
 
-import requests
+from scrapers.parcel_store import lookup_parcel
+from utils import http_client
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+WFS_CAPABILITIES_URL = os.getenv(
+    "WFS_CAPABILITIES_URL",
+    "https://gis.arso.gov.si/arcgis/services/OPS/vodna_telesa/MapServer/"
+    "WFSServer?service=WFS&request=GetCapabilities&version=2.0.0",
+)
+_PROBES = SingleFlight("wfs_probe")
 
 
 def _dummy_parcel(address: Optional[str], parcel: Optional[str]) -> Dict[str, Any]:
@@ -22,34 +36,67 @@ def _dummy_parcel(address: Optional[str], parcel: Optional[str]) -> Dict[str, An
     }
 
 
+def _probe_wfs() -> Tuple[str, int]:
+    """(wfs_status, body length) of one GetCapabilities round-trip."""
+    resp = http_client.get(WFS_CAPABILITIES_URL, timeout=10, stream=True)
+    try:
+        if resp.status_code != 200:
+            return f"error_status_{resp.status_code}", 0
+        # Count the body in chunks instead of materialising it via resp.text.
+        return "connected", sum(len(chunk) for chunk in resp.iter_content(chunk_size=65536))
+    finally:
+        resp.close()
+
+
 def fetch_parcel_data_from_http(address: Optional[str] = None, parcel: Optional[str] = None) -> Dict[str, Any]:
     """
     Test connectivity against a public Slovenian WFS endpoint.
     This is the placeholder spot where a real eProstor/WFS call would parse live parcel data.
+    Concurrent lookups share one in-flight check.
     """
-    url = (
-        "https://gis.arso.gov.si/arcgis/services/OPS/vodna_telesa/MapServer/"
-        "WFSServer?service=WFS&request=GetCapabilities&version=2.0.0"
-    )
     try:
-        resp = requests.get(url, timeout=10)
-        data = _dummy_parcel(address, parcel)
-        if resp.status_code == 200:
-            data["wfs_status"] = "connected"
-            data["wfs_length"] = len(resp.text)
-        else:
-            data["wfs_status"] = f"error_status_{resp.status_code}"
-            data["wfs_length"] = 0
-        return data
+        (status, length), _ = _PROBES.do(WFS_CAPABILITIES_URL, _probe_wfs)
     except Exception as exc:  # pragma: no cover - network exception path
-        data = _dummy_parcel(address, parcel)
-        data["wfs_status"] = f"error_status_{exc.__class__.__name__}"
-        data["wfs_length"] = 0
-        return data
+        return fallback_parcel_data(address, parcel, f"error_status_{exc.__class__.__name__}")
+    data = _dummy_parcel(address, parcel)
+    data["wfs_status"] = status
+    data["wfs_length"] = length
+    return data
+
+
+def fallback_parcel_data(address: Optional[str], parcel: Optional[str], status: str) -> Dict[str, Any]:
+    """Demo parcel payload tagged with the reason the live lookup was skipped."""
+    data = _dummy_parcel(address, parcel)
+    data["wfs_status"] = status
+    data["wfs_length"] = 0
+    return data
+
+
+def fetch_parcel_data_from_store(address: Optional[str] = None, parcel: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Parcel data from the local store, or None when the store is missing or has no match."""
+    try:
+        record = lookup_parcel(address, parcel)
+    except Exception as exc:  # pragma: no cover - corrupt/locked store
+        logger.warning("Local parcel store lookup failed: %s", exc)
+        return None
+    if record is None:
+        return None
+    ko = f"{record['ko_id']} K.O. {record['ko_name']}".strip()
+    return {
+        "parcel_id": record["parcel_no"],
+        "ko": ko,
+        "ko_id": record["ko_id"],
+        "namenska_raba": record["namenska_raba"],
+        "area_m2": record["area_m2"],
+        "other": "local cadastral store",
+        "address_query": address,
+        "parcel_query": parcel,
+        "source": "local_store",
+    }
 
 
 def fetch_parcel_data(address: Optional[str] = None, parcel: Optional[str] = None) -> Dict[str, Any]:
-    """Return parcel data, using HTTP test with safe fallback to dummy."""
-    return fetch_parcel_data_from_http(address, parcel)
+    """Return parcel data from the local store, falling back to the HTTP test and then to dummy."""
+    return fetch_parcel_data_from_store(address, parcel) or fetch_parcel_data_from_http(address, parcel)
 
 
@@ -0,0 +1,96 @@
+"""
+Streaming GML feature reader (WFS GetFeature responses, eProstor GML exports).
+
+Uses ElementTree.iterparse and clears every feature once it has been yielded,
+so memory stays flat no matter how large the document is. Each feature becomes
+a flat dict of its simple properties (lower-cased local names) plus a
+"geometry" entry in the utils.geometry format when it has polygon geometry.
+"""
+
+from typing import IO, Any, Dict, Iterator, List, Optional, Union
+from xml.etree.ElementTree import Element, iterparse
+
+from utils.geometry import Geometry, Ring
+
+# Elements whose children are features, across GML 2/3 and WFS 1.x/2.0.
+_MEMBER_TAGS = {"featureMember", "featureMembers", "member"}
+_POLYGON_TAGS = {"Polygon", "Surface", "PolygonPatch"}
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_coords(text: str, tag: str, dims: int) -> Ring:
+    if tag == "coordinates":  # GML 2: "x,y x,y ..."
+        pairs = [p.split(",") for p in text.split()]
+        return [[float(p[0]), float(p[1])] for p in pairs if len(p) >= 2]
+    values = [float(v) for v in text.split()]
+    return [[values[i], values[i + 1]] for i in range(0, len(values) - 1, dims)]
+
+
+def _ring(ring_el: Element) -> Ring:
+    points: Ring = []
+    for el in ring_el.iter():
+        name = _local(el.tag)
+        if name in ("posList", "coordinates") and el.text:
+            dims = int(el.get("srsDimension") or el.get("dimension") or 2)
+            points.extend(_parse_coords(el.text, name, dims))
+        elif name == "pos" and el.text:
+            values = el.text.split()
+            points.append([float(values[0]), float(values[1])])
+    return points
+
+
+def _geometry(feature: Element) -> Optional[Geometry]:
+    polygons: Geometry = []
+    for el in feature.iter():
+        if _local(el.tag) not in _POLYGON_TAGS:
+            continue
+        exterior: Optional[Ring] = None
+        holes: List[Ring] = []
+        for boundary in el:
+            name = _local(boundary.tag)
+            if name in ("exterior", "outerBoundaryIs"):
+                exterior = _ring(boundary)
+            elif name in ("interior", "innerBoundaryIs"):
+                holes.append(_ring(boundary))
+        if exterior and len(exterior) >= 3:
+            polygons.append([exterior] + [h for h in holes if len(h) >= 3])
+    return polygons or None
+
+
+def _properties(feature: Element) -> Dict[str, Any]:
+    props: Dict[str, Any] = {}
+    for child in feature:
+        if len(child) == 0 and child.text and child.text.strip():
+            props[_local(child.tag).lower()] = child.text.strip()
+    fid = feature.get("{http://www.opengis.net/gml/3.2}id") or feature.get("{http://www.opengis.net/gml}id") or feature.get("fid")
+    if fid:
+        props.setdefault("gml_id", fid)
+    return props
+
+
+def iter_gml_features(source: Union[str, IO[bytes]]) -> Iterator[Dict[str, Any]]:
+    """Yield one property dict per feature from a GML file path or binary stream."""
+    stack: List[Element] = []
+    for event, el in iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(el)
+            continue
+        stack.pop()
+        if not stack:
+            continue
+        parent = stack[-1]
+        # A feature is any element directly inside a member wrapper. Processed features and
+        # member wrappers are detached from their parents so the tree never grows.
+        if _local(parent.tag) in _MEMBER_TAGS:
+            props = _properties(el)
+            props["feature_type"] = _local(el.tag)
+            geometry = _geometry(el)
+            if geometry:
+                props["geometry"] = geometry
+            yield props
+            parent.remove(el)
+        elif _local(el.tag) in _MEMBER_TAGS:
+            parent.remove(el)
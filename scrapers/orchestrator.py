@@ -0,0 +1,215 @@
+"""
+Fetch orchestrator for the parcel, regulation and zoning sources.
+
+Fans the fetchers out on a shared thread pool so a lookup costs roughly the
+slowest source instead of the sum of all of them. Every source has its own
+deadline and the whole lookup shares one overall budget; a source that misses
+either gets its existing demo/fallback payload.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+from report.formatter import RawData, format_raw_data
+from scrapers.pisrs_index import index_available
+from scrapers.registry import FALLBACKS, FETCHERS
+from scrapers.urbinfo_api import URBINFO_BROWSER_ENABLED, URBINFO_COLD_LOOKUP_S
+from utils import metrics
+from utils.address_index import canonical_id
+from utils.host_scheduler import in_context
+from utils.input_normalization import normalize_inputs
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Called as on_progress(source, data) each time a source settles (fetched or fallen back).
+ProgressCallback = Callable[[str, Any], None]
+
+# Parcel payload fields echoing the caller's raw input (address, parcel); a joined lookup gets its own.
+CALLER_FIELDS = ("address_query", "parcel_query")
+
+# Zoning starts once the parcel has settled. With the Urbinfo viewer configured, its default
+# deadline covers a cold viewer lookup (open + login + feature info), and the overall budget
+# grows with it so the parcel stage keeps its share.
+_ZONING_DEADLINE_DEFAULT_S = URBINFO_COLD_LOOKUP_S if URBINFO_BROWSER_ENABLED else 5.0
+FETCH_BUDGET_S = float(os.getenv("FETCH_BUDGET_S", str(10.0 + _ZONING_DEADLINE_DEFAULT_S)))
+SOURCE_DEADLINES_S = {
+    "parcel": float(os.getenv("PARCEL_DEADLINE_S", "11")),
+    "parcel_browser": float(os.getenv("PARCEL_BROWSER_DEADLINE_S", "15")),
+    "parcel_auto": float(os.getenv("PARCEL_AUTO_DEADLINE_S", "15")),
+    "regulations": float(os.getenv("REGULATIONS_DEADLINE_S", "11")),
+    "zoning": float(os.getenv("ZONING_DEADLINE_S", str(_ZONING_DEADLINE_DEFAULT_S))),
+}
+
+# Timed-out fetchers cannot be cancelled and keep their worker until their own
+# HTTP/browser timeout fires, so the pool is sized for a few overlapping lookups.
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("FETCH_WORKERS", "16")),
+    thread_name_prefix="fetch",
+)
+# Concurrent lookups of the same normalised address/parcel and mode share one fetch_all.
+_LOOKUPS = SingleFlight("lookup")
+
+
+def _classify(source: str, data: Any) -> str:
+    """Outcome label for metrics: "live", "cached" (local store/index) or "fallback" (demo payload)."""
+    if source == "parcel":
+        if data.get("source") == "local_store":
+            return "cached"
+        return "live" if data.get("wfs_status") == "connected" else "fallback"
+    if source == "parcel_browser":
+        fallback = FALLBACKS.get("parcel_browser")(data.get("address_query"), data.get("parcel_query"))
+        return "fallback" if data == fallback else "live"
+    if source == "parcel_auto":
+        # Routed lookups answer with either backend's payload; only the API one carries a WFS status.
+        api_payload = "wfs_status" in data or data.get("source") == "local_store"
+        return _classify("parcel" if api_payload else "parcel_browser", data)
+    if source == "zoning":
+        return {"local_overlay": "cached", "urbinfo_browser": "live"}.get(data.get("source"), "fallback")
+    if source == "regulations":
+        if data == FALLBACKS.get("regulations")():
+            return "fallback"
+        if any(reg.get("article") != "—" for reg in data):
+            return "cached"
+        unavailable = ("Povzetek ni na voljo", "Kratek povzetek trenutno ni na voljo")
+        return "fallback" if all(str(reg.get("snippet", "")).startswith(unavailable) for reg in data) else "live"
+    return "live"
+
+
+def _await(
+    future: "Future[Any]",
+    source: str,
+    deadline_s: float,
+    started: float,
+    fallback: Callable[[], Any],
+    submitted: Optional[float] = None,
+) -> Any:
+    """
+    Wait for a source within min(its deadline, remaining budget); fall back on miss or error.
+    Records the source's latency (from `submitted`) and outcome in the stage metrics.
+    """
+    submitted = started if submitted is None else submitted
+    remaining = FETCH_BUDGET_S - (time.monotonic() - started)
+    timeout = max(0.0, min(deadline_s, remaining))
+    try:
+        data = future.result(timeout=timeout)
+        metrics.observe("fetch", source, _classify(source, data), time.monotonic() - submitted)
+        return data
+    except FutureTimeoutError:
+        logger.warning("Source %s missed its deadline (%.1fs), using fallback.", source, timeout)
+    except Exception as exc:  # pragma: no cover - fetchers already guard their own errors
+        logger.warning("Source %s failed: %s, using fallback.", source, exc)
+    future.cancel()
+    metrics.observe("fetch", source, "fallback", time.monotonic() - submitted)
+    return fallback()
+
+
+def _notify(on_progress: Optional[ProgressCallback], source: str, data: Any) -> None:
+    if on_progress is None:
+        return
+    try:
+        on_progress(source, data)
+    except Exception as exc:  # pragma: no cover - progress reporting must never break a lookup
+        logger.warning("Progress callback failed for %s: %s", source, exc)
+
+
+def fetch_all(
+    address: Optional[str],
+    parcel: Optional[str],
+    mode: str = "api",
+    on_progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Fetch parcel, regulation and zoning data concurrently.
+    Returns a dict with "parcel", "regulations" and "zoning" keys, always populated.
+    `on_progress` is told about each source as soon as it settles. Fetchers run with the caller's
+    request priority (utils/host_scheduler.py).
+    """
+    started = time.monotonic()
+    query = {"address_query": address, "parcel_query": parcel}
+
+    # Fetchers are resolved per lookup, so browser mode (Playwright) is only imported when used.
+    if mode == "browser":
+        parcel_source = "parcel_browser"
+        parcel_fallback = lambda: FALLBACKS.get("parcel_browser")(address, parcel)  # noqa: E731
+    else:
+        # "auto" routes between the API and the browser (scrapers/router.py).
+        parcel_source = "parcel_auto" if mode == "auto" else "parcel"
+        parcel_fallback = lambda: FALLBACKS.get("parcel")(address, parcel, "timeout")  # noqa: E731
+    parcel_future = _EXECUTOR.submit(in_context(FETCHERS.get(parcel_source)), address, parcel)
+
+    # With a local article index, regulations are ranked against the parcel and zoning data
+    # in milliseconds, so they wait for both. Without it, live PISRS snippets do not depend
+    # on the parcel and start alongside it.
+    fetch_regulations = FETCHERS.get("regulations")
+    regulations_future = None if index_available() else _EXECUTOR.submit(in_context(fetch_regulations), query)
+
+    parcel_data = _await(parcel_future, parcel_source, SOURCE_DEADLINES_S[parcel_source], started, parcel_fallback)
+    _notify(on_progress, "parcel", parcel_data)
+
+    zoning_submitted = time.monotonic()
+    zoning_future = _EXECUTOR.submit(in_context(FETCHERS.get("zoning")), parcel_data)
+    zoning_data = _await(
+        zoning_future,
+        "zoning",
+        SOURCE_DEADLINES_S["zoning"],
+        started,
+        lambda: FALLBACKS.get("zoning")(parcel_data),
+        zoning_submitted,
+    )
+    _notify(on_progress, "zoning", zoning_data)
+    regulations_submitted = started
+    if regulations_future is None:
+        regulations_submitted = time.monotonic()
+        regulations_future = _EXECUTOR.submit(in_context(fetch_regulations), parcel_data, zoning_data)
+    regulations_data = _await(
+        regulations_future,
+        "regulations",
+        SOURCE_DEADLINES_S["regulations"],
+        started,
+        FALLBACKS.get("regulations"),
+        regulations_submitted,
+    )
+    _notify(on_progress, "regulations", regulations_data)
+
+    metrics.observe("fetch_all", mode, "ok", time.monotonic() - started)
+    logger.info("Fetched all sources in %.2fs (mode=%s).", time.monotonic() - started, mode)
+    return {"parcel": parcel_data, "regulations": regulations_data, "zoning": zoning_data}
+
+
+def build_raw_data(
+    address: str,
+    parcel: str,
+    mode: str = "api",
+    on_progress: Optional[ProgressCallback] = None,
+) -> RawData:
+    """
+    Normalise the inputs, fetch every source and assemble the `raw_data` record passed to the summariser.
+    Identical lookups already in flight at the same priority are joined instead of fetched again.
+    """
+    with metrics.span("normalize"):
+        normalized_address, normalized_parcel = normalize_inputs(address, parcel)
+        lookup_id = canonical_id(normalized_address, normalized_parcel)
+    fetched, shared = _LOOKUPS.do((mode, normalized_address, normalized_parcel), fetch_all, address, parcel, mode, on_progress)
+    if shared:
+        own = {field: value for field, value in zip(CALLER_FIELDS, (address, parcel)) if field in fetched["parcel"]}
+        fetched = {**fetched, "parcel": {**fetched["parcel"], **own}}
+        # Progress went to the caller that ran the lookup; this one hears about every source at once.
+        for source in ("parcel", "zoning", "regulations"):
+            _notify(on_progress, source, fetched[source])
+    return format_raw_data({
+        "input": {
+            "original_address": address,
+            "normalized_address": normalized_address,
+            "original_parcel": parcel,
+            "normalized_parcel": normalized_parcel,
+            "canonical_id": lookup_id,
+        },
+        "parcel": fetched["parcel"],
+        "regulations": fetched["regulations"],
+        "zoning": fetched["zoning"],
+    })
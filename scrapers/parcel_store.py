@@ -0,0 +1,294 @@
+"""
+Local spatial store for cadastral parcels (eProstor bulk exports).
+
+An ingestion step loads a GML, GeoPackage or CSV (WKT geometry) export into a
+SQLite database with a key index on (k.o., parcel number) and an R*Tree over
+parcel bounding boxes. `fetch_parcel_data` answers from here by ID or by
+point-in-polygon in milliseconds and only goes to the live WFS on a miss.
+
+    python -m scrapers.parcel_store ingest KN_parcele.gml
+    python -m scrapers.parcel_store ingest parcele.gpkg --store data/parcels.sqlite
+    python -m scrapers.parcel_store lookup "1234/5 k.o. Center"
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from utils.geometry import Geometry, area, bbox, contains_point, parse_gpkg_geometry, parse_wkt
+
+PARCEL_STORE_PATH = os.getenv(
+    "PARCEL_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "parcels.sqlite"),
+)
+
+# Attribute names seen in eProstor/GURS exports, matched case-insensitively.
+FIELD_ALIASES = {
+    "ko_id": ("ko_id", "sifko", "ko_sifko", "ko_sif", "katastrska_obcina_id"),
+    "ko_name": ("ko_name", "ime_ko", "imeko", "ko_ime", "katastrska_obcina"),
+    "parcel_no": ("parcel_no", "st_parcele", "parcela", "parc_st", "stevilka_parcele", "label"),
+    "namenska_raba": ("namenska_raba", "raba", "npr", "vrsta_rabe"),
+    "area_m2": ("area_m2", "povrsina", "area", "uradna_povrsina"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parcels (
+    id INTEGER PRIMARY KEY,
+    ko_id TEXT NOT NULL,
+    ko_name TEXT,
+    parcel_no TEXT NOT NULL,
+    namenska_raba TEXT,
+    area_m2 REAL,
+    geometry TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS parcels_key ON parcels (ko_id, parcel_no);
+CREATE VIRTUAL TABLE IF NOT EXISTS parcels_rtree USING rtree (id, min_x, max_x, min_y, max_y);
+"""
+
+
+def _pick(props: Dict[str, Any], field: str) -> Any:
+    lowered = {k.lower(): v for k, v in props.items()}
+    for alias in FIELD_ALIASES[field]:
+        value = lowered.get(alias)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def normalize_record(props: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map export attributes onto the store schema; None when the key fields are missing."""
+    ko_id = _pick(props, "ko_id")
+    parcel_no = _pick(props, "parcel_no")
+    if ko_id is None or parcel_no is None:
+        return None
+    geometry = props.get("geometry")
+    area_value = _pick(props, "area_m2")
+    try:
+        area_m2 = float(area_value) if area_value is not None else (round(area(geometry), 1) if geometry else None)
+    except ValueError:
+        area_m2 = None
+    return {
+        "ko_id": str(ko_id).strip(),
+        "ko_name": (str(_pick(props, "ko_name") or "")).strip(),
+        "parcel_no": str(parcel_no).replace(" ", ""),
+        "namenska_raba": (str(_pick(props, "namenska_raba") or "")).strip(),
+        "area_m2": area_m2,
+        "geometry": geometry,
+    }
+
+
+# -- Export readers --------------------------------------------------------
+
+
+def iter_csv(path: str) -> Iterator[Dict[str, Any]]:
+    """CSV with attribute columns and a `wkt` (or `geometry`) column."""
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        for row in csv.DictReader(fh):
+            props: Dict[str, Any] = dict(row)
+            wkt = row.get("wkt") or row.get("geometry") or row.get("WKT")
+            props["geometry"] = parse_wkt(wkt) if wkt else None
+            yield props
+
+
+def iter_gpkg(path: str, table: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Features from the first (or named) feature table of a GeoPackage."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT table_name, column_name FROM gpkg_geometry_columns").fetchall()
+        if table:
+            rows = [r for r in rows if r[0] == table]
+        if not rows:
+            raise ValueError(f"No feature table found in {path}")
+        table_name, geom_column = rows[0]
+        cursor = conn.execute(f'SELECT * FROM "{table_name}"')
+        columns = [d[0] for d in cursor.description]
+        for row in cursor:
+            props = dict(zip(columns, row))
+            blob = props.pop(geom_column, None)
+            props["geometry"] = parse_gpkg_geometry(blob) if blob else None
+            yield props
+    finally:
+        conn.close()
+
+
+def iter_gml(path: str) -> Iterator[Dict[str, Any]]:
+    from scrapers.gml import iter_gml_features
+
+    return iter_gml_features(path)
+
+
+def iter_export(path: str) -> Iterator[Dict[str, Any]]:
+    lowered = path.lower()
+    if lowered.endswith(".gpkg"):
+        return iter_gpkg(path)
+    if lowered.endswith((".gml", ".xml")):
+        return iter_gml(path)
+    if lowered.endswith(".csv"):
+        return iter_csv(path)
+    raise ValueError(f"Unsupported export format: {path}")
+
+
+# -- Store -------------------------------------------------------------------
+
+
+class ParcelStore:
+    """SQLite-backed parcel store; one connection per thread."""
+
+    def __init__(self, path: str = PARCEL_STORE_PATH) -> None:
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def ingest(self, records: Iterable[Dict[str, Any]], batch_size: int = 1000) -> int:
+        """Insert or replace parcels; returns the number of stored records."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        count = 0
+        with conn:
+            for props in records:
+                record = normalize_record(props)
+                if record is None:
+                    continue
+                geometry = record["geometry"]
+                conn.execute(
+                    "INSERT INTO parcels (ko_id, ko_name, parcel_no, namenska_raba, area_m2, geometry) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (ko_id, parcel_no) DO UPDATE SET ko_name = excluded.ko_name, "
+                    "namenska_raba = excluded.namenska_raba, area_m2 = excluded.area_m2, geometry = excluded.geometry",
+                    (
+                        record["ko_id"],
+                        record["ko_name"],
+                        record["parcel_no"],
+                        record["namenska_raba"],
+                        record["area_m2"],
+                        json.dumps(geometry, separators=(",", ":")) if geometry else None,
+                    ),
+                )
+                # No RETURNING (SQLite 3.35+): the key index makes the follow-up lookup cheap.
+                parcel_id = conn.execute(
+                    "SELECT id FROM parcels WHERE ko_id = ? AND parcel_no = ?", (record["ko_id"], record["parcel_no"])
+                ).fetchone()[0]
+                conn.execute("DELETE FROM parcels_rtree WHERE id = ?", (parcel_id,))
+                if geometry:
+                    min_x, min_y, max_x, max_y = bbox(geometry)
+                    conn.execute(
+                        "INSERT INTO parcels_rtree (id, min_x, max_x, min_y, max_y) VALUES (?, ?, ?, ?, ?)",
+                        (parcel_id, min_x, max_x, min_y, max_y),
+                    )
+                count += 1
+                if count % batch_size == 0:
+                    conn.commit()
+        return count
+
+    @staticmethod
+    def _row_to_record(row: sqlite3.Row, with_geometry: bool = False) -> Dict[str, Any]:
+        record = {
+            "ko_id": row["ko_id"],
+            "ko_name": row["ko_name"],
+            "parcel_no": row["parcel_no"],
+            "namenska_raba": row["namenska_raba"],
+            "area_m2": row["area_m2"],
+        }
+        if with_geometry:
+            record["geometry"] = json.loads(row["geometry"]) if row["geometry"] else None
+        return record
+
+    def by_key(self, ko_id: str, parcel_no: str, with_geometry: bool = False) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT * FROM parcels WHERE ko_id = ? AND parcel_no = ?", (str(ko_id), parcel_no.replace(" ", ""))
+        ).fetchone()
+        return self._row_to_record(row, with_geometry) if row else None
+
+    def geometry(self, ko_id: str, parcel_no: str) -> Optional[Geometry]:
+        row = self._conn().execute(
+            "SELECT geometry FROM parcels WHERE ko_id = ? AND parcel_no = ?", (str(ko_id), parcel_no.replace(" ", ""))
+        ).fetchone()
+        return json.loads(row["geometry"]) if row and row["geometry"] else None
+
+    def at_point(self, x: float, y: float, with_geometry: bool = False) -> Optional[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT p.* FROM parcels_rtree r JOIN parcels p ON p.id = r.id "
+            "WHERE r.min_x <= ? AND r.max_x >= ? AND r.min_y <= ? AND r.max_y >= ?",
+            (x, x, y, y),
+        ).fetchall()
+        for row in rows:
+            geometry: Geometry = json.loads(row["geometry"]) if row["geometry"] else []
+            if geometry and contains_point(geometry, x, y):
+                return self._row_to_record(row, with_geometry)
+        return None
+
+
+_STORE: Optional[ParcelStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_parcel_store() -> Optional[ParcelStore]:
+    """The process-wide store, or None until an export has been ingested."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None and os.path.exists(PARCEL_STORE_PATH):
+            _STORE = ParcelStore(PARCEL_STORE_PATH)
+        return _STORE
+
+
+def lookup_parcel(
+    address: Optional[str],
+    parcel: Optional[str],
+    with_geometry: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """Resolve the input (parcel number first, then address coordinates) against the local store."""
+    store = get_parcel_store()
+    if store is None:
+        return None
+    from utils.address_index import get_resolver
+
+    resolver = get_resolver()
+    if parcel:
+        resolved = resolver.resolve_parcel(parcel)
+        if resolved["ko_id"] and resolved["parcel_no"]:
+            record = store.by_key(resolved["ko_id"], resolved["parcel_no"], with_geometry)
+            if record:
+                return record
+    if address:
+        resolved = resolver.resolve_address(address)
+        if resolved["x"] is not None and resolved["y"] is not None:
+            return store.at_point(resolved["x"], resolved["y"], with_geometry)
+    return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local cadastral parcel store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="load a GML / GeoPackage / CSV export")
+    ingest.add_argument("export")
+    ingest.add_argument("--store", default=PARCEL_STORE_PATH)
+    lookup = sub.add_parser("lookup", help="look up a parcel number or address")
+    lookup.add_argument("query")
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        count = ParcelStore(args.store).ingest(iter_export(args.export))
+        print(f"[parcel_store] Stored {count} parcels in {args.store}")
+        return 0 if count else 1
+
+    is_parcel = args.query[:1].isdigit()
+    record = lookup_parcel(None if is_parcel else args.query, args.query if is_parcel else None)
+    print(json.dumps(record, ensure_ascii=False) if record else "Not found.")
+    return 0 if record else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,63 +4,192 @@ PISRS scraper for legal regulations (GZ-1, Uredba o razvrščanju objektov).
 Fetches HTML from PISRS pages and extracts short text snippets for AI input.
 """
 
-import re
-from typing import Any, Dict, List
-
-import requests
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from scrapers.pisrs_extract import stream_extract
+from scrapers.pisrs_index import search_regulations
+from utils import http_client, metrics
+from utils.host_scheduler import BATCH, in_context, priority
+from utils.cache import CACHE_DIR, DiskCache, LRUCache
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
 
 PISRS_URLS = {
     "GZ-1": "https://pisrs.si/pregledPredpisa?id=ZAKO8244",
     "Uredba o razvrščanju objektov": "https://pisrs.si/pregledPredpisa?id=URED8497",
 }
 
-
-def _fetch_snippet(url: str, max_len: int = 400) -> str:
+# Laws change rarely: cached snippets are served for a week, then revalidated in the background.
+PISRS_CACHE_TTL_S = float(os.getenv("PISRS_CACHE_TTL_S", str(7 * 24 * 3600)))
+# After a failed revalidation the stale snippet is kept and PISRS is retried after this delay.
+PISRS_RETRY_S = float(os.getenv("PISRS_RETRY_S", "300"))
+
+_SNIPPET_MEMORY = LRUCache(max_items=64)
+_SNIPPET_DISK = DiskCache(os.path.join(CACHE_DIR, "pisrs"))
+_REVALIDATING: set = set()
+_REVALIDATING_LOCK = threading.Lock()
+# Concurrent cache misses for the same page share one download.
+_DOWNLOADS = SingleFlight("pisrs_download")
+
+
+def _download_entry(url: str, max_len: int, entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Fetch a snippet, revalidating `entry` with ETag/If-Modified-Since when given.
+    Returns the new cache entry, or None when PISRS answered with an error.
+    """
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    resp = http_client.get(url, headers=headers, timeout=10, stream=True)
+    now = time.time()
+    if resp.status_code != 200:
+        resp.close()
+        if resp.status_code == 304 and entry:
+            return {**entry, "expires_at": now + PISRS_CACHE_TTL_S}
+        return None
+    # Reads only as much of the page as the snippet needs, then drops the connection.
+    extractor = stream_extract(resp, max_chars=max_len)
+    return {
+        "snippet": extractor.snippet,
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "expires_at": now + PISRS_CACHE_TTL_S,
+    }
+
+
+def _cache_get(key: str) -> Optional[Dict[str, Any]]:
+    entry = _SNIPPET_MEMORY.get(key)
+    if entry is None:
+        entry = _SNIPPET_DISK.get(key)
+        if entry is not None:
+            _SNIPPET_MEMORY.set(key, entry)
+    return entry
+
+
+def _cache_set(key: str, entry: Dict[str, Any]) -> None:
+    _SNIPPET_MEMORY.set(key, entry)
+    _SNIPPET_DISK.set(key, entry)
+
+
+def _download_fresh(url: str, max_len: int, key: str) -> Optional[Dict[str, Any]]:
+    entry = _download_entry(url, max_len, None)
+    if entry is not None and entry["snippet"]:
+        _cache_set(key, entry)
+    return entry
+
+
+def _revalidate(url: str, max_len: int, key: str, entry: Dict[str, Any]) -> None:
     try:
-        resp = requests.get(url, timeout=10)
-        if resp.status_code != 200:
-            return "Povzetek ni na voljo (napaka pri dostopu na PISRS)."
-        html = resp.text or ""
-        text = re.sub(r"<[^>]+>", " ", html)
+        # Nobody is waiting for a revalidation; it queues behind interactive requests to PISRS.
+        with priority(BATCH):
+            fresh = _download_entry(url, max_len, entry)
+    except Exception as exc:  # pragma: no cover - network/parse errors
+        logger.warning("PISRS revalidation failed for %s: %s", url, exc)
+        fresh = None
+    if fresh is None or not fresh["snippet"]:
+        fresh = {**entry, "expires_at": time.time() + PISRS_RETRY_S}
+    _cache_set(key, fresh)
+    with _REVALIDATING_LOCK:
+        _REVALIDATING.discard(key)
 
-        idx = text.find("function ()")
-        if idx != -1:
-            text = text[:idx]
 
-        text = re.sub(r"\s+", " ", text).strip()
+def _revalidate_in_background(url: str, max_len: int, key: str, entry: Dict[str, Any]) -> None:
+    with _REVALIDATING_LOCK:
+        if key in _REVALIDATING:
+            return
+        _REVALIDATING.add(key)
+    threading.Thread(target=_revalidate, args=(url, max_len, key, entry), daemon=True).start()
 
-        for key in ["Gradbeni zakon", "Uredba o razvrščanju objektov"]:
-            k_idx = text.find(key)
-            if k_idx != -1:
-                text = text[k_idx:]
-                break
 
-        # Cleaning is intentionally simple; production would parse articles/sections more precisely.
-        if not text:
+def _fetch_snippet(url: str, max_len: int = 400) -> str:
+    """Return a cleaned snippet, serving cached (possibly stale) text and revalidating in the background."""
+    key = f"{max_len}:{url}"
+    with metrics.span("fetch", "pisrs_snippet", "cached") as span:
+        entry = _cache_get(key)
+        if entry is not None:
+            if entry.get("expires_at", 0) <= time.time():
+                _revalidate_in_background(url, max_len, key, entry)
+            return entry["snippet"]
+
+        span.outcome = "fallback"
+        try:
+            entry, _ = _DOWNLOADS.do(key, _download_fresh, url, max_len, key)
+        except Exception as exc:  # pragma: no cover - network/parse errors
+            return f"Povzetek ni na voljo (napaka: {exc.__class__.__name__})."
+        if entry is None:
+            return "Povzetek ni na voljo (napaka pri dostopu na PISRS)."
+        if not entry["snippet"]:
             return "Kratek povzetek trenutno ni na voljo."
-
-        snippet = text[:max_len]
-        if len(text) > max_len:
-            snippet += "…"
-        return snippet
-    except Exception as exc:  # pragma: no cover - network/parse errors
-        return f"Povzetek ni na voljo (napaka: {exc.__class__.__name__})."
-
-
-def fetch_regulations(raw_parcel_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-    demo_regs = [
+        span.outcome = "live"
+        return entry["snippet"]
+
+
+def fetch_articles(url: str, articles: Optional[List[str]] = None, max_articles: int = 0) -> List[Dict[str, Any]]:
+    """
+    Stream a PISRS page and return article (člen) records: {"article", "title", "text"}.
+    Pass `articles` to pick specific article numbers, or `max_articles` to cap the count;
+    with neither, every article on the page is returned.
+    """
+    resp = http_client.get(url, timeout=30, stream=True)
+    if resp.status_code != 200:
+        resp.close()
+        return []
+    extractor = stream_extract(
+        resp,
+        max_chars=0,
+        max_articles=max_articles or (0 if articles else 100000),
+        wanted_articles=set(articles) if articles else None,
+        max_bytes=50_000_000,
+    )
+    return extractor.articles
+
+
+def fallback_regulations() -> List[Dict[str, Any]]:
+    """Demo regulations used when PISRS is unreachable or too slow."""
+    return [
         {"law": "GZ-1", "article": "16", "snippet": "Postopki za gradnjo objektov (demo)."},
         {"law": "Uredba o razvrščanju objektov", "article": "3", "snippet": "Razvrstitev objektov (demo)."},
     ]
 
-    regs: List[Dict[str, Any]] = []
+
+def fetch_regulations(
+    raw_parcel_data: Dict[str, Any],
+    zoning_data: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Relevant regulation articles for the parcel. Answers from the local article index
+    (scrapers/pisrs_index.py) when it is built; otherwise returns cached/live PISRS snippets.
+    """
+    hits = search_regulations(raw_parcel_data, zoning_data)
+    if hits:
+        return [
+            {
+                "law": hit["law"],
+                "article": hit["article"],
+                "snippet": f"({hit['title']}) {hit['text']}" if hit["title"] else hit["text"],
+            }
+            for hit in hits
+        ]
+
     try:
-        for law_name, url in PISRS_URLS.items():
-            snippet = _fetch_snippet(url)
-            regs.append({"law": law_name, "article": "—", "snippet": snippet})
-        return regs
+        # Both laws are fetched in parallel so the call costs one PISRS round-trip, not two.
+        with ThreadPoolExecutor(max_workers=len(PISRS_URLS)) as pool:
+            snippets = list(pool.map(in_context(_fetch_snippet), PISRS_URLS.values()))
+        return [
+            {"law": law_name, "article": "—", "snippet": snippet}
+            for law_name, snippet in zip(PISRS_URLS, snippets)
+        ]
     except Exception as exc:  # pragma: no cover - network/parse errors
-        print(f"[pisrs_api] Error fetching PISRS, using demo regs. {exc}")
-        return demo_regs
+        logger.warning("PISRS fetch failed, using demo regulations: %s", exc)
+        return fallback_regulations()
 
 
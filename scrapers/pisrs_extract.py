@@ -0,0 +1,205 @@
+"""
+Streaming text extraction for PISRS regulation pages.
+
+Feeds the HTML in chunks through an incremental parser, drops tags, scripts and
+styles, collapses whitespace on the fly and stops as soon as enough text after
+the law's title anchor has been collected. Memory per call is bounded by the
+snippet/article limits, not by the page size.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import requests
+
+ANCHORS = ("Gradbeni zakon", "Uredba o razvrščanju objektov")
+# "16. člen", "16.a člen", "16. a člen"
+ARTICLE_HEADING_RE = re.compile(r"(\d+)\.\s?([a-z]?)\s?člen\b")
+# Longest possible heading; text closer than this to the buffer end may still be a split heading.
+_HEADING_GUARD = 16
+_SKIP_TAGS = {"script", "style", "noscript", "template"}
+_WS_RE = re.compile(r"\s+")
+
+
+class PisrsTextExtractor(HTMLParser):
+    """
+    Incremental extractor: call feed() with HTML chunks until `done`, then close().
+
+    - `snippet`: the first `max_chars` characters starting at the first anchor
+      (or at the start of the text when no anchor appears), with "…" when truncated.
+    - `articles`: up to `max_articles` article records ({"article", "title", "text"}),
+      optionally restricted to the article numbers in `wanted_articles`.
+    """
+
+    def __init__(
+        self,
+        anchors: Iterable[str] = ANCHORS,
+        max_chars: int = 400,
+        max_articles: int = 0,
+        wanted_articles: Optional[Set[str]] = None,
+        article_max_chars: int = 1500,
+    ) -> None:
+        super().__init__(convert_charrefs=True)
+        self.anchors = tuple(anchors)
+        self.max_chars = max_chars
+        self.max_articles = max_articles
+        self.wanted_articles = set(wanted_articles) if wanted_articles else None
+        self.article_max_chars = article_max_chars
+        self.articles: List[Dict[str, Any]] = []
+
+        self._skip_depth = 0
+        self._last_space = True
+        self._anchor_found = False
+        self._anchor_window = ""
+        self._prefix = ""
+        self._text = ""
+        self._article_buf = ""
+        self._current: Optional[Dict[str, Any]] = None
+        self._anchor_window_len = max((len(a) for a in self.anchors), default=1) - 1
+
+    # -- HTMLParser hooks -------------------------------------------------
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        self._emit(" ")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        self._emit(" ")
+
+    def handle_data(self, data: str) -> None:
+        if not self._skip_depth:
+            self._emit(data)
+
+    # -- Text pipeline ----------------------------------------------------
+
+    def _emit(self, data: str) -> None:
+        text = _WS_RE.sub(" ", data)
+        if self._last_space:
+            text = text.lstrip(" ")
+        if not text:
+            return
+        self._last_space = text.endswith(" ")
+
+        if self._anchor_found:
+            self._consume(text)
+            return
+
+        if len(self._prefix) <= self.max_chars:
+            self._prefix += text[: self.max_chars + 1 - len(self._prefix)]
+        window = self._anchor_window + text
+        hits = [idx for idx in (window.find(anchor) for anchor in self.anchors) if idx != -1]
+        if hits:
+            self._anchor_found = True
+            self._anchor_window = ""
+            self._consume(window[min(hits):])
+        else:
+            self._anchor_window = window[-self._anchor_window_len:] if self._anchor_window_len else ""
+
+    def _consume(self, text: str) -> None:
+        if len(self._text) <= self.max_chars:
+            self._text += text[: self.max_chars + 1 - len(self._text)]
+        if self.max_articles or self.wanted_articles:
+            self._article_buf += text
+            self._scan_articles(final=False)
+
+    def _scan_articles(self, final: bool) -> None:
+        buf = self._article_buf
+        pos = 0
+        for match in ARTICLE_HEADING_RE.finditer(buf):
+            if not final and match.end() == len(buf):
+                break  # "člen" at the very end may still turn into "členom" with the next chunk.
+            self._append_article_text(buf[pos : match.start()])
+            self._close_article()
+            self._current = {"article": match.group(1) + match.group(2), "title": "", "text": ""}
+            pos = match.end()
+        # Any heading starting before the guard zone is complete and was matched above.
+        cut = len(buf) if final else max(pos, len(buf) - _HEADING_GUARD)
+        self._append_article_text(buf[pos:cut])
+        self._article_buf = buf[cut:]
+        if final:
+            self._close_article()
+
+    def _append_article_text(self, text: str) -> None:
+        current = self._current
+        if current is None or not self._is_wanted(current["article"]):
+            return
+        room = self.article_max_chars - len(current["text"])
+        if room > 0:
+            current["text"] += text[:room]
+
+    def _close_article(self) -> None:
+        current, self._current = self._current, None
+        if current is None or not self._is_wanted(current["article"]) or self._articles_full:
+            return
+        text = current["text"].strip()
+        if text.startswith("("):
+            end = text.find(")")
+            if end != -1:
+                current["title"] = text[1:end].strip()
+                text = text[end + 1 :].strip()
+        current["text"] = text
+        self.articles.append(current)
+
+    def _is_wanted(self, article: str) -> bool:
+        return self.wanted_articles is None or article in self.wanted_articles
+
+    # -- Results ----------------------------------------------------------
+
+    @property
+    def _articles_full(self) -> bool:
+        if self.wanted_articles is not None:
+            found = {a["article"] for a in self.articles}
+            if self.wanted_articles <= found:
+                return True
+        return bool(self.max_articles) and len(self.articles) >= self.max_articles
+
+    @property
+    def done(self) -> bool:
+        """True once the snippet is complete and all requested articles have been collected."""
+        snippet_done = self._anchor_found and len(self._text) > self.max_chars
+        if not (self.max_articles or self.wanted_articles):
+            return snippet_done
+        return snippet_done and self._articles_full
+
+    def close(self) -> None:
+        super().close()
+        if self.max_articles or self.wanted_articles:
+            self._scan_articles(final=True)
+
+    @property
+    def snippet(self) -> str:
+        text = (self._text if self._anchor_found else self._prefix).strip()
+        if len(text) > self.max_chars:
+            return text[: self.max_chars] + "…"
+        return text
+
+
+def stream_extract(
+    resp: requests.Response,
+    max_bytes: int = 5_000_000,
+    chunk_size: int = 16384,
+    **extractor_kwargs: Any,
+) -> PisrsTextExtractor:
+    """
+    Feed a streamed response (requested with stream=True) into an extractor and stop
+    reading once it is done or `max_bytes` have been consumed. Closes the response.
+    """
+    extractor = PisrsTextExtractor(**extractor_kwargs)
+    # Without a declared charset requests assumes Latin-1 (or yields raw bytes); PISRS serves UTF-8.
+    if "charset" not in resp.headers.get("Content-Type", "").lower():
+        resp.encoding = "utf-8"
+    consumed = 0
+    try:
+        for chunk in resp.iter_content(chunk_size=chunk_size, decode_unicode=True):
+            extractor.feed(chunk)
+            consumed += len(chunk)
+            if extractor.done or consumed >= max_bytes:
+                break
+    finally:
+        resp.close()
+    extractor.close()
+    return extractor
@@ -0,0 +1,247 @@
+"""
+Local full-text index of PISRS regulation articles.
+
+An offline ingestion step splits the laws in PISRS_URLS into articles and writes
+a compact inverted index to PISRS_INDEX_DIR:
+
+- articles.json  — article records (law, article, title, trimmed text)
+- index.json     — term dictionary {term: [offset, doc_count]} plus document lengths
+- postings.bin   — uint32 (doc_id, term_frequency) pairs, memory-mapped at query time
+
+Queries rank articles with BM25, so `fetch_regulations` can answer from disk in
+milliseconds without a network call.
+
+Build the index:
+    python -m scrapers.pisrs_index build
+    python -m scrapers.pisrs_index build --html "GZ-1=gz1.html" --html "Uredba o razvrščanju objektov=uredba.html"
+"""
+
+import argparse
+import json
+import math
+import mmap
+import os
+import re
+import sys
+import threading
+import unicodedata
+from array import array
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PISRS_INDEX_DIR = os.getenv(
+    "PISRS_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "pisrs_index"),
+)
+PISRS_TOP_K = int(os.getenv("PISRS_TOP_K", "5"))
+ARTICLE_TEXT_CHARS = 600
+INDEX_VERSION = 1
+
+# Function words and prototype markers that carry no ranking signal.
+_STOPWORDS = {
+    "alinea", "ali", "and", "demo", "do", "iz", "je", "ki", "kot", "med", "na", "nad", "ne", "od",
+    "pa", "po", "pod", "pri", "se", "so", "ter", "the", "tem", "to", "za", "člen", "clen",
+}
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_STEM_LEN = 6
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase, strip diacritics, drop stopwords/short tokens and truncate to a fixed prefix.
+    The prefix "stem" is crude but matches Slovene inflections (stanovanjske/stanovanjska).
+    """
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    tokens = []
+    for token in _TOKEN_RE.findall(folded):
+        if len(token) < 3 or token.isdigit() or token in _STOPWORDS:
+            continue
+        tokens.append(token[:_STEM_LEN])
+    return tokens
+
+
+# -- Ingestion -----------------------------------------------------------
+
+
+def build_index(articles: Iterable[Dict[str, Any]], index_dir: str = PISRS_INDEX_DIR) -> int:
+    """Write the on-disk index for `articles` ({"law", "article", "title", "text"}); returns the article count."""
+    docs: List[Dict[str, Any]] = []
+    doc_lengths: List[int] = []
+    postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+    for doc_id, art in enumerate(articles):
+        text = art.get("text", "")
+        tokens = tokenize(f"{art.get('title', '')} {text}")
+        for term, tf in Counter(tokens).items():
+            postings[term].append((doc_id, tf))
+        doc_lengths.append(len(tokens))
+        docs.append(
+            {
+                "law": art.get("law", ""),
+                "article": art.get("article", ""),
+                "title": art.get("title", ""),
+                "text": text[:ARTICLE_TEXT_CHARS],
+            }
+        )
+
+    os.makedirs(index_dir, exist_ok=True)
+    terms: Dict[str, List[int]] = {}
+    flat = array("I")
+    for term in sorted(postings):
+        plist = postings[term]
+        terms[term] = [len(flat) // 2, len(plist)]
+        for doc_id, tf in plist:
+            flat.append(doc_id)
+            flat.append(tf)
+
+    with open(os.path.join(index_dir, "postings.bin"), "wb") as fh:
+        flat.tofile(fh)
+    with open(os.path.join(index_dir, "articles.json"), "w", encoding="utf-8") as fh:
+        json.dump(docs, fh, ensure_ascii=False)
+    with open(os.path.join(index_dir, "index.json"), "w", encoding="utf-8") as fh:
+        json.dump({"version": INDEX_VERSION, "doc_lengths": doc_lengths, "terms": terms}, fh, ensure_ascii=False)
+    return len(docs)
+
+
+def _articles_from_html(law: str, path: str) -> List[Dict[str, Any]]:
+    from scrapers.pisrs_extract import PisrsTextExtractor
+
+    extractor = PisrsTextExtractor(max_chars=0, max_articles=100000)
+    with open(path, "r", encoding="utf-8") as fh:
+        for chunk in iter(lambda: fh.read(65536), ""):
+            extractor.feed(chunk)
+    extractor.close()
+    return [{"law": law, **art} for art in extractor.articles]
+
+
+def _articles_from_pisrs() -> List[Dict[str, Any]]:
+    from scrapers.pisrs_api import PISRS_URLS, fetch_articles
+
+    articles: List[Dict[str, Any]] = []
+    for law, url in PISRS_URLS.items():
+        law_articles = fetch_articles(url)
+        print(f"[pisrs_index] {law}: {len(law_articles)} articles")
+        articles.extend({"law": law, **art} for art in law_articles)
+    return articles
+
+
+# -- Query ---------------------------------------------------------------
+
+
+class RegulationIndex:
+    """Read-only view over a built index; postings stay memory-mapped."""
+
+    def __init__(self, index_dir: str) -> None:
+        with open(os.path.join(index_dir, "index.json"), "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        with open(os.path.join(index_dir, "articles.json"), "r", encoding="utf-8") as fh:
+            self.articles: List[Dict[str, Any]] = json.load(fh)
+        self.terms: Dict[str, List[int]] = meta["terms"]
+        self.doc_lengths: List[int] = meta["doc_lengths"]
+        self.avgdl = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+
+        self._file = open(os.path.join(index_dir, "postings.bin"), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size:
+            self._mmap: Optional[mmap.mmap] = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._postings = memoryview(self._mmap).cast("I")
+        else:
+            self._mmap = None
+            self._postings = memoryview(b"").cast("I")
+
+    def search(self, query: str, top_k: int = PISRS_TOP_K) -> List[Dict[str, Any]]:
+        n_docs = len(self.doc_lengths)
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            entry = self.terms.get(term)
+            if not entry:
+                continue
+            offset, df = entry
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for i in range(offset, offset + df):
+                doc_id = self._postings[2 * i]
+                tf = self._postings[2 * i + 1]
+                norm = 1 - _BM25_B + _BM25_B * self.doc_lengths[doc_id] / (self.avgdl or 1)
+                scores[doc_id] += idf * tf * (_BM25_K1 + 1) / (tf + _BM25_K1 * norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        return [{**self.articles[doc_id], "score": round(score, 4)} for doc_id, score in ranked]
+
+
+_INDEX: Optional[RegulationIndex] = None
+_INDEX_LOADED = False
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index() -> Optional[RegulationIndex]:
+    """Load the index once per process; None when it has not been built."""
+    global _INDEX, _INDEX_LOADED
+    with _INDEX_LOCK:
+        if not _INDEX_LOADED:
+            _INDEX_LOADED = True
+            if os.path.exists(os.path.join(PISRS_INDEX_DIR, "index.json")):
+                _INDEX = RegulationIndex(PISRS_INDEX_DIR)
+        return _INDEX
+
+
+def index_available() -> bool:
+    return get_index() is not None
+
+
+def _parcel_query(raw_parcel_data: Dict[str, Any], zoning_data: Optional[Dict[str, Any]]) -> str:
+    parts = [str(raw_parcel_data.get("namenska_raba") or "")]
+    if zoning_data:
+        parts.append(str(zoning_data.get("zone_name") or ""))
+        parts.extend(str(layer) for layer in zoning_data.get("layers", []) or [])
+    return " ".join(parts)
+
+
+def search_regulations(
+    raw_parcel_data: Dict[str, Any],
+    zoning_data: Optional[Dict[str, Any]] = None,
+    top_k: int = PISRS_TOP_K,
+) -> List[Dict[str, Any]]:
+    """Top-k articles relevant to the parcel's namenska raba and zoning layers; [] without an index or hits."""
+    index = get_index()
+    if index is None:
+        return []
+    query = _parcel_query(raw_parcel_data or {}, zoning_data)
+    return index.search(query, top_k=top_k) if query.strip() else []
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build the local PISRS article index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="split laws into articles and write the index")
+    build.add_argument("--html", action="append", default=[], metavar="LAW=PATH", help="ingest a saved PISRS page instead of downloading")
+    build.add_argument("--out", default=PISRS_INDEX_DIR, help="index directory")
+    search = sub.add_parser("search", help="query the index")
+    search.add_argument("query")
+    args = parser.parse_args(argv)
+
+    if args.command == "search":
+        index = get_index()
+        if index is None:
+            print("Index not built yet.", file=sys.stderr)
+            return 1
+        for hit in index.search(args.query):
+            print(f"{hit['score']:>8}  {hit['law']} čl. {hit['article']}  {hit['title']}")
+        return 0
+
+    if args.html:
+        articles: List[Dict[str, Any]] = []
+        for spec in args.html:
+            law, _, path = spec.partition("=")
+            articles.extend(_articles_from_html(law, path))
+    else:
+        articles = _articles_from_pisrs()
+    count = build_index(articles, args.out)
+    print(f"[pisrs_index] Indexed {count} articles into {args.out}")
+    return 0 if count else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
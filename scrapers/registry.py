@@ -0,0 +1,25 @@
+"""
+Data source registry: the fetcher and the fallback payload per source.
+
+Source names match the orchestrator's deadlines and metrics labels. Fetcher
+modules are imported on first use; in particular eprostor_browser (and with
+it Playwright) is only loaded once a browser-mode lookup runs, or an
+auto-mode lookup (scrapers/router.py) hedges to the browser; urbinfo_browser
+once a zoning lookup without local layers goes to the Urbinfo viewer.
+"""
+
+from utils.registry import LazyRegistry
+
+FETCHERS = LazyRegistry("fetcher")
+FETCHERS.register("parcel", "scrapers.eprostor_api:fetch_parcel_data")
+FETCHERS.register("parcel_browser", "scrapers.eprostor_browser:fetch_parcel_data_browser")
+FETCHERS.register("parcel_auto", "scrapers.router:fetch_parcel_data_auto")
+FETCHERS.register("regulations", "scrapers.pisrs_api:fetch_regulations")
+FETCHERS.register("zoning", "scrapers.urbinfo_api:fetch_zoning_layers")
+FETCHERS.register("zoning_browser", "scrapers.urbinfo_browser:scrape_zoning_via_browser")
+
+FALLBACKS = LazyRegistry("fallback")
+FALLBACKS.register("parcel", "scrapers.eprostor_api:fallback_parcel_data")
+FALLBACKS.register("parcel_browser", "scrapers.eprostor_browser:fallback_parcel_data_browser")
+FALLBACKS.register("regulations", "scrapers.pisrs_api:fallback_regulations")
+FALLBACKS.register("zoning", "scrapers.urbinfo_api:fallback_zoning_layers")
@@ -0,0 +1,223 @@
+"""
+Adaptive routing between the eProstor backends (HTTP/API and browser).
+
+Each backend keeps a rolling window of recent lookups (latency and whether
+the answer was usable). A lookup in "auto" mode goes to the backend with the
+best score, p50 latency plus a penalty per unit of error rate, and starts a
+hedged lookup on the other backend once the primary has been running longer
+than its own observed p95; whichever usable answer arrives first wins. The
+loser keeps running to completion and still feeds the statistics.
+
+A backend whose error rate is above ROUTER_MAX_HEDGE_ERROR_RATE is only
+hedged to once per ROUTER_PROBE_INTERVAL_S, so it can recover without
+doubling the load on it. `get_router().snapshot()` (served at /routing and
+as gauges in /metrics) shows the numbers used for each decision.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from scrapers.registry import FALLBACKS, FETCHERS
+from utils.host_scheduler import in_context
+
+logger = logging.getLogger(__name__)
+
+ROUTER_WINDOW = int(os.getenv("ROUTER_WINDOW", "100"))
+ROUTER_WINDOW_S = float(os.getenv("ROUTER_WINDOW_S", "600"))
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "5"))
+ROUTER_ERROR_PENALTY_S = float(os.getenv("ROUTER_ERROR_PENALTY_S", "10"))
+ROUTER_HEDGE_DEFAULT_S = float(os.getenv("ROUTER_HEDGE_DEFAULT_S", "3"))
+ROUTER_HEDGE_MIN_S = float(os.getenv("ROUTER_HEDGE_MIN_S", "0.25"))
+ROUTER_MAX_HEDGE_ERROR_RATE = float(os.getenv("ROUTER_MAX_HEDGE_ERROR_RATE", "0.5"))
+ROUTER_PROBE_INTERVAL_S = float(os.getenv("ROUTER_PROBE_INTERVAL_S", "30"))
+ROUTER_TIMEOUT_S = float(os.getenv("ROUTER_TIMEOUT_S", "14"))
+
+# Backend -> score used until it has ROUTER_MIN_SAMPLES samples: the API is tried first,
+# the browser is assumed to take about this long.
+_PRIOR_SCORES = {"parcel": 0.0, "parcel_browser": float(os.getenv("ROUTER_BROWSER_PRIOR_S", "5"))}
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv("ROUTER_WORKERS", "8")), thread_name_prefix="route")
+
+
+def usable(backend: str, data: Optional[Dict[str, Any]]) -> bool:
+    """True when `data` is a real answer rather than the backend's demo/fallback payload."""
+    if not data:
+        return False
+    if backend == "parcel":
+        return data.get("source") == "local_store" or data.get("wfs_status") == "connected"
+    return data != FALLBACKS.get(backend)(data.get("address_query"), data.get("parcel_query"))
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+class BackendStats:
+    """Rolling window of (time, latency, usable) samples plus routing counters for one backend."""
+
+    def __init__(self, name: str, window: int = ROUTER_WINDOW, max_age_s: float = ROUTER_WINDOW_S) -> None:
+        self.name = name
+        self.max_age_s = max_age_s
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=window)
+        self.primary = 0
+        self.hedges = 0
+        self.wins = 0
+        self.last_hedge_at = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency_s: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), latency_s, ok))
+
+    def count(self, counter: str) -> None:
+        """Increment one of the routing counters (primary, hedges, wins)."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def claim_hedge(self, allowed: bool, probe_interval_s: float) -> bool:
+        """Count a hedge when `allowed`, or as a probe when the last hedge is older than `probe_interval_s`."""
+        with self._lock:
+            now = time.monotonic()
+            if not allowed and now - self.last_hedge_at < probe_interval_s:
+                return False
+            self.last_hedge_at = now
+            self.hedges += 1
+            return True
+
+    def _window(self) -> List[Tuple[float, float, bool]]:
+        cutoff = time.monotonic() - self.max_age_s
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            return list(self._samples)
+
+    def summary(self) -> Dict[str, Any]:
+        samples = self._window()
+        latencies = [latency for _, latency, _ in samples]
+        errors = sum(1 for _, _, ok in samples if not ok)
+        return {
+            "samples": len(samples),
+            "error_rate": errors / len(samples) if samples else 0.0,
+            "p50_s": _percentile(latencies, 50) if latencies else None,
+            "p95_s": _percentile(latencies, 95) if latencies else None,
+        }
+
+
+class SourceRouter:
+    """Chooses and hedges between eProstor backends based on their recent behaviour."""
+
+    def __init__(self, backends: Tuple[str, ...] = ("parcel", "parcel_browser")) -> None:
+        self.backends = backends
+        self.stats = {name: BackendStats(name) for name in backends}
+
+    def score(self, backend: str, summary: Optional[Dict[str, Any]] = None) -> float:
+        """Expected cost in seconds: p50 latency plus ROUTER_ERROR_PENALTY_S per unit of error rate."""
+        summary = summary or self.stats[backend].summary()
+        if summary["samples"] < ROUTER_MIN_SAMPLES:
+            return _PRIOR_SCORES.get(backend, 0.0)
+        return summary["p50_s"] + summary["error_rate"] * ROUTER_ERROR_PENALTY_S
+
+    def choose(self) -> List[str]:
+        """Backends ordered best first."""
+        return sorted(self.backends, key=lambda name: (self.score(name), self.backends.index(name)))
+
+    def hedge_delay(self, backend: str) -> float:
+        summary = self.stats[backend].summary()
+        if summary["samples"] < ROUTER_MIN_SAMPLES:
+            return ROUTER_HEDGE_DEFAULT_S
+        return max(ROUTER_HEDGE_MIN_S, summary["p95_s"])
+
+    def _may_hedge(self, backend: str) -> bool:
+        summary = self.stats[backend].summary()
+        healthy = summary["samples"] < ROUTER_MIN_SAMPLES or summary["error_rate"] <= ROUTER_MAX_HEDGE_ERROR_RATE
+        return self.stats[backend].claim_hedge(healthy, ROUTER_PROBE_INTERVAL_S)
+
+    def _run(self, backend: str, address: Optional[str], parcel: Optional[str]) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            data = FETCHERS.get(backend)(address, parcel)
+        except Exception:
+            self.stats[backend].record(time.monotonic() - started, False)
+            raise
+        self.stats[backend].record(time.monotonic() - started, usable(backend, data))
+        return data
+
+    def fetch(self, address: Optional[str] = None, parcel: Optional[str] = None) -> Dict[str, Any]:
+        """Parcel data from the healthiest backend, hedged to the next one past the primary's p95."""
+        started = time.monotonic()
+        order = self.choose()
+        primary, secondaries = order[0], order[1:]
+        self.stats[primary].count("primary")
+        futures: Dict["Future[Dict[str, Any]]", str] = {_EXECUTOR.submit(in_context(self._run), primary, address, parcel): primary}
+        hedge_at = started + self.hedge_delay(primary)
+        deadline = started + ROUTER_TIMEOUT_S
+        pending = set(futures)
+        fallback: Optional[Dict[str, Any]] = None
+
+        while pending:
+            now = time.monotonic()
+            # Wake up at the hedge point while a hedge is still possible, otherwise at the deadline.
+            until = hedge_at if secondaries and now < hedge_at else deadline
+            done, pending = wait(pending, timeout=max(0.0, until - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                backend = futures[future]
+                try:
+                    data = future.result()
+                except Exception as exc:  # pragma: no cover - fetchers guard their own errors
+                    logger.warning("Backend %s failed: %s", backend, exc)
+                    continue
+                if usable(backend, data):
+                    self.stats[backend].count("wins")
+                    return data
+                fallback = fallback or data
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            # Hedge when the primary is past its p95 or has already failed.
+            if secondaries and (now >= hedge_at or not pending):
+                backend = secondaries.pop(0)
+                if self._may_hedge(backend):
+                    logger.info("Hedging parcel lookup to %s after %.2fs.", backend, now - started)
+                    future = _EXECUTOR.submit(in_context(self._run), backend, address, parcel)
+                    futures[future] = backend
+                    pending.add(future)
+        return fallback or FALLBACKS.get("parcel")(address, parcel, "timeout")
+
+    def snapshot(self) -> Dict[str, Any]:
+        order = self.choose()
+        backends = {}
+        for name in self.backends:
+            stats = self.stats[name]
+            summary = stats.summary()
+            backends[name] = {
+                **summary,
+                "score_s": round(self.score(name, summary), 4),
+                "hedge_delay_s": round(self.hedge_delay(name), 4),
+                "primary": stats.primary,
+                "hedges": stats.hedges,
+                "wins": stats.wins,
+            }
+        return {"preferred": order[0], "backends": backends}
+
+
+_ROUTER: Optional[SourceRouter] = None
+_ROUTER_LOCK = threading.Lock()
+
+
+def get_router() -> SourceRouter:
+    global _ROUTER
+    with _ROUTER_LOCK:
+        if _ROUTER is None:
+            _ROUTER = SourceRouter()
+        return _ROUTER
+
+
+def fetch_parcel_data_auto(address: Optional[str] = None, parcel: Optional[str] = None) -> Dict[str, Any]:
+    """Fetcher for mode "auto": routed and hedged between the API and browser backends."""
+    return get_router().fetch(address, parcel)
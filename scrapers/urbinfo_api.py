@@ -1,16 +1,33 @@
 """
-Urbinfo / zoning stub.
+Urbinfo / zoning data.
 
-Currently returns demo zoning info and layers based on a parcel reference.
-Intended to be replaced with a real municipal GIS/Urbinfo integration.
+Overlays the parcel with the local zoning layers (scrapers/zoning_overlay.py)
+when both the parcel geometry and the layers are available. Otherwise, with
+URBINFO_VIEWER_URL set, the Urbinfo viewer is queried through the browser
+pool (scrapers/urbinfo_browser.py); without it, returns demo zoning info and
+layers based on a parcel reference.
 """
 
-from typing import Any, Dict
+import logging
+import os
+from typing import Any, Dict, Optional
 
+from scrapers.parcel_store import get_parcel_store
+from scrapers.registry import FETCHERS
+from scrapers.zoning_overlay import get_overlay_engine, zoning_from_hits
+from utils.geometry import Geometry
 
-def fetch_zoning_layers(parcel_or_geometry: Dict[str, Any]) -> Dict[str, Any]:
-    """Return dummy zoning data for the prototype pipeline."""
-    # TODO: Replace with real WFS/WMS/REST queries for zoning and thematic layers.
+logger = logging.getLogger(__name__)
+# Only checked here; the viewer itself is configured in urbinfo_browser.py (imported on first use).
+URBINFO_BROWSER_ENABLED = bool(os.getenv("URBINFO_VIEWER_URL"))
+URBINFO_OPEN_TIMEOUT_S = float(os.getenv("URBINFO_OPEN_TIMEOUT_S", "15"))
+URBINFO_FEATURE_INFO_TIMEOUT_S = float(os.getenv("URBINFO_FEATURE_INFO_TIMEOUT_S", "5"))
+# A browser worker's first lookup opens (and logs in to) the viewer before asking for feature info.
+URBINFO_COLD_LOOKUP_S = URBINFO_OPEN_TIMEOUT_S + URBINFO_FEATURE_INFO_TIMEOUT_S
+
+
+def fallback_zoning_layers(parcel_or_geometry: Dict[str, Any]) -> Dict[str, Any]:
+    """Demo zoning payload, also used when the zoning source misses its deadline."""
     return {
         "zone_name": "SSse – Stanovanjska območja",
         "layers": ["Kulturna dediščina (demo)", "Poplavno območje (demo)"],
@@ -18,3 +35,30 @@ def fetch_zoning_layers(parcel_or_geometry: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def _parcel_geometry(parcel_or_geometry: Dict[str, Any]) -> Optional[Geometry]:
+    if parcel_or_geometry.get("geometry"):
+        return parcel_or_geometry["geometry"]
+    ko_id = parcel_or_geometry.get("ko_id")
+    parcel_id = parcel_or_geometry.get("parcel_id")
+    store = get_parcel_store()
+    if store is None or not ko_id or not parcel_id:
+        return None
+    return store.geometry(ko_id, parcel_id)
+
+
+def fetch_zoning_layers(parcel_or_geometry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Zoning layers intersecting the parcel: from the local overlay, else from the Urbinfo viewer
+    when it is configured, else dummy zoning data.
+    """
+    try:
+        engine = get_overlay_engine()
+        geometry = _parcel_geometry(parcel_or_geometry) if engine is not None else None
+    except Exception as exc:  # pragma: no cover - corrupt/locked local stores
+        logger.warning("Local zoning overlay unavailable: %s", exc)
+        return fallback_zoning_layers(parcel_or_geometry)
+    if engine is None or not geometry:
+        if URBINFO_BROWSER_ENABLED:
+            return FETCHERS.get("zoning_browser")(parcel_or_geometry)
+        return fallback_zoning_layers(parcel_or_geometry)
+    return zoning_from_hits(engine.evaluate(geometry), parcel_or_geometry.get("parcel_id"))
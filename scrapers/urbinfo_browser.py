@@ -1,14 +1,235 @@
 """
-Playwright fallback scraper for Urbinfo.
+Playwright scraper for the Urbinfo map viewer.
 
-Automates the web viewer to extract zoning and thematic layer info when APIs fall short.
+Nothing is read from the DOM. The viewer's own XHRs are intercepted with page
+routes: its layer catalogue once, when the viewer opens, and the
+GetFeatureInfo answer for every parcel. Layer data comes straight from those
+JSON payloads.
+
+One logged-in viewer page per browser worker is kept open on the shared pool
+(scrapers/browser_pool.py, session "urbinfo"). A parcel is selected by
+changing the viewer's hash route, which the viewer follows without reloading,
+so after the first lookup a parcel costs one feature-info round-trip. Map
+tiles are images and are aborted by the pool. Each lookup takes a slot from
+the per-host politeness scheduler (utils/host_scheduler.py) at the caller's
+priority, and reports the feature-info status back to it.
+
+The defaults match the fixture viewer in bench/standins.py; point
+URBINFO_VIEWER_URL, URBINFO_PARCEL_ROUTE and the two URL patterns at the real
+viewer to use it.
 """
 
-from typing import Any, Dict
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote, urlsplit
+
+from playwright.sync_api import Error as PlaywrightError
+from playwright.sync_api import Page, Route
+
+from scrapers.browser_pool import get_browser_pool
+from scrapers.urbinfo_api import URBINFO_FEATURE_INFO_TIMEOUT_S, URBINFO_OPEN_TIMEOUT_S, fallback_zoning_layers
+from scrapers.zoning_overlay import CODE_FIELDS, LABEL_FIELDS, first_value, zoning_from_hits
+from utils.geometry import bbox
+from utils.host_scheduler import ThrottledError, current_priority, get_scheduler
+
+logger = logging.getLogger(__name__)
+
+URBINFO_VIEWER_URL = os.getenv("URBINFO_VIEWER_URL", "")
+URBINFO_USERNAME = os.getenv("URBINFO_USERNAME", "")
+URBINFO_PASSWORD = os.getenv("URBINFO_PASSWORD", "")
+# Hash route selecting a parcel; {ko_id} and {parcel_id} are URL-quoted, {x}/{y} is the
+# centre of the parcel geometry when the payload carries one.
+URBINFO_PARCEL_ROUTE = os.getenv("URBINFO_PARCEL_ROUTE", "#parcel={ko_id}/{parcel_id}")
+URBINFO_FEATURE_INFO_PATTERN = re.compile(os.getenv("URBINFO_FEATURE_INFO_PATTERN", r"(?i)[?&]request=getfeatureinfo"))
+URBINFO_LAYERS_PATTERN = re.compile(os.getenv("URBINFO_LAYERS_PATTERN", r"/api/layers"))
+# Present once the viewer has loaded its layers and follows hash routes.
+URBINFO_READY_SELECTOR = os.getenv("URBINFO_READY_SELECTOR", "body[data-viewer-ready]")
+# Queue wait + (on a worker's first lookup) viewer login and load + one feature-info exchange.
+URBINFO_LOOKUP_TIMEOUT_S = float(os.getenv("URBINFO_LOOKUP_TIMEOUT_S", "25"))
+
+LOGIN_USERNAME_SELECTOR = "input[name=username]"
+LOGIN_PASSWORD_SELECTOR = "input[name=password]"
+LOGIN_SUBMIT_SELECTOR = "[type=submit]"
+SESSION = "urbinfo"
+# Sets the parcel hash route. A route left on the page by a failed lookup is dropped first
+# (without a hashchange), so setting it again makes the viewer ask once more.
+SELECT_SCRIPT = """route => {
+  if (window.location.hash === route) {
+    history.replaceState(null, '', window.location.pathname + window.location.search);
+  }
+  window.location.hash = route;
+}"""
+
+
+class SessionExpiredError(RuntimeError):
+    """The viewer answered feature info with 401/403; it has to be opened (logged in) again."""
+
+
+class _Viewer:
+    """An opened viewer page and the payloads its routes have captured."""
+
+    def __init__(self, page: Page) -> None:
+        self.page = page
+        self.layers: Dict[str, Dict[str, Any]] = {}
+        self.current: Optional[str] = None
+        self.feature_info: Optional[Dict[str, Any]] = None
+        self.status = 0
+        self.retry_after: Optional[str] = None
+        page.route(URBINFO_LAYERS_PATTERN, self._capture_layers)
+        page.route(URBINFO_FEATURE_INFO_PATTERN, self._capture_feature_info)
+
+    def open(self) -> None:
+        """Load the viewer (logging in when it asks) and wait until it follows hash routes."""
+        page = self.page
+        self.current = None
+        timeout_ms = URBINFO_OPEN_TIMEOUT_S * 1000
+        page.goto(URBINFO_VIEWER_URL, wait_until="domcontentloaded", timeout=timeout_ms)
+        if URBINFO_USERNAME and page.locator(LOGIN_USERNAME_SELECTOR).count():
+            page.fill(LOGIN_USERNAME_SELECTOR, URBINFO_USERNAME)
+            page.fill(LOGIN_PASSWORD_SELECTOR, URBINFO_PASSWORD)
+            page.click(LOGIN_SUBMIT_SELECTOR)
+        page.wait_for_selector(URBINFO_READY_SELECTOR, state="attached", timeout=timeout_ms)
+
+    def _capture_layers(self, route: Route) -> None:
+        response = route.fetch()
+        try:
+            items = response.json()
+        except ValueError:
+            items = []
+        if isinstance(items, dict):
+            items = items.get("layers") or []
+        self.layers = {str(item.get("name")): item for item in items if isinstance(item, dict) and item.get("name")}
+        route.fulfill(response=response)
+
+    def _capture_feature_info(self, route: Route) -> None:
+        response = route.fetch()
+        self.status = response.status
+        self.retry_after = response.headers.get("retry-after")
+        try:
+            self.feature_info = response.json() if response.ok else None
+        except ValueError:
+            self.feature_info = None
+        route.fulfill(response=response)
+
+    def select(self, parcel_route: str) -> Optional[Dict[str, Any]]:
+        """Point the viewer at a parcel and return the feature info it fetched for it."""
+        if parcel_route == self.current:
+            # The hash would not change, so the viewer would not ask again.
+            return self.feature_info
+        self.current, self.feature_info, self.status, self.retry_after = None, None, 0, None
+        with self.page.expect_response(URBINFO_FEATURE_INFO_PATTERN, timeout=URBINFO_FEATURE_INFO_TIMEOUT_S * 1000):
+            self.page.evaluate(SELECT_SCRIPT, parcel_route)
+        if self.status in (401, 403):
+            raise SessionExpiredError(f"feature info answered {self.status}")
+        if self.feature_info is not None:
+            # Only an answer is worth keeping; after an error the next lookup asks again.
+            self.current = parcel_route
+        return self.feature_info
+
+
+# One viewer per session page, dropped when the page closes.
+_VIEWERS: Dict[Page, _Viewer] = {}
+_VIEWERS_LOCK = threading.Lock()
+
+
+def _viewer(page: Page) -> _Viewer:
+    with _VIEWERS_LOCK:
+        viewer = _VIEWERS.get(page)
+    if viewer is None:
+        viewer = _Viewer(page)
+        viewer.open()
+        with _VIEWERS_LOCK:
+            _VIEWERS[page] = viewer
+        page.on("close", _forget)
+    return viewer
+
+
+def _forget(page: Page) -> None:
+    with _VIEWERS_LOCK:
+        _VIEWERS.pop(page, None)
+
+
+def parcel_route(parcel_or_geometry: Dict[str, Any]) -> Optional[str]:
+    """The viewer's hash route for a parcel payload, or None when the route needs fields it lacks."""
+    fields = {
+        key: quote(str(parcel_or_geometry[key]), safe="")
+        for key in ("ko_id", "parcel_id")
+        if parcel_or_geometry.get(key) not in (None, "")
+    }
+    if parcel_or_geometry.get("geometry"):
+        min_x, min_y, max_x, max_y = bbox(parcel_or_geometry["geometry"])
+        fields.update(x=f"{(min_x + max_x) / 2:.2f}", y=f"{(min_y + max_y) / 2:.2f}")
+    try:
+        return URBINFO_PARCEL_ROUTE.format_map(fields)
+    except KeyError:
+        return None
+
+
+def zoning_from_feature_info(payload: Dict[str, Any], layers: Dict[str, Dict[str, Any]], parcel_ref: Any) -> Dict[str, Any]:
+    """
+    Zoning payload from a GetFeatureInfo FeatureCollection. A feature's layer is its `layer`
+    property or the prefix of its `id` ("opn_eup.42"); titles and kinds come from the viewer's
+    layer catalogue.
+    """
+    hits: List[Dict[str, Any]] = []
+    for feature in payload.get("features") or ():
+        props = feature.get("properties") or {}
+        layer = str(props.get("layer") or str(feature.get("id") or "").split(".", 1)[0])
+        meta = layers.get(layer, {})
+        hit = {
+            "layer": layer,
+            "title": meta.get("title") or layer,
+            "kind": meta.get("kind") or "overlay",
+            "label": first_value(props, LABEL_FIELDS),
+            "code": first_value(props, CODE_FIELDS),
+        }
+        if hit not in hits:
+            hits.append(hit)
+    return zoning_from_hits(hits, parcel_ref, source="urbinfo_browser")
 
 
 def scrape_zoning_via_browser(parcel_or_geometry: Dict[str, Any]) -> Dict[str, Any]:
-    # TODO: Implement Playwright automation against Urbinfo viewer.
-    return {"source": "Urbinfo browser (stub)", "layers": []}
+    """
+    Zoning layers for a parcel from the Urbinfo viewer, or the demo zoning payload when the viewer
+    is not configured, the parcel has no route or the viewer fails.
+    """
+    route = parcel_route(parcel_or_geometry)
+    if not URBINFO_VIEWER_URL or route is None:
+        return fallback_zoning_layers(parcel_or_geometry)
+
+    # The browser worker runs outside this context, so the priority is carried over explicitly.
+    level = current_priority()
+    host = urlsplit(URBINFO_VIEWER_URL).netloc.lower()
 
+    def _lookup(page: Page) -> Optional[Dict[str, Any]]:
+        try:
+            with get_scheduler().slot(host, level) as answer:
+                viewer = _viewer(page)
+                try:
+                    payload = viewer.select(route)
+                except SessionExpiredError:
+                    logger.info("Urbinfo session expired, logging in again.")
+                    viewer.open()
+                    payload = viewer.select(route)
+                answer.update(status=viewer.status or None, retry_after=viewer.retry_after)
+        except ThrottledError as exc:
+            logger.warning("Urbinfo viewer throttled: %s", exc)
+            return None
+        except (PlaywrightError, SessionExpiredError) as exc:
+            # A viewer in an unknown state is not reused; the pool opens a new session page next time.
+            logger.warning("Urbinfo viewer error: %s", exc)
+            page.close()
+            return None
+        if payload is None:
+            return None
+        return zoning_from_feature_info(payload, viewer.layers, parcel_or_geometry.get("parcel_id"))
 
+    try:
+        zoning = get_browser_pool().run(_lookup, timeout=URBINFO_LOOKUP_TIMEOUT_S, session=SESSION)
+    except Exception as exc:  # pragma: no cover - runtime/browser errors
+        logger.warning("Urbinfo browser lookup failed: %s", exc)
+        zoning = None
+    return zoning if zoning is not None else fallback_zoning_layers(parcel_or_geometry)
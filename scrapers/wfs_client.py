@@ -0,0 +1,156 @@
+"""
+Paged WFS GetFeature client with a streaming GML parser.
+
+Pages through GetFeature with startIndex/count and parses each response
+incrementally straight off the socket (scrapers/gml.py), yielding one
+record at a time. At most one feature (and the previous page's feature
+ids) is held in memory, whatever the size of a page or of the whole layer.
+
+    python -m scrapers.wfs_client --url https://.../wfs --type-name kn:parcele --ingest
+    python -m scrapers.wfs_client --url https://.../wfs --type-name kn:parcele --bbox 460000,100000,462000,102000
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from scrapers.gml import iter_gml_features
+from scrapers.parcel_store import PARCEL_STORE_PATH, ParcelStore, normalize_record
+from utils import http_client
+
+logger = logging.getLogger(__name__)
+
+WFS_URL = os.getenv("WFS_URL", "")
+WFS_TYPE_NAME = os.getenv("WFS_TYPE_NAME", "")
+WFS_PAGE_SIZE = int(os.getenv("WFS_PAGE_SIZE", "1000"))
+WFS_TIMEOUT_S = float(os.getenv("WFS_TIMEOUT_S", "60"))
+WFS_SRS = os.getenv("WFS_SRS", "EPSG:3794")
+
+
+def _page_params(
+    type_name: str,
+    start_index: int,
+    count: int,
+    version: str,
+    bbox: Optional[Tuple[float, float, float, float]],
+    srs: str,
+) -> Dict[str, Any]:
+    params: Dict[str, Any] = {
+        "service": "WFS",
+        "request": "GetFeature",
+        "version": version,
+        "startIndex": start_index,
+    }
+    if version.startswith("2."):
+        params["typeNames"] = type_name
+        params["count"] = count
+    else:
+        params["typeName"] = type_name
+        params["maxFeatures"] = count
+    if srs:
+        params["srsName"] = srs
+    if bbox:
+        params["bbox"] = ",".join(str(v) for v in bbox) + (f",{srs}" if srs else "")
+    return params
+
+
+def iter_features(
+    url: str = WFS_URL,
+    type_name: str = WFS_TYPE_NAME,
+    page_size: int = WFS_PAGE_SIZE,
+    version: str = "2.0.0",
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    srs: str = WFS_SRS,
+    max_features: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield GML features page by page. Paging stops at the first short page, or after
+    `max_features`. HTTP errors propagate to the caller (requests.RequestException).
+    Features repeated from the previous page (by gml:id) are skipped, and a page with nothing
+    new ends paging, so a server that ignores startIndex cannot loop forever.
+    """
+    start_index = 0
+    previous_ids: Set[str] = set()
+    while True:
+        count = page_size if max_features is None else min(page_size, max_features - start_index)
+        if count <= 0:
+            return
+        params = _page_params(type_name, start_index, count, version, bbox, srs)
+        resp = http_client.get(url, params=params, timeout=WFS_TIMEOUT_S, stream=True)
+        try:
+            resp.raise_for_status()
+            resp.raw.decode_content = True  # transparently gunzip
+            returned = fresh = 0
+            page_ids: Set[str] = set()
+            for feature in iter_gml_features(resp.raw):
+                returned += 1
+                fid = feature.get("gml_id")
+                if fid is not None:
+                    if fid in previous_ids:
+                        if returned == 1:
+                            # The page starts where the last one did: startIndex was ignored.
+                            break
+                        continue
+                    page_ids.add(fid)
+                fresh += 1
+                yield feature
+        finally:
+            resp.close()
+        logger.debug("WFS page startIndex=%s returned %s features, %s new.", start_index, returned, fresh)
+        if not fresh and returned:
+            logger.warning("WFS page startIndex=%s repeated the previous page; stopping.", start_index)
+            return
+        start_index += returned
+        if returned < count:
+            return
+        previous_ids = page_ids
+
+
+def iter_parcels(**kwargs: Any) -> Iterator[Dict[str, Any]]:
+    """Features from `iter_features` mapped onto the parcel store schema; unusable features are skipped."""
+    for feature in iter_features(**kwargs):
+        record = normalize_record(feature)
+        if record is not None:
+            yield record
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Page through a WFS layer and stream parcel records.")
+    parser.add_argument("--url", default=WFS_URL, required=not WFS_URL)
+    parser.add_argument("--type-name", default=WFS_TYPE_NAME, required=not WFS_TYPE_NAME)
+    parser.add_argument("--page-size", type=int, default=WFS_PAGE_SIZE)
+    parser.add_argument("--version", default="2.0.0")
+    parser.add_argument("--bbox", help="min_x,min_y,max_x,max_y in --srs")
+    parser.add_argument("--srs", default=WFS_SRS)
+    parser.add_argument("--max-features", type=int)
+    parser.add_argument("--ingest", action="store_true", help="load into the local parcel store instead of printing")
+    parser.add_argument("--store", default=PARCEL_STORE_PATH)
+    args = parser.parse_args(argv)
+
+    bbox = tuple(float(v) for v in args.bbox.split(",")) if args.bbox else None
+    features = iter_features(
+        url=args.url,
+        type_name=args.type_name,
+        page_size=args.page_size,
+        version=args.version,
+        bbox=bbox,  # type: ignore[arg-type]
+        srs=args.srs,
+        max_features=args.max_features,
+    )
+    if args.ingest:
+        count = ParcelStore(args.store).ingest(features)
+        print(f"[wfs_client] Stored {count} parcels in {args.store}")
+        return 0 if count else 1
+    for feature in features:
+        record = normalize_record(feature)
+        if record is not None:
+            record.pop("geometry", None)
+            print(json.dumps(record, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+Zoning overlay engine: intersects a parcel with every local thematic layer.
+
+Layer exports (OPN zones, heritage, flood, protected areas ...) are ingested
+into a SQLite file once. At runtime every layer is loaded into its own
+in-memory grid index with pre-split edge lists. A parcel is evaluated against
+all layers in one pass: its scanline spans are computed once, candidate
+features come from the grid cells under the parcel's bounding box, and each
+candidate's overlap is the shared span length on the same scanlines.
+
+    python -m scrapers.zoning_overlay ingest opn_eup.gpkg --layer opn --title "OPN namenska raba" --kind zone
+    python -m scrapers.zoning_overlay ingest poplave.gml --layer flood --title "Poplavno območje"
+    python -m scrapers.zoning_overlay query "1234/5 k.o. Center"
+"""
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import defaultdict
+from statistics import median
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.geometry import BBox, Edge, Geometry, bbox, edges, scanline_spans, spans_length, spans_overlap
+
+ZONING_STORE_PATH = os.getenv(
+    "ZONING_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "zoning.sqlite"),
+)
+# Scanlines per parcel; overlap error is roughly one row height along the boundary.
+ZONING_OVERLAY_ROWS = int(os.getenv("ZONING_OVERLAY_ROWS", "32"))
+# Hits below this share of the parcel are boundary noise (slivers from digitising).
+ZONING_MIN_OVERLAP_PCT = float(os.getenv("ZONING_MIN_OVERLAP_PCT", "0.5"))
+# Features spanning more grid cells than this per axis are kept in a short "large" list.
+_MAX_CELLS_PER_AXIS = 16
+
+LABEL_FIELDS = ("label", "name", "ime", "naziv", "opis", "ime_obmocja")
+CODE_FIELDS = ("code", "sifra", "oznaka", "eup", "npr", "namenska_raba", "raba")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS layers (
+    name TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    kind TEXT NOT NULL DEFAULT 'overlay'
+);
+CREATE TABLE IF NOT EXISTS features (
+    id INTEGER PRIMARY KEY,
+    layer TEXT NOT NULL REFERENCES layers (name),
+    label TEXT,
+    code TEXT,
+    geometry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS features_layer ON features (layer);
+"""
+
+
+def first_value(props: Dict[str, Any], fields: Tuple[str, ...]) -> str:
+    """The first non-empty of `fields` in a feature's properties (case-insensitive), as text."""
+    lowered = {k.lower(): v for k, v in props.items()}
+    for field in fields:
+        value = lowered.get(field)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def ingest_layer(
+    path: str,
+    records: Iterable[Dict[str, Any]],
+    layer: str,
+    title: str,
+    kind: str = "overlay",
+) -> int:
+    """Replace one layer in the zoning store with the polygon features in `records`."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(_SCHEMA)
+        count = 0
+        with conn:
+            conn.execute("DELETE FROM features WHERE layer = ?", (layer,))
+            conn.execute(
+                "INSERT INTO layers (name, title, kind) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET title = excluded.title, kind = excluded.kind",
+                (layer, title, kind),
+            )
+            for props in records:
+                geometry = props.get("geometry")
+                if not geometry:
+                    continue
+                conn.execute(
+                    "INSERT INTO features (layer, label, code, geometry) VALUES (?, ?, ?, ?)",
+                    (layer, first_value(props, LABEL_FIELDS), first_value(props, CODE_FIELDS), json.dumps(geometry, separators=(",", ":"))),
+                )
+                count += 1
+        return count
+    finally:
+        conn.close()
+
+
+class _LayerIndex:
+    """Uniform grid over one layer's feature bounding boxes."""
+
+    def __init__(self, name: str, title: str, kind: str) -> None:
+        self.name = name
+        self.title = title
+        self.kind = kind
+        self.labels: List[str] = []
+        self.codes: List[str] = []
+        self.bboxes: List[BBox] = []
+        self.edges: List[List[Edge]] = []
+        self.cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self.large: List[int] = []
+        self.cell_size = 1.0
+
+    def add(self, label: str, code: str, geometry: Geometry) -> None:
+        self.labels.append(label)
+        self.codes.append(code)
+        self.bboxes.append(bbox(geometry))
+        self.edges.append(edges(geometry))
+
+    def build(self) -> None:
+        extents = [max(b[2] - b[0], b[3] - b[1]) for b in self.bboxes]
+        self.cell_size = max(median(extents), 1e-9) if extents else 1.0
+        for i, (min_x, min_y, max_x, max_y) in enumerate(self.bboxes):
+            cx0, cy0 = self._cell(min_x, min_y)
+            cx1, cy1 = self._cell(max_x, max_y)
+            if cx1 - cx0 >= _MAX_CELLS_PER_AXIS or cy1 - cy0 >= _MAX_CELLS_PER_AXIS:
+                self.large.append(i)
+                continue
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    self.cells[(cx, cy)].append(i)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def candidates(self, box: BBox) -> List[int]:
+        min_x, min_y, max_x, max_y = box
+        cx0, cy0 = self._cell(min_x, min_y)
+        cx1, cy1 = self._cell(max_x, max_y)
+        seen = set(self.large)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            seen.update(i for ids in self.cells.values() for i in ids)
+        else:
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    seen.update(self.cells.get((cx, cy), ()))
+        return [
+            i for i in seen
+            if self.bboxes[i][0] <= max_x and self.bboxes[i][2] >= min_x
+            and self.bboxes[i][1] <= max_y and self.bboxes[i][3] >= min_y
+        ]
+
+
+class OverlayEngine:
+    """All zoning layers, indexed in memory; evaluate() is read-only and thread-safe."""
+
+    def __init__(self, path: str = ZONING_STORE_PATH, rows: int = ZONING_OVERLAY_ROWS) -> None:
+        self.rows = rows
+        self.layers: List[_LayerIndex] = []
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            by_name = {}
+            for name, title, kind in conn.execute("SELECT name, title, kind FROM layers ORDER BY name"):
+                by_name[name] = _LayerIndex(name, title, kind)
+                self.layers.append(by_name[name])
+            for layer, label, code, geometry in conn.execute("SELECT layer, label, code, geometry FROM features"):
+                if layer in by_name:
+                    by_name[layer].add(label or "", code or "", json.loads(geometry))
+        finally:
+            conn.close()
+        for layer_index in self.layers:
+            layer_index.build()
+
+    def evaluate(self, geometry: Geometry) -> List[Dict[str, Any]]:
+        """Layer hits for one parcel geometry, largest overlap first within each layer."""
+        box = bbox(geometry)
+        dy = (box[3] - box[1]) / self.rows
+        if dy <= 0:
+            return []
+        parcel_spans = scanline_spans(edges(geometry), box[1], dy, self.rows)
+        parcel_length = sum(spans_length(row) for row in parcel_spans)
+        if parcel_length <= 0:
+            return []
+
+        hits: List[Dict[str, Any]] = []
+        for layer in self.layers:
+            layer_hits = []
+            for i in layer.candidates(box):
+                feature_spans = scanline_spans(layer.edges[i], box[1], dy, self.rows)
+                shared = sum(spans_overlap(p, f) for p, f in zip(parcel_spans, feature_spans) if p and f)
+                pct = 100.0 * shared / parcel_length
+                if pct >= ZONING_MIN_OVERLAP_PCT:
+                    layer_hits.append(
+                        {
+                            "layer": layer.name,
+                            "title": layer.title,
+                            "kind": layer.kind,
+                            "label": layer.labels[i],
+                            "code": layer.codes[i],
+                            "overlap_pct": round(min(pct, 100.0), 1),
+                        }
+                    )
+            layer_hits.sort(key=lambda hit: hit["overlap_pct"], reverse=True)
+            hits.extend(layer_hits)
+        return hits
+
+    def evaluate_many(self, items: Iterable[Tuple[Any, Optional[Geometry]]]) -> Iterator[Tuple[Any, List[Dict[str, Any]]]]:
+        """Lazily evaluate (key, geometry) pairs in input order; a missing geometry has no hits."""
+        for key, geometry in items:
+            yield key, self.evaluate(geometry) if geometry else []
+
+
+_ENGINE: Optional[OverlayEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_overlay_engine() -> Optional[OverlayEngine]:
+    """The process-wide engine, or None until at least one layer has been ingested."""
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None and os.path.exists(ZONING_STORE_PATH):
+            _ENGINE = OverlayEngine(ZONING_STORE_PATH)
+        return _ENGINE
+
+
+def describe_hit(hit: Dict[str, Any]) -> str:
+    name = f"{hit['code']} – {hit['label']}" if hit["code"] and hit["label"] else hit["label"] or hit["code"]
+    text = f"{hit['title']}: {name}" if name else hit["title"]
+    return f"{text} ({hit['overlap_pct']:.0f} %)" if hit.get("overlap_pct") is not None else text
+
+
+def zoning_from_hits(hits: List[Dict[str, Any]], parcel_ref: Any, source: str = "local_overlay") -> Dict[str, Any]:
+    """
+    Shape overlay hits like the zoning payload the summariser and regulation ranking expect.
+    Hits without an `overlap_pct` (viewer feature info) keep their order.
+    """
+    zones = [hit for hit in hits if hit["kind"] == "zone"]
+    zone = max(zones, key=lambda hit: hit.get("overlap_pct") or 0) if zones else None
+    zone_name = None
+    if zone is not None:
+        zone_name = f"{zone['code']} – {zone['label']}" if zone["code"] and zone["label"] else zone["label"] or zone["code"]
+    return {
+        "zone_name": zone_name,
+        "layers": [describe_hit(hit) for hit in hits if hit["kind"] != "zone"],
+        "layer_hits": hits,
+        "parcel_ref": parcel_ref,
+        "source": source,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from scrapers.parcel_store import iter_export, lookup_parcel
+
+    parser = argparse.ArgumentParser(description="Local zoning overlay layers.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="load one layer from a GML / GeoPackage / CSV export")
+    ingest.add_argument("export")
+    ingest.add_argument("--layer", required=True, help="layer key, e.g. flood")
+    ingest.add_argument("--title", required=True, help="display title, e.g. 'Poplavno območje'")
+    ingest.add_argument("--kind", default="overlay", choices=["overlay", "zone"])
+    ingest.add_argument("--store", default=ZONING_STORE_PATH)
+    query = sub.add_parser("query", help="overlay a parcel from the local parcel store")
+    query.add_argument("parcel")
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        count = ingest_layer(args.store, iter_export(args.export), args.layer, args.title, args.kind)
+        print(f"[zoning_overlay] Stored {count} features in layer {args.layer}")
+        return 0 if count else 1
+
+    engine = get_overlay_engine()
+    record = lookup_parcel(None, args.parcel, with_geometry=True)
+    if engine is None or record is None or not record.get("geometry"):
+        print("Not found.")
+        return 1
+    started = time.perf_counter()
+    hits = engine.evaluate(record["geometry"])
+    print(json.dumps(zoning_from_hits(hits, record["parcel_no"]), ensure_ascii=False, indent=2))
+    print(f"[zoning_overlay] {len(hits)} hits in {(time.perf_counter() - started) * 1000:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Shared test setup.
+
+Settings are read at import time, so the environment is isolated here, before
+any app module is imported: fresh caches, no local stores or indexes, and no
+politeness limits for the local stand-ins (the same switches as bench/run.py).
+"""
+
+import csv
+import os
+import tempfile
+
+_WORKDIR = tempfile.mkdtemp(prefix="datascraper-tests-")
+_MISSING = os.path.join(_WORKDIR, "missing")
+os.environ.update(
+    {
+        "CACHE_DIR": os.path.join(_WORKDIR, "cache"),
+        "PARCEL_STORE_PATH": os.path.join(_MISSING, "parcels.sqlite"),
+        "ZONING_STORE_PATH": os.path.join(_MISSING, "zoning.sqlite"),
+        "PISRS_INDEX_DIR": os.path.join(_MISSING, "pisrs_index"),
+        "ADDRESS_INDEX_DIR": os.path.join(_MISSING, "address_index"),
+        "PROFILE_REQUESTS": "0",
+        "HTTP_BACKOFF_S": "0",
+        "HOST_RATE_PER_S": "0",
+        "HOST_BACKOFF_S": "0",
+        "HOST_MAX_CONCURRENCY": "0",
+        "HOST_LIMITS": "",
+    }
+)
+
+import pytest  # noqa: E402 - after the environment is set
+
+from ai import summarizer  # noqa: E402
+from ai.standin_proxy import StandinConfig, start_standin_proxy  # noqa: E402
+from scrapers import parcel_store  # noqa: E402
+from scrapers.parcel_store import ParcelStore, iter_export  # noqa: E402
+from scrapers.registry import FETCHERS  # noqa: E402
+from utils import address_index  # noqa: E402
+from utils.address_index import AddressResolver, build_indexes  # noqa: E402
+
+PARCELS_FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "parcels.gml")
+
+
+@pytest.fixture
+def standin_proxy():
+    """A stand-in summary proxy on a free port: (config, base_url). Each test gets its own host, breaker and limiter."""
+    server, config, url = start_standin_proxy(config=StandinConfig())
+    yield config, url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(standin_proxy, monkeypatch):
+    """Flask test client with stub parcel/regulation fetchers and the stand-in summary proxy."""
+    from app import app
+
+    _, url = standin_proxy
+    monkeypatch.setattr(summarizer, "CF_WORKER_PROXY_URL", url)
+    monkeypatch.setattr(summarizer, "CF_WORKER_STREAM", True)
+
+    def parcel(address=None, parcel=None):
+        return {"parcel_id": parcel, "ko": "1722 K.O. Center", "namenska_raba": "SSse", "wfs_status": "connected", "parcel_query": parcel}
+
+    monkeypatch.setitem(FETCHERS._loaded, "parcel", parcel)
+    monkeypatch.setitem(FETCHERS._loaded, "regulations", lambda *args: [{"law": "ZUreP-3", "article": "—", "snippet": "Prostorski akti."}])
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+def _write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """The fixture export ingested into a fresh parcel store, with an address index pointing into it."""
+    path = str(tmp_path / "parcels.sqlite")
+    store = ParcelStore(path)
+    assert store.ingest(iter_export(PARCELS_FIXTURE)) == 2
+
+    addresses = _write_csv(
+        tmp_path / "addresses.csv",
+        [
+            {"id": "1", "street": "Glavna ulica", "house_number": "1", "settlement": "Center", "x": "120", "y": "20"},
+            {"id": "2", "street": "Glavna ulica", "house_number": "99", "settlement": "Center", "x": "500", "y": "500"},
+        ],
+    )
+    ko = _write_csv(tmp_path / "ko.csv", [{"ko_id": "1722", "name": "Center"}])
+    build_indexes(str(addresses), str(ko), str(tmp_path / "index"))
+
+    monkeypatch.setattr(parcel_store, "PARCEL_STORE_PATH", path)
+    monkeypatch.setattr(parcel_store, "_STORE", None)
+    monkeypatch.setattr(address_index, "_RESOLVER", AddressResolver(str(tmp_path / "index")))
+    return store
@@ -0,0 +1,30 @@
+<?xml version="1.0" encoding="UTF-8"?>
+<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs/2.0" xmlns:gml="http://www.opengis.net/gml/3.2" xmlns:kn="urn:test:kn">
+  <wfs:member>
+    <kn:PARCELA gml:id="PARCELA.1">
+      <kn:SIFKO>1722</kn:SIFKO>
+      <kn:IME_KO>Center</kn:IME_KO>
+      <kn:ST_PARCELE>12/3</kn:ST_PARCELE>
+      <kn:RABA>SSse</kn:RABA>
+      <kn:geometry>
+        <gml:Polygon gml:id="PARCELA.1.geom">
+          <gml:exterior><gml:LinearRing><gml:posList>0 0 100 0 100 100 0 100 0 0</gml:posList></gml:LinearRing></gml:exterior>
+        </gml:Polygon>
+      </kn:geometry>
+    </kn:PARCELA>
+  </wfs:member>
+  <wfs:member>
+    <kn:PARCELA gml:id="PARCELA.2">
+      <kn:SIFKO>1722</kn:SIFKO>
+      <kn:IME_KO>Center</kn:IME_KO>
+      <kn:ST_PARCELE>12/4</kn:ST_PARCELE>
+      <kn:RABA>CU</kn:RABA>
+      <kn:POVRSINA>2500</kn:POVRSINA>
+      <kn:geometry>
+        <gml:Polygon gml:id="PARCELA.2.geom">
+          <gml:exterior><gml:LinearRing><gml:posList>100 0 150 0 150 50 100 50 100 0</gml:posList></gml:LinearRing></gml:exterior>
+        </gml:Polygon>
+      </kn:geometry>
+    </kn:PARCELA>
+  </wfs:member>
+</wfs:FeatureCollection>
@@ -0,0 +1,109 @@
+import pytest
+
+from utils import address_index
+from utils.address_index import AddressResolver, PrefixIndex, build_indexes, canonical_id, fold
+
+ADDRESSES = [
+    ("1", "Šmartinska cesta", "10", "Ljubljana"),
+    ("2", "Šmartinska cesta", "2", "Ljubljana"),
+    ("3", "Slovenska cesta", "1", "Ljubljana"),
+    ("4", "Slovenska cesta", "15", "Ljubljana"),
+    ("5", "Smrekarjeva ulica", "7", "Ljubljana"),
+    ("6", "Glavna ulica", "1", "Center"),
+    ("7", "Slovenska cesta", "1", "Ljubljana"),
+]
+KO = [("1722", "Center"), ("1723", "Celje"), ("1730", "Šiška"), ("2636", "Cerklje")]
+
+
+def _write_csv(path, header, rows):
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        fh.write(",".join(header) + "\n")
+        fh.writelines(",".join(row) + "\n" for row in rows)
+    return str(path)
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    addresses = _write_csv(tmp_path / "addresses.csv", ["id", "street", "house_number", "settlement"], ADDRESSES)
+    ko = _write_csv(tmp_path / "ko.csv", ["ko_id", "name"], KO)
+    path = str(tmp_path / "index")
+    # Two labels fold to the same key under different IDs, so both records are kept.
+    assert build_indexes(addresses, ko, path) == {"addresses": 7, "ko": 4}
+    return path
+
+
+@pytest.fixture
+def resolver(index_dir):
+    return AddressResolver(index_dir)
+
+
+def _labels(results):
+    return [rec["label"] for rec in results]
+
+
+def test_fold():
+    assert fold("  Šmartinska   CESTA 10,  Ljubljana ") == "smartinska cesta 10 ljubljana"
+    assert fold("12 / 3 k.o. Šiška") == "12 / 3 k o siska"
+
+
+def test_prefix_lookup_matches_a_scan(index_dir):
+    index = PrefixIndex(index_dir, "addresses")
+    keys = sorted((fold(f"{street} {number}, {town}"), rid) for rid, street, number, town in ADDRESSES)
+    for prefix in ["", "s", "sl", "slovenska cesta 1", "slovenska cesta 1 ", "sm", "smartinska", "z", "zzz"]:
+        expected = [key for key, _ in keys if key.startswith(prefix)]
+        assert [rec["key"] for rec in index.prefix(prefix, limit=100)] == expected, prefix
+    assert len(index) == 7
+
+
+def test_autocomplete_ranks_in_key_order_and_honours_limit(resolver):
+    # Diacritics and case do not matter; suggestions come in folded-key order.
+    assert _labels(resolver.autocomplete("ŠMART")) == ["Šmartinska cesta 10, Ljubljana", "Šmartinska cesta 2, Ljubljana"]
+    assert _labels(resolver.autocomplete("sm")) == [
+        "Šmartinska cesta 10, Ljubljana",
+        "Šmartinska cesta 2, Ljubljana",
+        "Smrekarjeva ulica 7, Ljubljana",
+    ]
+    assert _labels(resolver.autocomplete("slovenska cesta 1", limit=2)) == ["Slovenska cesta 1, Ljubljana"] * 2
+    assert [rec["id"] for rec in resolver.autocomplete("slovenska cesta 1,")] == ["addr:3", "addr:7", "addr:4"]
+    assert resolver.autocomplete("trubarjeva") == []
+
+
+def test_autocomplete_completes_the_ko_of_a_parcel(resolver):
+    assert resolver.autocomplete("12/3 k.o. ce") == [
+        {"label": "12/3 k.o. Celje", "id": "parcel:1723/12/3"},
+        {"label": "12/3 k.o. Center", "id": "parcel:1722/12/3"},
+        {"label": "12/3 k.o. Cerklje", "id": "parcel:2636/12/3"},
+    ]
+    assert resolver.autocomplete("45/1 k.o. SIS") == [{"label": "45/1 k.o. Šiška", "id": "parcel:1730/45/1"}]
+
+
+def test_resolve_address_exact_typo_and_unknown(resolver):
+    exact = resolver.resolve_address("glavna ulica 1, center")
+    assert exact == {"id": "addr:6", "label": "Glavna ulica 1, Center", "x": None, "y": None}
+    assert resolver.resolve_address("Smartinska cesta 10 Ljubljana")["id"] == "addr:1"
+    assert resolver.resolve_address("Šmartinksa cesta 10, Ljubljana")["id"] == "addr:1"
+    assert resolver.resolve_address("Trubarjeva 5")["id"] == "text:trubarjeva 5"
+
+
+def test_resolve_parcel_variants_share_one_id(resolver):
+    ids = {resolver.resolve_parcel(text)["id"] for text in ["12/3 k.o. Center", "12 / 3 K.O. center", "12/3 ko Centr", "12/3 k.o. 1722"]}
+    assert ids == {"parcel:1722/12/3"}
+    assert resolver.resolve_parcel("12/3 k.o. Center")["label"] == "12/3 k.o. Center"
+    assert resolver.resolve_parcel("12/3 k.o. Nekje")["id"] == "text:12/3 nekje"
+
+
+def test_without_a_snapshot(tmp_path):
+    resolver = AddressResolver(str(tmp_path / "missing"))
+    assert resolver.autocomplete("slov") == [] and resolver.autocomplete("12/3 k.o. ce") == []
+    assert resolver.resolve_address("Slovenska cesta 1")["id"] == "text:slovenska cesta 1"
+    assert resolver.resolve_parcel("12/3 k.o. 1722")["id"] == "parcel:1722/12/3"
+
+
+def test_autocomplete_endpoint_and_canonical_id(client, resolver, monkeypatch):
+    monkeypatch.setattr(address_index, "_RESOLVER", resolver)
+    assert client.get("/autocomplete?q=s").get_json() == []
+    assert _labels(client.get("/autocomplete?q=slov&limit=1").get_json()) == ["Slovenska cesta 1, Ljubljana"]
+    assert len(client.get("/autocomplete?q=sl&limit=500").get_json()) == 3
+    assert canonical_id("Glavna ulica 1, Center", "12/3 k.o. Center") == "parcel:1722/12/3"
+    assert canonical_id("Glavna ulica 1, Center", None) == "addr:6"
+    assert canonical_id(None, None) == ""
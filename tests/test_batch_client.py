@@ -0,0 +1,107 @@
+import asyncio
+
+from ai import batch_client
+from ai.batch_client import BatchSummarizer
+from ai.summarizer import _build_demo_summary
+from ai.summary_cache import get_summary, summary_key
+from utils import http_client, metrics
+
+
+def _raw_data(name: str, count: int):
+    return [{"parcel": {"parcel_id": f"{name}-{i}", "ko": "1722", "namenska_raba": "SSse"}} for i in range(count)]
+
+
+def _summarize_all(summarizer: BatchSummarizer, items):
+    async def run():
+        try:
+            return await asyncio.gather(*(summarizer.summarize(raw_data) for raw_data in items))
+        finally:
+            await summarizer.aclose()
+
+    return asyncio.run(run())
+
+
+def test_concurrent_summaries_share_one_batch(standin_proxy):
+    config, url = standin_proxy
+    items = _raw_data("batch", 3)
+    results = _summarize_all(BatchSummarizer(url=url + "batch", window_ms=50), items)
+    assert config.requests == 1 and config.items == 3
+    assert results == [_build_demo_summary(raw_data) for raw_data in items]
+    # Proxy answers are cached, so the next lookup skips the proxy.
+    assert all(get_summary(summary_key(raw_data)) == result for raw_data, result in zip(items, results))
+
+
+def test_batch_size_caps_items_per_request(standin_proxy):
+    config, url = standin_proxy
+    _summarize_all(BatchSummarizer(url=url + "batch", batch_size=2, window_ms=50), _raw_data("capped", 5))
+    assert config.requests == 3 and config.items == 5
+
+
+def test_failed_items_fall_back_without_caching(standin_proxy):
+    config, url = standin_proxy
+    config.item_error_rate = 1.0
+    items = _raw_data("item-error", 2)
+    results = _summarize_all(BatchSummarizer(url=url + "batch"), items)
+    assert results == [_build_demo_summary(raw_data) for raw_data in items]
+    assert all(get_summary(summary_key(raw_data)) is None for raw_data in items)
+
+
+def test_batches_go_through_the_shared_breaker(standin_proxy):
+    config, url = standin_proxy
+    config.error_rate = 1.0
+    host = http_client._host(url)
+    for round_ in range(http_client.HTTP_BREAKER_FAILURES):
+        _summarize_all(BatchSummarizer(url=url + "batch"), _raw_data(f"breaker-{round_}", 1))
+    assert http_client.breaker_states()[host] == "open"
+
+    served = config.requests
+    items = _raw_data("breaker-open", 1)
+    assert _summarize_all(BatchSummarizer(url=url + "batch"), items) == [_build_demo_summary(items[0])]
+    assert config.requests == served
+
+
+def test_outcome_comes_from_the_proxy_answer(standin_proxy):
+    config, url = standin_proxy
+    summarizer = BatchSummarizer(url=url + "batch")
+
+    async def run():
+        try:
+            # The stand-in answers with the demo text, which still counts as a live answer.
+            live = await summarizer.summarize_with_outcome(_raw_data("outcome", 1)[0])
+            cached = await summarizer.summarize_with_outcome(_raw_data("outcome", 1)[0])
+            config.sections = 2
+            partial = await summarizer.summarize_with_outcome(_raw_data("outcome-partial", 1)[0])
+            config.sections, config.item_error_rate = None, 1.0
+            failed = await summarizer.summarize_with_outcome(_raw_data("outcome-failed", 1)[0])
+            return live, cached, partial, failed
+        finally:
+            await summarizer.aclose()
+
+    outcomes = [outcome for _, outcome in asyncio.run(run())]
+    assert outcomes == ["live", "cached", "partial", "fallback"]
+    assert config.items == 3
+
+
+def test_summarize_blocking_uses_the_background_loop(standin_proxy, monkeypatch):
+    config, url = standin_proxy
+    monkeypatch.setattr(batch_client, "CF_WORKER_BATCH_URL", url + "batch")
+    monkeypatch.setattr(batch_client, "_LOOP", None)
+    monkeypatch.setattr(batch_client, "_SUMMARIZER", None)
+    raw_data = _raw_data("blocking", 1)[0]
+
+    def recorded(outcome):
+        return metrics.counts().get(("summarize", "batch_proxy", outcome), (0, 0.0))[0]
+
+    before = {outcome: recorded(outcome) for outcome in ("live", "cached", "fallback")}
+    try:
+        assert batch_client.summarize_blocking(raw_data) == _build_demo_summary(raw_data)
+        assert batch_client.summarize_blocking(raw_data) == _build_demo_summary(raw_data)
+        config.item_error_rate = 1.0
+        batch_client.summarize_blocking(_raw_data("blocking-failed", 1)[0])
+        assert config.items == 2
+        # Spans are classified by how the proxy answered, not by comparing against the demo text.
+        assert {outcome: recorded(outcome) - count for outcome, count in before.items()} == {"live": 1, "cached": 1, "fallback": 1}
+    finally:
+        loop = batch_client._LOOP
+        asyncio.run_coroutine_threadsafe(batch_client._SUMMARIZER.aclose(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
@@ -0,0 +1,172 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+
+import pytest
+
+from utils import host_scheduler
+from utils.host_scheduler import (
+    BATCH,
+    INTERACTIVE,
+    HostLimiter,
+    HostScheduler,
+    ThrottledError,
+    _parse_limits,
+    current_priority,
+    in_context,
+    parse_retry_after,
+    priority,
+)
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_interactive_waiters_go_before_batch_waiters():
+    limiter = HostLimiter("example.org", rate=0, burst=0, max_concurrency=1)
+    limiter.acquire(INTERACTIVE, 1.0)
+    order = []
+
+    def wait(level, name):
+        limiter.acquire(level, 2.0)
+        order.append(name)
+        limiter.release(200)
+
+    threads = []
+    for level, name in ((BATCH, "batch-1"), (BATCH, "batch-2"), (INTERACTIVE, "interactive")):
+        threads.append(threading.Thread(target=wait, args=(level, name)))
+        threads[-1].start()
+        _wait_for(lambda: len(limiter._waiters) == len(threads))
+    limiter.release(200)
+    for thread in threads:
+        thread.join()
+    # Interactive first, then batch in arrival order.
+    assert order == ["interactive", "batch-1", "batch-2"]
+
+
+def test_concurrency_cap_holds_requests_until_a_release():
+    limiter = HostLimiter("example.org", rate=0, burst=0, max_concurrency=2)
+    limiter.acquire(INTERACTIVE, 1.0)
+    limiter.acquire(INTERACTIVE, 1.0)
+    released = threading.Timer(0.1, limiter.release, args=(200,))
+    released.start()
+    assert limiter.acquire(INTERACTIVE, 1.0) >= 0.08
+    assert limiter.in_flight == 2
+
+
+def test_throttle_halves_the_rate_and_answers_win_it_back(monkeypatch):
+    monkeypatch.setattr(host_scheduler, "HOST_RATE_RECOVERY", 0.25)
+    limiter = HostLimiter("example.org", rate=1000, burst=10, max_concurrency=0)
+
+    limiter.acquire(INTERACTIVE, 1.0)
+    limiter.release(429, "0")
+    assert limiter.rate_share == 0.5 and limiter.effective_rate == 500
+    limiter.acquire(INTERACTIVE, 1.0)
+    limiter.release(503, "0")
+    assert limiter.rate_share == 0.25
+
+    # Additive recovery per answered request, capped at the configured rate.
+    for share in (0.5, 0.75, 1.0, 1.0):
+        limiter.acquire(INTERACTIVE, 1.0)
+        limiter.release(200)
+        assert limiter.rate_share == share
+    # Requests that got no answer leave the rate alone.
+    limiter.acquire(INTERACTIVE, 1.0)
+    limiter.release(None)
+    assert limiter.rate_share == 1.0
+
+
+def test_rate_never_drops_below_the_floor():
+    limiter = HostLimiter("example.org", rate=1000, burst=10, max_concurrency=0)
+    for _ in range(10):
+        limiter.acquire(INTERACTIVE, 1.0)
+        limiter.release(429, "0")
+    assert limiter.rate_share == host_scheduler.HOST_MIN_RATE_SHARE
+
+
+def test_throttle_pauses_the_host_with_exponential_backoff(monkeypatch):
+    monkeypatch.setattr(host_scheduler, "HOST_BACKOFF_S", 0.1)
+    limiter = HostLimiter("example.org", rate=0, burst=0, max_concurrency=0)
+    limiter.acquire(INTERACTIVE, 1.0)
+    limiter.release(429)
+    assert limiter.snapshot()["paused_s"] == pytest.approx(0.1, abs=0.02)
+    assert limiter.acquire(INTERACTIVE, 1.0) >= 0.08
+    limiter.release(429)
+    assert limiter.snapshot()["paused_s"] == pytest.approx(0.2, abs=0.02)
+    # Retry-After wins over the backoff, and an answer resets the doubling.
+    limiter.release(200)
+    limiter.acquire(INTERACTIVE, 1.0)
+    limiter.release(503, "1")
+    assert limiter.snapshot()["paused_s"] == pytest.approx(1.0, abs=0.05)
+
+
+def test_waits_past_max_wait_raise_throttled_error():
+    limiter = HostLimiter("example.org", rate=0, burst=0, max_concurrency=1)
+    limiter.acquire(INTERACTIVE, 1.0)
+    started = time.monotonic()
+    with pytest.raises(ThrottledError):
+        limiter.acquire(INTERACTIVE, 0.1)
+    assert 0.08 <= time.monotonic() - started < 1.0
+    assert limiter._waiters == []
+
+    # A pause longer than the wait budget fails at once instead of sleeping first.
+    limiter.release(429, "30")
+    started = time.monotonic()
+    with pytest.raises(ThrottledError):
+        limiter.acquire(BATCH, 5.0)
+    assert time.monotonic() - started < 0.5
+
+
+def test_scheduler_max_wait_follows_the_priority(monkeypatch):
+    monkeypatch.setattr(host_scheduler, "HOST_MAX_WAIT_S", 0.1)
+    monkeypatch.setattr(host_scheduler, "HOST_BATCH_MAX_WAIT_S", 5.0)
+    scheduler = HostScheduler("")
+    assert scheduler.max_wait() == 0.1
+    with priority(BATCH):
+        assert scheduler.max_wait() == 5.0
+    scheduler.configure("example.org", 0, 0, 1)
+    scheduler.acquire("example.org")
+    with pytest.raises(ThrottledError):
+        with scheduler.slot("example.org"):
+            pass
+
+
+def test_parse_limits():
+    limits = _parse_limits("workers.dev=0:0:0, pisrs.si=2:4:2,gis.arso.gov.si=8,broken=x:1,noequals")
+    assert limits["workers.dev"] == (0.0, 0.0, 0)
+    assert limits["pisrs.si"] == (2.0, 4.0, 2)
+    # Missing burst defaults to the rate, missing concurrency to HOST_MAX_CONCURRENCY.
+    assert limits["gis.arso.gov.si"] == (8.0, 8.0, host_scheduler.HOST_MAX_CONCURRENCY)
+    assert "broken" not in limits and len(limits) == 3
+
+
+def test_zero_limits_mean_unlimited():
+    scheduler = HostScheduler("workers.dev=0:0:0")
+    host = "summary.example.workers.dev:443"
+    started = time.monotonic()
+    for _ in range(50):
+        scheduler.acquire(host)
+    assert time.monotonic() - started < 0.5
+    assert scheduler.snapshot()[host] == {"rate_per_s": None, "tokens": None, "in_flight": 50, "queued": 0, "paused_s": 0.0}
+    # Subdomains match, look-alike hosts do not.
+    assert scheduler._limits_for("notworkers.dev") != (0.0, 0.0, 0)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(formatdate(time.time() + 60, usegmt=True)) == pytest.approx(60, abs=2)
+    assert parse_retry_after(formatdate(time.time() - 60, usegmt=True)) == 0.0
+    assert parse_retry_after("soon") is None and parse_retry_after(None) is None
+
+
+def test_priority_travels_with_in_context_work():
+    with priority(BATCH):
+        fn = in_context(current_priority)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert list(pool.map(lambda _: fn(), range(8))) == [BATCH] * 8
+        assert pool.submit(current_priority).result() == INTERACTIVE
@@ -0,0 +1,150 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils import http_client
+from utils.http_client import CircuitOpenError
+
+
+class _Upstream:
+    """A local stand-in answering `statuses` in turn (the last one repeats); "reset" hangs up instead."""
+
+    def __init__(self, statuses=(200,), delay_s=0.0, port=0):
+        self.statuses = list(statuses)
+        self.delay_s = delay_s
+        self.hits = 0
+        self.lock = threading.Lock()
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _answer(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                with upstream.lock:
+                    upstream.hits += 1
+                    status = upstream.statuses.pop(0) if len(upstream.statuses) > 1 else upstream.statuses[0]
+                time.sleep(upstream.delay_s)
+                if status == "reset":
+                    self.close_connection = True
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    return
+                self.send_response(status)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            do_GET = do_POST = _answer
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def upstreams():
+    started = []
+
+    def start(*args, **kwargs):
+        upstream = _Upstream(*args, **kwargs)
+        started.append(upstream)
+        return upstream
+
+    yield start
+    for upstream in started:
+        upstream.close()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_breaker_opens_after_repeated_5xx_and_half_opens_after_cooldown(upstreams, monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_BREAKER_COOLDOWN_S", 0.2)
+    upstream = upstreams(statuses=[500, 500, 500, 200])
+    breaker = http_client.get_breaker(http_client._host(upstream.url))
+    for _ in range(http_client.HTTP_BREAKER_FAILURES):
+        assert http_client.get(upstream.url).status_code == 500
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        http_client.get(upstream.url)
+    assert upstream.hits == 3
+
+    time.sleep(0.25)
+    assert breaker.state == "half_open"
+    # One trial call goes through; its success closes the breaker.
+    assert http_client.get(upstream.url).status_code == 200
+    assert breaker.state == "closed" and upstream.hits == 4
+
+
+def test_failed_half_open_trial_reopens_the_breaker(upstreams, monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_BREAKER_COOLDOWN_S", 0.2)
+    upstream = upstreams(statuses=[500])
+    for _ in range(http_client.HTTP_BREAKER_FAILURES):
+        http_client.get(upstream.url)
+    time.sleep(0.25)
+    assert http_client.get(upstream.url).status_code == 500
+    assert http_client.get_breaker(http_client._host(upstream.url)).state == "open"
+    with pytest.raises(CircuitOpenError):
+        http_client.get(upstream.url)
+
+
+def test_throttling_does_not_trip_the_breaker(upstreams):
+    upstream = upstreams(statuses=[429])
+    for _ in range(2 * http_client.HTTP_BREAKER_FAILURES):
+        assert http_client.get(upstream.url, retries=0).status_code == 429
+    assert http_client.get_breaker(http_client._host(upstream.url)).state == "closed"
+    assert upstream.hits == 2 * http_client.HTTP_BREAKER_FAILURES
+
+
+def test_idempotent_requests_retry_transient_statuses(upstreams):
+    upstream = upstreams(statuses=[503, 502, 200])
+    assert http_client.get(upstream.url).status_code == 200
+    assert upstream.hits == 3
+    # A POST is answered with the first 503: the server may have acted on it.
+    upstream = upstreams(statuses=[503, 200])
+    assert http_client.post(upstream.url, data=b"x").status_code == 503
+    assert upstream.hits == 1
+
+
+def test_post_is_not_replayed_after_a_read_timeout(upstreams):
+    upstream = upstreams(delay_s=0.5)
+    with pytest.raises(requests.Timeout):
+        http_client.post(upstream.url, data=b"x", timeout=0.1)
+    assert upstream.hits == 1
+
+
+def test_post_is_not_replayed_after_a_reset(upstreams):
+    upstream = upstreams(statuses=["reset"])
+    with pytest.raises(requests.ConnectionError):
+        http_client.post(upstream.url, data=b"x")
+    assert upstream.hits == 1
+    # The same reset is retried for a GET.
+    with pytest.raises(requests.ConnectionError):
+        http_client.get(upstream.url)
+    assert upstream.hits == 2 + http_client.HTTP_RETRIES
+
+
+def test_post_is_replayed_after_a_refused_connection(upstreams, monkeypatch):
+    port = _free_port()
+    started = []
+    # Nothing listens on the port for the first attempt; the upstream comes up during the backoff.
+    monkeypatch.setattr(http_client, "_backoff", lambda attempt: started.append(upstreams(port=port)))
+    resp = http_client.post(f"http://127.0.0.1:{port}/", data=b"x")
+    assert resp.status_code == 200
+    assert len(started) == 1 and started[0].hits == 1
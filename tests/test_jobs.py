@@ -0,0 +1,75 @@
+import json
+
+from ai.backends import SUMMARIZERS
+from ai.summarizer import _build_demo_summary
+from report.formatter import SummaryRecord
+from utils.result_store import get_result_store
+
+
+def _events(body):
+    """Parse an SSE body into (id, event, data) tuples."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        events.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def _lookup(client, parcel):
+    resp = client.post("/lookup", data={"parcel": parcel})
+    assert resp.status_code == 202
+    return resp.get_json()
+
+
+def test_job_events_arrive_in_order_and_end_with_done(client):
+    job = _lookup(client, "12/3 k.o. Center")
+    resp = client.get(job["events_url"])
+    assert resp.mimetype == "text/event-stream"
+    events = _events(resp.get_data(as_text=True))
+
+    assert [event_id for event_id, _, _ in events] == list(range(1, len(events) + 1))
+    names = [name for _, name, _ in events]
+    assert names[:2] == ["queued", "state"]
+    sources = [data["source"] for _, name, data in events if name == "source"]
+    assert sources == ["parcel", "zoning", "regulations", "summary"]
+    sections = [data["section"] for _, name, data in events if name == "section"]
+    assert sections == list(SummaryRecord.FIELDS)
+    # Sections stream before the summary source event; "done" is the one terminal event.
+    assert names.index("section") < names.index("source", names.index("section"))
+    assert names[-1] == "done" and names.count("done") == 1
+
+    result_id = events[-1][2]["result_id"]
+    assert get_result_store().get(result_id)["raw_data"]["parcel"]["wfs_status"] == "connected"
+    status = client.get(f"/jobs/{job['job_id']}").get_json()
+    assert status == {"job_id": job["job_id"], "state": "done", "result_id": result_id, "events": len(events)}
+
+
+def test_reconnect_replays_after_last_event_id(client):
+    job = _lookup(client, "12/4 k.o. Center")
+    events = _events(client.get(job["events_url"]).get_data(as_text=True))
+    replay = _events(client.get(job["events_url"], headers={"Last-Event-ID": "3"}).get_data(as_text=True))
+    assert replay == events[3:]
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/jobs/nope/events").status_code == 404
+    assert client.get("/jobs/nope").status_code == 404
+
+
+def test_empty_lookup_is_rejected(client):
+    assert client.post("/lookup", data={"address": " ", "parcel": ""}).status_code == 400
+
+
+def test_job_uses_the_session_api_key(client, monkeypatch):
+    keys = []
+
+    def local_key(raw_data, api_key):
+        keys.append(api_key)
+        return _build_demo_summary(raw_data)
+
+    monkeypatch.setitem(SUMMARIZERS._loaded, "local_key", local_key)
+    client.post("/set-api-key", data={"api_key": "sk-test"})
+    job = _lookup(client, "12/5 k.o. Center")
+    events = _events(client.get(job["events_url"]).get_data(as_text=True))
+    assert events[-1][1] == "done"
+    assert keys == ["sk-test"]
@@ -0,0 +1,148 @@
+import math
+import re
+
+import pytest
+
+from utils import metrics
+from utils.metrics import METRIC_NAME, Histogram
+
+_SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{((?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*)\})? (\S+)$')
+_LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def _parse(text):
+    """Check the text exposition line by line; return ({name: type}, [(name, labels, value)])."""
+    assert text.endswith("\n")
+    types, samples = {}, []
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            continue
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert name not in types, f"duplicate TYPE for {name}"
+            types[name] = kind
+            continue
+        match = _SAMPLE_RE.match(line)
+        assert match, f"not a sample line: {line!r}"
+        name, labels, value = match.groups()
+        samples.append((name, dict(_LABEL_RE.findall(labels or "")), float(value)))
+    return types, samples
+
+
+def _series(samples, stage, source, outcome):
+    """Buckets (le -> count), count and sum of one histogram series."""
+    labels = {"stage": stage, "source": source, "outcome": outcome}
+    buckets, count, total = {}, None, None
+    for name, sample_labels, value in samples:
+        le = sample_labels.pop("le", None)
+        if sample_labels != labels:
+            continue
+        if name == f"{METRIC_NAME}_bucket":
+            buckets[le] = value
+        elif name == f"{METRIC_NAME}_count":
+            count = value
+        elif name == f"{METRIC_NAME}_sum":
+            total = value
+    return buckets, count, total
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(("stage", "src", "ok"), value)
+    assert histogram.snapshot() == {("stage", "src", "ok"): [2, 3, 4, 3.65]}
+
+
+def test_exposition_format():
+    metrics.observe("test_format", "a\"b\\c\nd", "ok", 0.003)
+    metrics.observe("test_format", "a\"b\\c\nd", "ok", 50.0)
+    gauges = {"datascraper_test_gauge": ("A gauge.", {(("host", "x.example"),): 2, (("host", "a.example"),): 0.5})}
+    text = metrics.render_prometheus(gauges)
+    types, samples = _parse(text)
+    assert types[METRIC_NAME] == "histogram" and types["datascraper_test_gauge"] == "gauge"
+    # Label values are escaped so the line stays parseable.
+    assert 'source="a\\"b\\\\c\\nd"' in text
+
+    buckets, count, total = _series(samples, "test_format", 'a\\"b\\\\c\\nd', "ok")
+    assert list(buckets) == [repr(bound) for bound in metrics.BUCKETS] + ["+Inf"]
+    values = list(buckets.values())
+    assert values == sorted(values) and buckets["0.005"] == 1 and buckets["40.0"] == 1
+    assert buckets["+Inf"] == count == 2
+    assert total == pytest.approx(50.003)
+
+    gauge = [(labels, value) for name, labels, value in samples if name == "datascraper_test_gauge"]
+    assert gauge == [({"host": "a.example"}, 0.5), ({"host": "x.example"}, 2)]
+
+
+def test_span_records_outcome_and_errors():
+    before = metrics.counts()
+    with metrics.span("test_span", "src", "cached") as current:
+        current.outcome = "live"
+    with pytest.raises(ValueError):
+        with metrics.span("test_span", "src"):
+            raise ValueError("boom")
+    after = metrics.counts()
+    assert after[("test_span", "src", "live")][0] - before.get(("test_span", "src", "live"), (0, 0.0))[0] == 1
+    assert after[("test_span", "src", "error")][0] - before.get(("test_span", "src", "error"), (0, 0.0))[0] == 1
+    assert ("test_span", "src", "cached") not in after
+
+
+def test_collecting_is_per_thread():
+    metrics.start_collecting()
+    metrics.observe("normalize", "", "ok", 0.001)
+    metrics.observe("fetch", "parcel", "live", 0.002)
+    assert metrics.stop_collecting() == [("normalize", 0.001), ("fetch.parcel", 0.002)]
+    assert metrics.stop_collecting() == []
+
+
+def _count(samples, stage, source, outcome):
+    _, count, _ = _series(samples, stage, source, outcome)
+    return count or 0
+
+
+def test_metrics_endpoint_counts_a_lookup(client):
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.content_type == "text/plain; version=0.0.4; charset=utf-8"
+    _, before = _parse(resp.get_data(as_text=True))
+
+    # A parcel no other test summarises, so the summary comes from the proxy rather than the cache.
+    assert client.post("/", data={"parcel": "77/1 k.o. Center"}).status_code == 200
+    types, after = _parse(client.get("/metrics").get_data(as_text=True))
+
+    expected = [
+        ("request", "index", "2xx"),
+        ("normalize", "", "ok"),
+        ("fetch", "parcel", "live"),
+        ("fetch", "regulations", "live"),
+        ("summarize", "proxy", "live"),
+        ("render", "index.html", "ok"),
+    ]
+    for labels in expected:
+        assert _count(after, *labels) - _count(before, *labels) == 1, labels
+    # The scrape itself is counted once it has been served.
+    assert _count(after, "request", "prometheus_metrics", "2xx") - _count(before, "request", "prometheus_metrics", "2xx") == 1
+    assert types["datascraper_circuit_breaker_state"] == "gauge"
+    assert types["datascraper_host_rate_per_s"] == "gauge"
+    for name, labels, value in after:
+        assert not math.isnan(value), (name, labels)
+
+    # The repeat lookup is answered from the summary cache.
+    client.post("/", data={"parcel": "77/1 k.o. Center"})
+    _, repeat = _parse(client.get("/metrics").get_data(as_text=True))
+    assert _count(repeat, "summarize", "proxy", "cached") - _count(after, "summarize", "proxy", "cached") == 1
+    assert _count(repeat, "summarize", "proxy", "live") == _count(after, "summarize", "proxy", "live")
+
+
+def test_profile_header_adds_server_timing(client, monkeypatch, tmp_path):
+    import app as app_module
+
+    assert "Server-Timing" not in client.post("/", data={"parcel": "12/3 k.o. Center"}, headers={"X-Profile": "1"}).headers
+
+    monkeypatch.setattr(app_module, "PROFILE_REQUESTS", True)
+    monkeypatch.setattr(app_module, "PROFILE_DIR", str(tmp_path))
+    resp = client.post("/", data={"parcel": "12/3 k.o. Center"}, headers={"X-Profile": "1"})
+    timings = dict(entry.split(";dur=") for entry in resp.headers["Server-Timing"].split(", "))
+    assert {"normalize", "fetch.parcel", "summarize.proxy", "render.index.html"} <= set(timings)
+    assert all(float(ms) >= 0 for ms in timings.values())
+    assert (tmp_path / resp.headers["X-Profile-File"]).exists()
@@ -0,0 +1,63 @@
+import pytest
+
+from scrapers import eprostor_api, parcel_store
+
+
+@pytest.fixture
+def wfs_calls(monkeypatch):
+    """Stubbed WFS reachability check; records every call."""
+    calls = []
+
+    def probe():
+        calls.append(1)
+        return "connected", 42
+
+    monkeypatch.setattr(eprostor_api, "_probe_wfs", probe)
+    return calls
+
+
+def test_ingest_reads_gml_and_upserts(store):
+    record = store.by_key("1722", "12/3", with_geometry=True)
+    assert record["ko_name"] == "Center" and record["namenska_raba"] == "SSse"
+    # Area from the geometry when the export has none, the export's own value otherwise.
+    assert record["area_m2"] == 10000.0
+    assert store.by_key("1722", "12 / 4")["area_m2"] == 2500.0
+    assert record["geometry"][0][0][:2] == [[0.0, 0.0], [100.0, 0.0]]
+
+    # Re-ingesting replaces rows in place and keeps the R-tree in step.
+    assert store.ingest([{"sifko": "1722", "st_parcele": "12/3", "raba": "IG", "geometry": [[[[0, 0], [10, 0], [10, 10], [0, 0]]]]}]) == 1
+    assert store._conn().execute("SELECT COUNT(*) FROM parcels").fetchone()[0] == 2
+    assert store.by_key("1722", "12/3")["namenska_raba"] == "IG"
+    assert store.at_point(50, 80) is None
+    assert store.at_point(5, 2)["parcel_no"] == "12/3"
+
+
+def test_lookup_by_parcel_id(store, wfs_calls):
+    data = eprostor_api.fetch_parcel_data(parcel="12/3 k.o. Center")
+    assert data["source"] == "local_store"
+    assert data["parcel_id"] == "12/3" and data["ko"] == "1722 K.O. Center"
+    assert data["parcel_query"] == "12/3 k.o. Center"
+    assert not wfs_calls
+
+
+def test_lookup_by_address_point_in_polygon(store, wfs_calls):
+    data = eprostor_api.fetch_parcel_data(address="Glavna ulica 1, Center")
+    assert data["source"] == "local_store"
+    assert data["parcel_id"] == "12/4" and data["namenska_raba"] == "CU"
+    assert not wfs_calls
+
+
+def test_miss_falls_back_to_wfs(store, wfs_calls):
+    data = eprostor_api.fetch_parcel_data(parcel="99/1 k.o. Center")
+    assert "source" not in data and data["wfs_status"] == "connected" and data["wfs_length"] == 42
+    # An address outside every parcel misses as well.
+    data = eprostor_api.fetch_parcel_data(address="Glavna ulica 99, Center")
+    assert data["wfs_status"] == "connected"
+    assert len(wfs_calls) == 2
+
+
+def test_without_a_store_every_lookup_goes_to_wfs(tmp_path, monkeypatch, wfs_calls):
+    monkeypatch.setattr(parcel_store, "PARCEL_STORE_PATH", str(tmp_path / "missing.sqlite"))
+    monkeypatch.setattr(parcel_store, "_STORE", None)
+    assert eprostor_api.fetch_parcel_data(parcel="12/3 k.o. Center")["wfs_status"] == "connected"
+    assert wfs_calls == [1]
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from bench.standins import UpstreamConfig, _PisrsHandler, _serve
+from scrapers import pisrs_api
+from scrapers.pisrs_api import _REVALIDATING, _SNIPPET_MEMORY, _cache_get, _fetch_snippet
+
+
+@pytest.fixture
+def pisrs():
+    """The PISRS stand-in (ETag + 304 support) on a fresh port: (config, page URL)."""
+    config = UpstreamConfig(payload_bytes=8 * 1024)
+    server, base = _serve(_PisrsHandler, config, "pisrs", "127.0.0.1", 0)
+    yield config, f"{base}/pregledPredpisa?id=ZAKO8244"
+    server.shutdown()
+    server.server_close()
+
+
+def _wait_revalidated(key, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while key in _REVALIDATING:
+        assert time.monotonic() < deadline, "revalidation did not finish"
+        time.sleep(0.01)
+
+
+def test_miss_downloads_once_then_memory_and_disk_serve(pisrs):
+    config, url = pisrs
+    snippet = _fetch_snippet(url)
+    assert snippet.startswith("Gradbeni zakon") and snippet.endswith("…")
+    assert config.requests == 1
+
+    assert _fetch_snippet(url) == snippet
+    # A restart loses the memory tier; the disk tier still answers.
+    _SNIPPET_MEMORY.pop(f"400:{url}")
+    assert _fetch_snippet(url) == snippet
+    assert config.requests == 1
+
+
+def test_stale_entry_is_served_and_revalidated_with_etag(pisrs, monkeypatch):
+    config, url = pisrs
+    key = f"400:{url}"
+    monkeypatch.setattr(pisrs_api, "PISRS_CACHE_TTL_S", 0.0)
+    snippet = _fetch_snippet(url)
+    etag = _cache_get(key)["etag"]
+    assert etag
+
+    monkeypatch.setattr(pisrs_api, "PISRS_CACHE_TTL_S", 3600.0)
+    config.latency_s = 0.3
+    started = time.monotonic()
+    assert _fetch_snippet(url) == snippet
+    # Served from the stale entry without waiting for PISRS.
+    assert time.monotonic() - started < 0.2
+    _wait_revalidated(key)
+    assert config.requests == 2 and config.not_modified == 1
+    entry = _cache_get(key)
+    assert entry["etag"] == etag and entry["expires_at"] > time.time() + 3000
+
+
+def test_outage_keeps_the_stale_snippet_and_retries_later(pisrs, monkeypatch):
+    config, url = pisrs
+    key = f"400:{url}"
+    monkeypatch.setattr(pisrs_api, "PISRS_CACHE_TTL_S", 0.0)
+    snippet = _fetch_snippet(url)
+
+    config.error_rate = 1.0
+    assert _fetch_snippet(url) == snippet
+    _wait_revalidated(key)
+    assert config.errors >= 1
+    entry = _cache_get(key)
+    assert entry["snippet"] == snippet
+    assert entry["expires_at"] == pytest.approx(time.time() + pisrs_api.PISRS_RETRY_S, abs=5)
+
+
+def test_concurrent_misses_share_one_download(pisrs):
+    config, url = pisrs
+    config.latency_s = 0.2
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(_fetch_snippet(url))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(results)) == 1 and results[0].startswith("Gradbeni zakon")
+    assert config.requests == 1
+
+
+def test_unreachable_page_without_a_cache_entry(pisrs):
+    config, url = pisrs
+    config.error_rate = 1.0
+    assert _fetch_snippet(url) == "Povzetek ni na voljo (napaka pri dostopu na PISRS)."
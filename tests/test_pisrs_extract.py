@@ -0,0 +1,128 @@
+import os
+import re
+
+import pytest
+
+from scrapers.pisrs_extract import PisrsTextExtractor, stream_extract
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "pisrs_gz1.html")
+
+
+def _page():
+    with open(FIXTURE, "r", encoding="utf-8") as fh:
+        return fh.read()
+
+
+def _baseline_snippet(html, max_len=400):
+    """The whole-page cleaner the extractor replaced: strip tags with a regex, cut at the anchor."""
+    text = re.sub(r"<[^>]+>", " ", html)
+    idx = text.find("function ()")
+    if idx != -1:
+        text = text[:idx]
+    text = re.sub(r"\s+", " ", text).strip()
+    for key in ["Gradbeni zakon", "Uredba o razvrščanju objektov"]:
+        k_idx = text.find(key)
+        if k_idx != -1:
+            text = text[k_idx:]
+            break
+    snippet = text[:max_len]
+    if len(text) > max_len:
+        snippet += "…"
+    return snippet
+
+
+def _extract(html, chunk_size, **kwargs):
+    extractor = PisrsTextExtractor(**kwargs)
+    for start in range(0, len(html), chunk_size):
+        extractor.feed(html[start : start + chunk_size])
+    extractor.close()
+    return extractor
+
+
+class _Response:
+    """Just enough of a streamed requests.Response for stream_extract; counts what was read."""
+
+    def __init__(self, body, content_type="text/html"):
+        self.body = body
+        self.headers = {"Content-Type": content_type}
+        self.encoding = None
+        self.read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size, decode_unicode=False):
+        for start in range(0, len(self.body), chunk_size):
+            chunk = self.body[start : start + chunk_size]
+            self.read += len(chunk)
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 4096, 1 << 20])
+def test_snippet_matches_the_baseline_cleaner(chunk_size):
+    html = _page()
+    snippet = _extract(html, chunk_size).snippet
+    assert snippet == _baseline_snippet(html)
+    assert snippet.startswith("Gradbeni zakon (GZ-1) Uradni list RS")
+
+
+@pytest.mark.parametrize("max_chars", [20, 150, 800])
+def test_snippet_length_matches_the_baseline(max_chars):
+    html = _page()
+    assert _extract(html, 64, max_chars=max_chars).snippet == _baseline_snippet(html, max_chars)
+
+
+def test_whole_page_drops_the_trailing_script():
+    html = _page()
+    snippet = _extract(html, 64, max_chars=5000).snippet
+    # The regex cleaner kept script text up to its "function ()" cut-off; the extractor skips scripts.
+    assert _baseline_snippet(html, 5000) == snippet + " ("
+    assert snippet.endswith("© Republika Slovenija")
+
+
+def test_scripts_styles_and_entities():
+    html = "<style>p{}</style><p>Gradbeni&nbsp;zakon &scaron;e velja</p><script>var x = 1;</script><p>konec</p>"
+    # Character references are decoded; a no-break space collapses like any other whitespace.
+    assert _extract(html, 5).snippet == "Gradbeni zakon še velja konec"
+
+
+def test_without_an_anchor_the_snippet_starts_at_the_text():
+    assert _extract("<p>Drug predpis</p><p>besedilo</p>", 3).snippet == "Drug predpis besedilo"
+
+
+def test_articles_are_split_into_records():
+    articles = _extract(_page(), 7, max_chars=0, max_articles=100).articles
+    assert [a["article"] for a in articles] == ["1", "2", "3", "16", "16a", "17"]
+    second = articles[1]
+    assert second["title"] == "razvrščanje objektov"
+    assert second["text"] == "Objekti se glede na zahtevnost razvrščajo na zahtevne , manj zahtevne , nezahtevne in enostavne objekte."
+    # An article without a "(title)" paragraph keeps its text whole.
+    assert articles[-1]["title"] == "" and articles[-1]["text"].startswith("Stanovanjske stavbe")
+
+
+def test_wanted_articles_only():
+    extractor = _extract(_page(), 13, max_chars=0, wanted_articles={"16a", "2"})
+    assert [(a["article"], a["title"]) for a in extractor.articles] == [("2", "razvrščanje objektov"), ("16a", "enotno dovoljenje")]
+
+
+def test_stream_stops_reading_once_done():
+    # A page padded with megabytes after the articles is only read as far as the snippet needs.
+    body = _page().replace("</body>", "<p>" + "x " * 2_000_000 + "</p></body>")
+    resp = _Response(body)
+    extractor = stream_extract(resp, chunk_size=1024)
+    assert extractor.snippet == _baseline_snippet(_page())
+    assert resp.read < 4096 and resp.closed
+    assert resp.encoding == "utf-8"
+
+    # Picking articles reads up to the last wanted one, not the padding.
+    resp = _Response(body)
+    extractor = stream_extract(resp, chunk_size=1024, max_chars=0, wanted_articles={"3"})
+    assert [a["article"] for a in extractor.articles] == ["3"]
+    assert resp.read < 8192
+
+
+def test_stream_respects_max_bytes():
+    resp = _Response("<p>" + "besedilo " * 100_000 + "</p>")
+    stream_extract(resp, max_bytes=10_000, chunk_size=1000)
+    assert resp.read == 10_000 and resp.closed
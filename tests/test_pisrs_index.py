@@ -0,0 +1,90 @@
+import math
+import mmap
+import os
+from collections import Counter
+
+import pytest
+
+from scrapers import pisrs_index
+from scrapers.pisrs_api import fetch_regulations
+from scrapers.pisrs_index import RegulationIndex, _articles_from_html, build_index, tokenize
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "pisrs_gz1.html")
+
+
+@pytest.fixture
+def articles():
+    return _articles_from_html("GZ-1", FIXTURE)
+
+
+@pytest.fixture
+def index_dir(tmp_path, articles):
+    path = str(tmp_path / "pisrs_index")
+    assert build_index(articles, path) == 6
+    return path
+
+
+def _brute_force_bm25(articles, query):
+    """BM25 over the articles straight from their text, without the on-disk index."""
+    docs = [Counter(tokenize(f"{art['title']} {art['text']}")) for art in articles]
+    lengths = [sum(doc.values()) for doc in docs]
+    avgdl = sum(lengths) / len(lengths)
+    scores = {}
+    for term in set(tokenize(query)):
+        df = sum(1 for doc in docs if term in doc)
+        if not df:
+            continue
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        for doc_id, doc in enumerate(docs):
+            tf = doc.get(term)
+            if tf:
+                norm = 1 - 0.75 + 0.75 * lengths[doc_id] / avgdl
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * 2.2 / (tf + 1.2 * norm)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def test_tokenize_folds_diacritics_stopwords_and_inflections():
+    assert tokenize("Stanovanjske stavbe za razvrščanje, 16. člen") == ["stanov", "stavbe", "razvrs"]
+    assert tokenize("stanovanjska") == tokenize("Stanovanjske")
+
+
+@pytest.mark.parametrize("query", ["SSse stanovanjske stavbe", "gradbeno dovoljenje", "razvrščanje objektov zahtevne", "parcela"])
+def test_ranking_matches_brute_force_bm25(index_dir, articles, query):
+    index = RegulationIndex(index_dir)
+    hits = index.search(query, top_k=10)
+    expected = _brute_force_bm25(articles, query)
+    assert [(hit["law"], hit["article"]) for hit in hits] == [("GZ-1", articles[doc_id]["article"]) for doc_id, _ in expected]
+    assert [hit["score"] for hit in hits] == [round(score, 4) for _, score in expected]
+
+
+def test_postings_are_memory_mapped(index_dir):
+    index = RegulationIndex(index_dir)
+    assert isinstance(index._mmap, mmap.mmap)
+    pairs = sum(df for _, df in index.terms.values())
+    assert os.path.getsize(os.path.join(index_dir, "postings.bin")) == pairs * 2 * 4
+    offset, df = index.terms["stanov"]
+    assert [index._postings[2 * i] for i in range(offset, offset + df)] == [5]
+
+
+def test_top_k_and_no_hits(index_dir):
+    index = RegulationIndex(index_dir)
+    assert len(index.search("objekt zakon gradbeno", top_k=2)) == 2
+    assert index.search("letališka pristanišča") == []
+
+
+def test_empty_index(tmp_path):
+    path = str(tmp_path / "empty")
+    assert build_index([], path) == 0
+    assert RegulationIndex(path).search("stavbe") == []
+
+
+def test_fetch_regulations_answers_from_the_index(index_dir, monkeypatch):
+    monkeypatch.setattr(pisrs_index, "PISRS_INDEX_DIR", index_dir)
+    monkeypatch.setattr(pisrs_index, "_INDEX", None)
+    monkeypatch.setattr(pisrs_index, "_INDEX_LOADED", False)
+    regs = fetch_regulations({"namenska_raba": "SSse"}, {"zone_name": "SSse – Stanovanjska območja", "layers": []})
+    assert regs[0]["law"] == "GZ-1" and regs[0]["article"] == "17"
+    assert regs[0]["snippet"].startswith("Stanovanjske stavbe")
+    # Titled articles carry their title in front of the text.
+    regs = fetch_regulations({"namenska_raba": "gradbeno dovoljenje"})
+    assert regs[0]["snippet"].startswith("(vrste gradbenih dovoljenj) Gradbeno dovoljenje")
@@ -0,0 +1,94 @@
+import io
+import json
+import re
+import zipfile
+from html.parser import HTMLParser
+
+import pytest
+
+from report.builder import REPORT_TITLE
+
+
+@pytest.fixture
+def looked_up(client):
+    """A client whose session references a finished lookup (the synchronous POST / path)."""
+    assert client.post("/", data={"parcel": "12/3 k.o. Center"}).status_code == 200
+    return client
+
+
+def _download(client, fmt):
+    resp = client.post("/download-report", data={"format": fmt})
+    assert resp.status_code == 200
+    return resp
+
+
+class _Tags(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.tags = []
+        self.text = []
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.append(tag)
+
+    def handle_data(self, data):
+        self.text.append(data)
+
+
+def test_txt_report(looked_up):
+    resp = _download(looked_up, "txt")
+    assert resp.content_type == "text/plain; charset=utf-8"
+    assert "attachment" in resp.headers["Content-Disposition"] and ".txt" in resp.headers["Content-Disposition"]
+    text = resp.get_data().decode("utf-8")
+    assert text.startswith("Lokacija / parcela:") and "Relevantni predpisi:" in text and "12/3" in text
+
+
+def test_html_report(looked_up):
+    resp = _download(looked_up, "html")
+    assert resp.content_type == "text/html; charset=utf-8"
+    parser = _Tags()
+    parser.feed(resp.get_data().decode("utf-8"))
+    parser.close()
+    assert "html" in parser.tags and "body" in parser.tags
+    assert REPORT_TITLE in "".join(parser.text)
+
+
+def test_pdf_report(looked_up):
+    resp = _download(looked_up, "pdf")
+    assert resp.content_type == "application/pdf"
+    body = resp.get_data()
+    assert body.startswith(b"%PDF-") and body.rstrip().endswith(b"%%EOF")
+    # The cross-reference table sits where startxref says and points at every object.
+    startxref = int(re.search(rb"startxref\s+(\d+)\s+%%EOF\s*$", body).group(1))
+    assert body[startxref:].startswith(b"xref")
+    offsets = [int(offset) for offset, _ in re.findall(rb"(\d{10}) \d{5} (n)", body[startxref:])]
+    assert offsets
+    for number, offset in enumerate(offsets, start=1):
+        assert body[offset:].startswith(f"{number} 0 obj".encode("ascii"))
+
+
+def test_zip_of_reports(client):
+    csv_rows = "parcel\n12/3 k.o. Center\n12/4 k.o. Center\n12 / 3 k.o. Center\n"
+    resp = client.post(
+        "/batch",
+        data={"file": (io.BytesIO(csv_rows.encode("utf-8")), "parcels.csv"), "zip": "txt"},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200 and resp.content_type == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(resp.get_data()))
+    assert archive.testzip() is None
+    assert sorted(archive.namelist()) == ["manifest.ndjson", "row-00001.txt", "row-00002.txt"]
+    manifest = [json.loads(line) for line in archive.read("manifest.ndjson").decode("utf-8").splitlines()]
+    assert sorted(row["status"] for row in manifest) == ["duplicate", "ok", "ok"]
+    assert archive.read("row-00001.txt").decode("utf-8").startswith("Lokacija / parcela:")
+
+
+def test_unknown_format_falls_back_to_text(looked_up):
+    resp = _download(looked_up, "docx")
+    assert resp.content_type == "text/plain; charset=utf-8"
+    assert resp.get_data().decode("utf-8").startswith("Lokacija / parcela:")
+
+
+def test_download_without_a_result_redirects(client):
+    resp = client.post("/download-report", data={"format": "pdf"})
+    assert resp.status_code == 302
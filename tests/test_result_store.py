@@ -0,0 +1,47 @@
+import threading
+import time
+
+from utils.result_store import ResultStore
+
+
+def test_round_trip(tmp_path):
+    store = ResultStore(str(tmp_path / "results.sqlite"))
+    payload = {"raw_data": {"parcel": {"parcel_id": "12/3", "area_m2": 400.5}}, "ai_summary": {"short": "Šumniki ostanejo."}}
+    result_id = store.put(payload)
+    assert store.get(result_id) == payload
+    assert store.put(payload) != result_id
+    assert store.get("unknown") is None and store.get(None) is None
+
+
+def test_expired_results_are_ignored_and_purged(tmp_path):
+    store = ResultStore(str(tmp_path / "results.sqlite"), ttl_s=0.1)
+    result_id = store.put({"n": 1})
+    assert store.get(result_id) == {"n": 1}
+    time.sleep(0.15)
+    assert store.get(result_id) is None
+    assert store.purge_expired() == 1
+    assert store.purge_expired() == 0
+
+
+def test_concurrent_writers(tmp_path):
+    store = ResultStore(str(tmp_path / "results.sqlite"))
+    ids = {}
+    errors = []
+
+    def write(worker):
+        try:
+            for i in range(25):
+                ids[(worker, i)] = store.put({"worker": worker, "i": i})
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(set(ids.values())) == 200
+    # Another connection (a second process in production) sees every row.
+    reader = ResultStore(store.path)
+    assert all(reader.get(result_id) == {"worker": worker, "i": i} for (worker, i), result_id in ids.items())
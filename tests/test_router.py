@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+
+from scrapers import router
+from scrapers.registry import FALLBACKS, FETCHERS
+from scrapers.router import SourceRouter
+
+HEDGE_S = 0.2
+
+
+class _Backend:
+    """A stub backend answering after `delay_s`; usable answers unless `fail` is set."""
+
+    def __init__(self, name, delay_s=0.0, fail=False):
+        self.name = name
+        self.delay_s = delay_s
+        self.fail = fail
+        self.started = []
+        self.finished = threading.Event()
+
+    def __call__(self, address=None, parcel=None):
+        self.started.append(time.monotonic())
+        time.sleep(self.delay_s)
+        self.finished.set()
+        if self.fail:
+            if self.name == "parcel":
+                return FALLBACKS.get("parcel")(address, parcel, "unreachable")
+            return FALLBACKS.get("parcel_browser")(address, parcel)
+        answer = {"parcel_id": "12/3", "ko": "1722 K.O. Center", "backend": self.name, "address_query": address, "parcel_query": parcel}
+        if self.name == "parcel":
+            answer["wfs_status"] = "connected"
+        return answer
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    """Install stub "parcel" (API) and "parcel_browser" fetchers; returns a factory configuring both."""
+    monkeypatch.setattr(router, "ROUTER_HEDGE_DEFAULT_S", HEDGE_S)
+    monkeypatch.setattr(router, "ROUTER_TIMEOUT_S", 2.0)
+
+    def install(api, browser):
+        monkeypatch.setitem(FETCHERS._loaded, "parcel", api)
+        monkeypatch.setitem(FETCHERS._loaded, "parcel_browser", browser)
+        return api, browser
+
+    return install
+
+
+def _fetch(source_router):
+    started = time.monotonic()
+    data = source_router.fetch(parcel="12/3 k.o. Center")
+    return data, started, time.monotonic() - started
+
+
+def test_fast_primary_is_not_hedged(backends):
+    api, browser = backends(_Backend("parcel", 0.02), _Backend("parcel_browser", 0.02))
+    source_router = SourceRouter()
+    data, _, _ = _fetch(source_router)
+    assert data["backend"] == "parcel"
+    time.sleep(HEDGE_S + 0.05)
+    assert browser.started == []
+    assert source_router.stats["parcel_browser"].hedges == 0
+
+
+def test_hedge_fires_after_the_delay_and_the_first_usable_answer_wins(backends):
+    api, browser = backends(_Backend("parcel", 0.8), _Backend("parcel_browser", 0.02))
+    source_router = SourceRouter()
+    data, started, elapsed = _fetch(source_router)
+
+    assert data["backend"] == "parcel_browser"
+    assert browser.started[0] - started >= HEDGE_S
+    assert elapsed < 0.8
+    # The slow primary is not waited for; it finishes in the background and still feeds its stats.
+    assert not api.finished.is_set()
+    assert api.finished.wait(2.0)
+    time.sleep(0.05)
+    assert source_router.stats["parcel"].summary()["samples"] == 1
+    snapshot = source_router.snapshot()["backends"]
+    assert snapshot["parcel_browser"]["hedges"] == 1 and snapshot["parcel_browser"]["wins"] == 1
+    assert snapshot["parcel"]["primary"] == 1 and snapshot["parcel"]["wins"] == 0
+
+
+def test_unusable_primary_answer_hedges_at_once(backends):
+    api, browser = backends(_Backend("parcel", 0.02, fail=True), _Backend("parcel_browser", 0.02))
+    data, started, elapsed = _fetch(SourceRouter())
+    assert data["backend"] == "parcel_browser"
+    assert elapsed < HEDGE_S
+    assert browser.started[0] - started < HEDGE_S
+
+
+def test_no_usable_answer_returns_the_primary_fallback(backends):
+    backends(_Backend("parcel", 0.02, fail=True), _Backend("parcel_browser", 0.02, fail=True))
+    data, _, _ = _fetch(SourceRouter())
+    assert data["wfs_status"] == "unreachable"
+
+
+def test_failing_backend_is_hedged_to_only_as_a_probe(backends, monkeypatch):
+    monkeypatch.setattr(router, "ROUTER_MIN_SAMPLES", 2)
+    api, browser = backends(_Backend("parcel", 0.02, fail=True), _Backend("parcel_browser", 0.02, fail=True))
+    source_router = SourceRouter()
+    for _ in range(2):
+        source_router.stats["parcel_browser"].record(0.1, False)
+    source_router.stats["parcel_browser"].last_hedge_at = time.monotonic()
+    _fetch(source_router)
+    # The browser's error rate is above the limit and it was probed just now: no hedge.
+    assert browser.started == []
+
+    source_router.stats["parcel_browser"].last_hedge_at = 0.0
+    _fetch(source_router)
+    assert len(browser.started) == 1
+
+
+def test_primary_follows_the_scores(backends, monkeypatch):
+    monkeypatch.setattr(router, "ROUTER_MIN_SAMPLES", 2)
+    api, browser = backends(_Backend("parcel", 0.02), _Backend("parcel_browser", 0.02))
+    source_router = SourceRouter()
+    assert source_router.choose() == ["parcel", "parcel_browser"]
+    for _ in range(2):
+        source_router.stats["parcel"].record(0.5, False)
+        source_router.stats["parcel_browser"].record(1.0, True)
+    # 0.5 s + 10 s error penalty for the API against 1 s for the browser.
+    assert source_router.choose() == ["parcel_browser", "parcel"]
+    data, _, _ = _fetch(source_router)
+    assert data["backend"] == "parcel_browser" and api.started == []
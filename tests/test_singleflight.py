@@ -0,0 +1,79 @@
+import threading
+
+from scrapers import orchestrator
+from utils.host_scheduler import BATCH, INTERACTIVE, priority
+from utils.singleflight import SingleFlight
+
+
+def _lead_and_join(flight, leader_level, joiner_level):
+    """Start a call at `leader_level`, then the same key at `joiner_level` while it is in flight."""
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow(tag):
+        calls.append(tag)
+        started.set()
+        release.wait(5)
+        return tag
+
+    def lead():
+        with priority(leader_level):
+            flight.do("key", slow, "leader")
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    started.wait(5)
+    joined = {}
+
+    def join():
+        with priority(joiner_level):
+            joined["result"] = flight.do("key", lambda: calls.append("joiner") or "joiner")
+
+    joiner = threading.Thread(target=join)
+    joiner.start()
+    joiner.join(0.2)
+    release.set()
+    leader.join(5)
+    joiner.join(5)
+    return calls, joined["result"]
+
+
+def test_same_priority_shares_the_call():
+    calls, result = _lead_and_join(SingleFlight("test"), BATCH, BATCH)
+    assert calls == ["leader"] and result == ("leader", True)
+
+
+def test_interactive_caller_does_not_join_a_batch_call():
+    calls, result = _lead_and_join(SingleFlight("test"), BATCH, INTERACTIVE)
+    assert sorted(calls) == ["joiner", "leader"] and result == ("joiner", False)
+
+
+def test_joined_lookup_keeps_its_own_query_fields(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch_all(address, parcel, mode, on_progress):
+        calls.append(address)
+        started.set()
+        release.wait(5)
+        return {
+            "parcel": {"parcel_id": "1/1", "address_query": address, "parcel_query": parcel},
+            "regulations": [],
+            "zoning": {},
+        }
+
+    monkeypatch.setattr(orchestrator, "fetch_all", fetch_all)
+    results = {}
+    leader = threading.Thread(target=lambda: results.update(leader=orchestrator.build_raw_data("Glavna  ulica 1", "")))
+    leader.start()
+    started.wait(5)
+    joiner = threading.Thread(target=lambda: results.update(joiner=orchestrator.build_raw_data("glavna ulica 1", "")))
+    joiner.start()
+    joiner.join(0.2)
+    release.set()
+    leader.join(5)
+    joiner.join(5)
+    assert calls == ["Glavna  ulica 1"]
+    assert results["leader"]["parcel"]["address_query"] == "Glavna  ulica 1"
+    assert results["joiner"]["parcel"]["address_query"] == "glavna ulica 1"
+    assert results["joiner"]["input"]["original_address"] == "glavna ulica 1"
@@ -0,0 +1,93 @@
+import pytest
+
+from ai import summarizer
+from ai.summarizer import _build_demo_summary, _fill_gaps, summarize, summarize_via_proxy
+from ai.summary_cache import get_summary, summary_key
+from report.formatter import SummaryRecord
+
+
+@pytest.fixture
+def proxy(standin_proxy, monkeypatch):
+    config, url = standin_proxy
+    monkeypatch.setattr(summarizer, "CF_WORKER_PROXY_URL", url)
+    monkeypatch.setattr(summarizer, "CF_WORKER_STREAM", True)
+    return config
+
+
+def _raw_data(name):
+    return {"parcel": {"parcel_id": name, "ko": "1722 K.O. Center", "namenska_raba": "SSse"}}
+
+
+def _stream(raw_data):
+    sections = []
+    summary = summarize_via_proxy(raw_data, on_section=lambda name, value: sections.append((name, value)))
+    return summary, sections
+
+
+def test_full_stream_is_returned_and_cached(proxy):
+    raw_data = _raw_data("stream-full")
+    summary, sections = _stream(raw_data)
+    assert [name for name, _ in sections] == list(SummaryRecord.FIELDS)
+    assert summary == _build_demo_summary(raw_data) == dict(sections)
+    assert get_summary(summary_key(raw_data)) == summary
+    assert proxy.requests == 1
+
+    # The next lookup of the same content is a cache hit.
+    assert summarize_via_proxy(raw_data) == summary
+    assert proxy.requests == 1
+
+
+def test_cut_off_stream_falls_back_to_demo(proxy):
+    proxy.sections, proxy.stream_done = 2, False
+    raw_data = _raw_data("stream-cut")
+    summary, sections = _stream(raw_data)
+    assert [name for name, _ in sections] == list(SummaryRecord.FIELDS[:2])
+    assert summary == _build_demo_summary(raw_data)
+    assert get_summary(summary_key(raw_data)) is None
+
+
+def test_error_message_falls_back_to_demo(proxy):
+    proxy.item_error_rate = 1.0
+    raw_data = _raw_data("stream-error")
+    summary, sections = _stream(raw_data)
+    assert sections == []
+    assert summary == _build_demo_summary(raw_data)
+    assert get_summary(summary_key(raw_data)) is None
+
+
+def test_partial_done_is_filled_and_not_cached(proxy):
+    proxy.sections = 3
+    raw_data = _raw_data("stream-partial")
+    summary, sections = _stream(raw_data)
+    assert [name for name, _ in sections] == list(SummaryRecord.FIELDS[:3])
+    assert set(summary) == set(SummaryRecord.FIELDS)
+    assert get_summary(summary_key(raw_data)) is None
+
+
+def test_partial_json_body_is_filled_and_not_cached(proxy):
+    proxy.sections = 1
+    raw_data = _raw_data("body-partial")
+    summary = summarize_via_proxy(raw_data)
+    assert summary == _build_demo_summary(raw_data)
+    assert get_summary(summary_key(raw_data)) is None
+
+
+def test_summarize_reports_every_section_once(proxy):
+    proxy.sections = 2
+    raw_data = _raw_data("replay")
+    heard = []
+    summary = summarize(raw_data, on_section=lambda name, value: heard.append(name))
+    assert sorted(heard) == sorted(SummaryRecord.FIELDS)
+    assert set(summary) == set(SummaryRecord.FIELDS)
+
+
+def test_fill_gaps_replaces_malformed_fields():
+    raw_data = _raw_data("malformed")
+    demo = _build_demo_summary(raw_data)
+    summary, gaps = _fill_gaps(
+        {**demo, "sources": "PISRS", "parcel_section": {"short": "ok"}, "regulations_section": ["x"]}, raw_data
+    )
+    assert gaps == ["parcel_section", "regulations_section", "sources"]
+    assert summary == demo
+    assert _fill_gaps(["not", "a", "summary"], raw_data) == (dict(demo), list(SummaryRecord.FIELDS))
+    assert _fill_gaps(demo, raw_data)[1] == []
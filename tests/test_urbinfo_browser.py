@@ -0,0 +1,128 @@
+import os
+
+import pytest
+import requests
+
+from bench.standins import _URBINFO_LAYERS, Standins, urbinfo_features
+from scrapers import urbinfo_browser
+from scrapers.browser_pool import BrowserPool
+from scrapers.urbinfo_api import fallback_zoning_layers
+from scrapers.urbinfo_browser import parcel_route, scrape_zoning_via_browser, zoning_from_feature_info
+
+LAYERS = {layer["name"]: layer for layer in _URBINFO_LAYERS}
+
+
+def _chromium_available() -> bool:
+    try:
+        from playwright.sync_api import sync_playwright
+
+        with sync_playwright() as playwright:
+            return os.path.exists(playwright.chromium.executable_path)
+    except Exception:
+        return False
+
+
+requires_chromium = pytest.mark.skipif(not _chromium_available(), reason="needs Chromium: playwright install chromium")
+
+
+@pytest.fixture
+def standins():
+    standins = Standins()
+    yield standins
+    standins.close()
+
+
+@pytest.fixture
+def viewer(standins, monkeypatch):
+    """The fixture viewer with the scraper pointed at it, on a one-worker browser pool."""
+    pool = BrowserPool(size=1)
+    monkeypatch.setattr(urbinfo_browser, "URBINFO_VIEWER_URL", standins.urls["urbinfo"])
+    monkeypatch.setattr(urbinfo_browser, "URBINFO_USERNAME", "test")
+    monkeypatch.setattr(urbinfo_browser, "URBINFO_PASSWORD", "test")
+    monkeypatch.setattr(urbinfo_browser, "get_browser_pool", lambda: pool)
+    yield standins.urbinfo_config
+    pool.shutdown()
+
+
+def _expected(ko_id: str, parcel_id: str):
+    return zoning_from_feature_info(urbinfo_features(f"{ko_id}/{parcel_id}"), LAYERS, parcel_id)
+
+
+def test_parcel_route_quotes_fields_and_needs_both_keys():
+    assert parcel_route({"ko_id": "1722", "parcel_id": "12/3"}) == "#parcel=1722/12%2F3"
+    assert parcel_route({"parcel_id": "12/3"}) is None
+
+
+def test_zoning_from_feature_info_uses_the_layer_catalogue():
+    payload = {
+        "features": [
+            {"id": "opn_eup.7", "properties": {"eup": "CU", "naziv": "Osrednja območja"}},
+            {"id": "poplave.3", "properties": {"ime": "Q 3"}},
+            {"id": "x.1", "properties": {"layer": "unknown", "ime": "Other"}},
+        ]
+    }
+    zoning = zoning_from_feature_info(payload, LAYERS, "12/3")
+    assert zoning["zone_name"] == "CU – Osrednja območja"
+    assert zoning["layers"] == ["Poplavno območje: Q 3", "unknown: Other"]
+    assert zoning["source"] == "urbinfo_browser" and zoning["parcel_ref"] == "12/3"
+
+
+def test_fixture_viewer_requires_a_login(standins):
+    config = standins.urbinfo_config
+    viewer_url = standins.urls["urbinfo"]
+    base = viewer_url.rsplit("/", 1)[0]
+    session = requests.Session()
+    assert session.get(viewer_url, allow_redirects=False).headers["Location"] == "/login"
+    assert session.get(base + "/api/layers").status_code == 401
+    config.denied_status = 403
+    assert session.get(base + "/api/layers").status_code == 403
+
+    session.post(base + "/login", data={"username": "test", "password": "test"})
+    assert session.get(base + "/api/layers").json() == _URBINFO_LAYERS
+    info = session.get(base + "/wms", params={"REQUEST": "GetFeatureInfo", "PARCEL": "1722/12/3"}).json()
+    assert info == urbinfo_features("1722/12/3")
+    assert config.logins == 1
+
+
+def test_unconfigured_viewer_falls_back(monkeypatch):
+    monkeypatch.setattr(urbinfo_browser, "URBINFO_VIEWER_URL", "")
+    parcel = {"ko_id": "1722", "parcel_id": "12/3"}
+    assert scrape_zoning_via_browser(parcel) == fallback_zoning_layers(parcel)
+
+
+@requires_chromium
+def test_login_and_catalogue_interception(viewer):
+    assert scrape_zoning_via_browser({"ko_id": "1722", "parcel_id": "12/3"}) == _expected("1722", "12/3")
+    assert viewer.logins == 1 and viewer.page_loads == 1
+
+
+@requires_chromium
+def test_session_page_is_reused_between_lookups(viewer):
+    for parcel_id in ("12/3", "12/4", "12/4"):
+        assert scrape_zoning_via_browser({"ko_id": "1722", "parcel_id": parcel_id}) == _expected("1722", parcel_id)
+    # One login and one page load; one feature-info exchange per new parcel, none for a repeat.
+    assert viewer.logins == 1 and viewer.page_loads == 1
+    assert viewer.requests == 2
+    assert viewer.tiles == 0
+
+
+@requires_chromium
+@pytest.mark.parametrize("status", [401, 403])
+def test_expired_session_logs_in_again(viewer, status):
+    assert scrape_zoning_via_browser({"ko_id": "1722", "parcel_id": "12/3"}) == _expected("1722", "12/3")
+    viewer.denied_status = status
+    with viewer.lock:
+        viewer.sessions.clear()
+    assert scrape_zoning_via_browser({"ko_id": "1722", "parcel_id": "12/4"}) == _expected("1722", "12/4")
+    assert viewer.logins == 2 and viewer.page_loads == 2
+
+
+@requires_chromium
+def test_failed_feature_info_is_asked_again(viewer):
+    viewer.fail_next = 1
+    parcel = {"ko_id": "1722", "parcel_id": "12/3"}
+    assert scrape_zoning_via_browser(parcel) == fallback_zoning_layers(parcel)
+    # Same parcel again: the 503 was not cached, so the viewer fetches feature info once more.
+    assert scrape_zoning_via_browser(parcel) == _expected("1722", "12/3")
+    assert viewer.requests == 2 and viewer.errors == 1
+    assert viewer.logins == 1
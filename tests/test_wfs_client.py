@@ -0,0 +1,70 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from scrapers.wfs_client import iter_features
+
+LAYER_SIZE = 7
+
+
+def _page(start: int, count: int) -> bytes:
+    members = "".join(
+        f'<wfs:member><kn:PARCELA gml:id="PARCELA.{i}"><kn:ST_PARCELE>{i}</kn:ST_PARCELE></kn:PARCELA></wfs:member>'
+        for i in range(start, min(start + count, LAYER_SIZE))
+    )
+    return (
+        '<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs/2.0" '
+        f'xmlns:gml="http://www.opengis.net/gml/3.2" xmlns:kn="urn:test:kn">{members}</wfs:FeatureCollection>'
+    ).encode("utf-8")
+
+
+@pytest.fixture
+def wfs():
+    """A WFS answering GetFeature pages; `ignore_start_index` makes it always serve the first page."""
+    state = {"ignore_start_index": False, "requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802 - http.server naming
+            query = parse_qs(urlparse(self.path).query)
+            start = 0 if state["ignore_start_index"] else int(query["startIndex"][0])
+            body = _page(start, int(query["count"][0]))
+            state["requests"] += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/gml+xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # noqa: A002 - keep test output quiet
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield state, f"http://127.0.0.1:{server.server_port}/wfs"
+    server.shutdown()
+    server.server_close()
+
+
+def _ids(url, **kwargs):
+    return [feature["gml_id"] for feature in iter_features(url=url, type_name="kn:PARCELA", page_size=3, **kwargs)]
+
+
+def test_pages_until_a_short_page(wfs):
+    state, url = wfs
+    assert _ids(url) == [f"PARCELA.{i}" for i in range(LAYER_SIZE)]
+    assert state["requests"] == 3
+
+
+def test_max_features_caps_the_last_page(wfs):
+    state, url = wfs
+    assert _ids(url, max_features=4) == [f"PARCELA.{i}" for i in range(4)]
+    assert state["requests"] == 2
+
+
+def test_server_ignoring_start_index_stops_after_one_page(wfs):
+    state, url = wfs
+    state["ignore_start_index"] = True
+    assert _ids(url) == ["PARCELA.0", "PARCELA.1", "PARCELA.2"]
+    assert state["requests"] == 2
@@ -0,0 +1,111 @@
+import pytest
+
+from batch.pipeline import run_overlay
+from scrapers import zoning_overlay
+from scrapers.zoning_overlay import OverlayEngine, ingest_layer, zoning_from_hits
+from utils.geometry import bbox, contains_point
+
+
+def _square(x0, y0, x1, y1, holes=()):
+    rings = [[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]]
+    rings += [[[hx0, hy0], [hx1, hy0], [hx1, hy1], [hx0, hy1], [hx0, hy0]] for hx0, hy0, hx1, hy1 in holes]
+    return [rings]
+
+
+def _engine(path, layers):
+    """An engine over `layers`: {name: (kind, [(label, code, geometry), ...])}."""
+    for name, (kind, features) in layers.items():
+        records = [{"label": label, "code": code, "geometry": geometry} for label, code, geometry in features]
+        ingest_layer(path, records, name, name.title(), kind)
+    return OverlayEngine(path)
+
+
+def _sampled_pct(parcel, feature, steps=100):
+    """Reference overlap: share of a regular point grid inside the parcel that is also inside the feature."""
+    min_x, min_y, max_x, max_y = bbox(parcel)
+    inside = shared = 0
+    for i in range(steps):
+        for j in range(steps):
+            x = min_x + (i + 0.5) * (max_x - min_x) / steps
+            y = min_y + (j + 0.5) * (max_y - min_y) / steps
+            if contains_point(parcel, x, y):
+                inside += 1
+                shared += contains_point(feature, x, y)
+    return 100.0 * shared / inside
+
+
+PARCEL = _square(0, 0, 10, 10)
+
+CASES = {
+    "half": (PARCEL, _square(5, -5, 20, 15)),
+    "shared_edge": (PARCEL, _square(10, 0, 20, 10)),
+    "hole": (PARCEL, _square(-5, -5, 15, 15, holes=[(2, 2, 8, 8)])),
+    "inside_hole": (_square(3, 3, 7, 7), _square(-5, -5, 15, 15, holes=[(2, 2, 8, 8)])),
+    "diagonal": (PARCEL, [[[[0, 0], [10, 0], [0, 10], [0, 0]]]]),
+}
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_overlap_matches_point_in_polygon_sampling(tmp_path, case):
+    parcel, feature = CASES[case]
+    engine = _engine(str(tmp_path / "zoning.sqlite"), {"flood": ("overlay", [("Q100", "", feature)])})
+    hits = engine.evaluate(parcel)
+    overlap = hits[0]["overlap_pct"] if hits else 0.0
+    assert overlap == pytest.approx(_sampled_pct(parcel, feature), abs=2.5)
+    assert len(hits) <= 1
+
+
+def test_hole_under_the_centroid_still_overlaps(tmp_path):
+    # A point-in-polygon test at the parcel centre misses the flood area; the overlay does not.
+    flood = CASES["hole"][1]
+    assert not contains_point(flood, 5, 5)
+    engine = _engine(str(tmp_path / "zoning.sqlite"), {"flood": ("overlay", [("Q100", "", flood)])})
+    assert engine.evaluate(PARCEL)[0]["overlap_pct"] > 60
+
+
+def test_multi_zone_parcel_takes_the_largest_zone(tmp_path):
+    engine = _engine(
+        str(tmp_path / "zoning.sqlite"),
+        {
+            "opn": ("zone", [("Osrednja območja", "CU", _square(-10, -10, 3, 20)), ("Stanovanjska območja", "SSse", _square(3, -10, 20, 20))]),
+            "flood": ("overlay", [("Q100", "", _square(0, 0, 10, 5))]),
+        },
+    )
+    hits = engine.evaluate(PARCEL)
+    zones = [hit for hit in hits if hit["layer"] == "opn"]
+    assert [hit["code"] for hit in zones] == ["SSse", "CU"]
+    assert sum(hit["overlap_pct"] for hit in zones) == pytest.approx(100.0, abs=0.5)
+
+    zoning = zoning_from_hits(hits, "12/3")
+    assert zoning["zone_name"] == "SSse – Stanovanjska območja"
+    assert zoning["layers"] == ["Flood: Q100 (50 %)"]
+
+
+def test_evaluate_many_keeps_order_and_skips_missing_geometry(tmp_path):
+    engine = _engine(str(tmp_path / "zoning.sqlite"), {"flood": ("overlay", [("Q100", "", _square(5, -5, 20, 15))])})
+    results = list(engine.evaluate_many([("a", PARCEL), ("b", None), ("c", _square(50, 50, 60, 60))]))
+    assert [key for key, _ in results] == ["a", "b", "c"]
+    assert results[0][1] == engine.evaluate(PARCEL)
+    assert results[1][1] == [] and results[2][1] == []
+
+
+def test_batch_overlay_pass(tmp_path, monkeypatch, store):
+    path = str(tmp_path / "zoning.sqlite")
+    # Parcel 12/3 is 0..100 x 0..100, 12/4 is 100..150 x 0..50.
+    _engine(path, {"opn": ("zone", [("Osrednja območja", "CU", _square(-10, -10, 125, 110))])})
+    monkeypatch.setattr(zoning_overlay, "ZONING_STORE_PATH", path)
+    monkeypatch.setattr(zoning_overlay, "_ENGINE", None)
+
+    rows = [
+        {"parcel": "12/3 k.o. Center"},
+        {"parcel": "12/4 k.o. Center"},
+        {"parcel": "12 / 3 k.o. Center"},
+        {"parcel": "99/1 k.o. Center"},
+        {"address": "", "parcel": ""},
+    ]
+    results = list(run_overlay(rows))
+    assert [result["status"] for result in results] == ["ok", "ok", "duplicate", "not_found", "error"]
+    assert results[0]["zoning"]["zone_name"] == "CU – Osrednja območja"
+    assert results[0]["zoning"]["layer_hits"][0]["overlap_pct"] == 100.0
+    assert results[1]["zoning"]["layer_hits"][0]["overlap_pct"] == pytest.approx(50.0, abs=1.0)
+    assert results[2]["duplicate_of"] == 1
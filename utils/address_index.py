@@ -0,0 +1,270 @@
+"""
+Address and cadastral-community (k.o.) resolver backed by a memory-mapped prefix index.
+
+A snapshot of the address register and the k.o. list is compiled offline into
+sorted, newline-separated records plus a uint64 offset table. At runtime both
+files are memory-mapped and searched with binary search, so prefix lookups for
+autocomplete take microseconds and the process only pages in what it touches.
+
+Record format (one per line, sorted by key):
+    <folded key>\\t<label>\\t<canonical id>\\t<x>\\t<y>
+
+Canonical IDs are stable keys for downstream fetchers and caches:
+    addr:<register id>              resolved address
+    parcel:<ko id>/<parcel number>  parcel in a resolved k.o.
+    text:<folded input>             unresolved input (still typo/case/spacing-insensitive)
+
+Build from snapshot CSVs (address columns: id, street, house_number, settlement[, postcode, x, y];
+k.o. columns: ko_id, name):
+    python -m utils.address_index build --addresses naslovi.csv --ko ko.csv
+"""
+
+import argparse
+import csv
+import difflib
+import mmap
+import os
+import re
+import sys
+import threading
+import unicodedata
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+ADDRESS_INDEX_DIR = os.getenv(
+    "ADDRESS_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "address_index"),
+)
+# Candidates scanned for typo correction; bounds the fuzzy step regardless of register size.
+_FUZZY_CANDIDATES = 200
+_FUZZY_CUTOFF = 0.85
+_PARCEL_RE = re.compile(r"^\s*(\d+(?:/\d+)?)\s*(?:k\.?\s?o\.?(?:\s+|$))?(.*)$", re.IGNORECASE)
+
+
+def fold(text: str) -> str:
+    """Lowercase, strip diacritics and punctuation (keeping '/'), collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w/]+", " ", text)
+    return " ".join(text.split())
+
+
+class PrefixIndex:
+    """Sorted records in a memory-mapped file, located by binary search over an offset table."""
+
+    def __init__(self, directory: str, name: str) -> None:
+        self._data_file = open(os.path.join(directory, f"{name}.txt"), "rb")
+        self._offsets_file = open(os.path.join(directory, f"{name}.idx"), "rb")
+        self._data = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets_map = mmap.mmap(self._offsets_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = memoryview(self._offsets_map).cast("Q")
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _key(self, i: int) -> bytes:
+        start = self._offsets[i]
+        return self._data[start : self._data.find(b"\t", start)]
+
+    def _record(self, i: int) -> Dict[str, Any]:
+        start = self._offsets[i]
+        line = self._data[start : self._data.find(b"\n", start)].decode("utf-8")
+        key, label, canonical_id, x, y = line.split("\t")
+        return {
+            "key": key,
+            "label": label,
+            "id": canonical_id,
+            "x": float(x) if x else None,
+            "y": float(y) if y else None,
+        }
+
+    def _lower_bound(self, prefix: bytes) -> int:
+        lo, hi = 0, len(self._offsets)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def prefix(self, folded_prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        needle = folded_prefix.encode("utf-8")
+        results = []
+        i = self._lower_bound(needle)
+        while i < len(self._offsets) and len(results) < limit:
+            if not self._key(i).startswith(needle):
+                break
+            results.append(self._record(i))
+            i += 1
+        return results
+
+    def exact(self, folded: str) -> Optional[Dict[str, Any]]:
+        for record in self.prefix(folded, limit=1):
+            if record["key"] == folded:
+                return record
+        return None
+
+    def closest(self, folded: str) -> Optional[Dict[str, Any]]:
+        """Typo-tolerant match among records sharing the first few characters."""
+        candidates = self.prefix(folded[:3], limit=_FUZZY_CANDIDATES) if len(folded) >= 3 else []
+        keys = [c["key"] for c in candidates]
+        match = difflib.get_close_matches(folded, keys, n=1, cutoff=_FUZZY_CUTOFF)
+        if not match:
+            return None
+        return candidates[keys.index(match[0])]
+
+
+class AddressResolver:
+    """Address and k.o. lookups; both indexes are optional so the app runs without a snapshot."""
+
+    def __init__(self, directory: str = ADDRESS_INDEX_DIR) -> None:
+        self.addresses = self._open(directory, "addresses")
+        self.ko = self._open(directory, "ko")
+
+    @staticmethod
+    def _open(directory: str, name: str) -> Optional[PrefixIndex]:
+        path = os.path.join(directory, f"{name}.txt")
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+        return PrefixIndex(directory, name)
+
+    def autocomplete(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Suggestions for a partial address, or for the k.o. part of a parcel number."""
+        parcel_match = _PARCEL_RE.match(query)
+        if parcel_match and ("/" in query or "k.o" in query.lower()):
+            if self.ko is None:
+                return []
+            number, ko_part = parcel_match.groups()
+            return [
+                {"label": f"{number} k.o. {rec['label']}", "id": f"parcel:{rec['id'][3:]}/{number}"}
+                for rec in self.ko.prefix(fold(ko_part), limit)
+            ]
+        if self.addresses is None:
+            return []
+        return [{"label": rec["label"], "id": rec["id"]} for rec in self.addresses.prefix(fold(query), limit)]
+
+    def resolve_address(self, address: str) -> Dict[str, Any]:
+        folded = fold(address)
+        record = None
+        if self.addresses is not None and folded:
+            record = self.addresses.exact(folded) or self.addresses.closest(folded)
+        if record is None:
+            return {"id": f"text:{folded}" if folded else "", "label": None, "x": None, "y": None}
+        return {"id": record["id"], "label": record["label"], "x": record["x"], "y": record["y"]}
+
+    def resolve_parcel(self, parcel: str) -> Dict[str, Any]:
+        match = _PARCEL_RE.match(re.sub(r"\s*/\s*", "/", parcel or ""))
+        if not match:
+            folded = fold(parcel or "")
+            return {"id": f"text:{folded}" if folded else "", "label": None, "ko_id": None, "parcel_no": None}
+        number, ko_part = match.groups()
+        ko_folded = fold(ko_part)
+        record = None
+        if self.ko is not None and ko_folded:
+            record = self.ko.exact(ko_folded) or self.ko.closest(ko_folded)
+        if record is None:
+            # Cadastral codes are sometimes typed instead of names ("1234/5 k.o. 1722").
+            ko_id = ko_folded if ko_folded.isdigit() else None
+            return {
+                "id": f"parcel:{ko_id}/{number}" if ko_id else f"text:{number} {ko_folded}".strip(),
+                "label": None,
+                "ko_id": ko_id,
+                "parcel_no": number,
+            }
+        ko_id = record["id"][3:]
+        return {
+            "id": f"parcel:{ko_id}/{number}",
+            "label": f"{number} k.o. {record['label']}",
+            "ko_id": ko_id,
+            "parcel_no": number,
+        }
+
+
+_RESOLVER: Optional[AddressResolver] = None
+_RESOLVER_LOCK = threading.Lock()
+
+
+def get_resolver() -> AddressResolver:
+    global _RESOLVER
+    with _RESOLVER_LOCK:
+        if _RESOLVER is None:
+            _RESOLVER = AddressResolver()
+        return _RESOLVER
+
+
+def canonical_id(address: Optional[str], parcel: Optional[str]) -> str:
+    """Stable lookup key: the resolved parcel wins over the address, as in the fetchers."""
+    resolver = get_resolver()
+    if parcel:
+        return resolver.resolve_parcel(parcel)["id"]
+    if address:
+        return resolver.resolve_address(address)["id"]
+    return ""
+
+
+# -- Snapshot compilation -------------------------------------------------
+
+
+def _write_index(directory: str, name: str, records: List[Tuple[str, str, str, str, str]]) -> int:
+    records.sort(key=lambda rec: rec[0].encode("utf-8"))
+    offsets = array("Q")
+    with open(os.path.join(directory, f"{name}.txt"), "wb") as fh:
+        seen = set()
+        for rec in records:
+            if (rec[0], rec[2]) in seen:
+                continue
+            seen.add((rec[0], rec[2]))
+            offsets.append(fh.tell())
+            fh.write(("\t".join(field.replace("\t", " ").replace("\n", " ") for field in rec) + "\n").encode("utf-8"))
+    with open(os.path.join(directory, f"{name}.idx"), "wb") as fh:
+        offsets.tofile(fh)
+    return len(offsets)
+
+
+def build_indexes(addresses_csv: Optional[str], ko_csv: Optional[str], directory: str = ADDRESS_INDEX_DIR) -> Dict[str, int]:
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    if addresses_csv:
+        records = []
+        with open(addresses_csv, "r", encoding="utf-8", newline="") as fh:
+            for row in csv.DictReader(fh):
+                street = (row.get("street") or "").strip()
+                number = (row.get("house_number") or "").strip()
+                settlement = (row.get("settlement") or "").strip()
+                label = f"{street} {number}, {settlement}".strip(" ,")
+                records.append((fold(label), label, f"addr:{row['id'].strip()}", row.get("x") or "", row.get("y") or ""))
+        counts["addresses"] = _write_index(directory, "addresses", records)
+    if ko_csv:
+        records = []
+        with open(ko_csv, "r", encoding="utf-8", newline="") as fh:
+            for row in csv.DictReader(fh):
+                name = (row.get("name") or "").strip()
+                ko_id = (row.get("ko_id") or "").strip()
+                records.append((fold(name), name, f"ko:{ko_id}", "", ""))
+        counts["ko"] = _write_index(directory, "ko", records)
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile the address / k.o. prefix index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("--addresses", help="address register CSV")
+    build.add_argument("--ko", help="cadastral communities CSV")
+    build.add_argument("--out", default=ADDRESS_INDEX_DIR)
+    lookup = sub.add_parser("lookup")
+    lookup.add_argument("query")
+    args = parser.parse_args(argv)
+
+    if args.command == "lookup":
+        for hit in get_resolver().autocomplete(args.query):
+            print(f"{hit['id']:<24} {hit['label']}")
+        return 0
+    counts = build_indexes(args.addresses, args.ko, args.out)
+    print(f"[address_index] Wrote {counts} to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Small caching helpers shared by scrapers and the summariser.
+
+Provides a thread-safe in-memory LRU tier and a JSON-file disk tier so cached
+data survives restarts. Values must be JSON-serialisable (records included;
+the disk tier writes them with the canonical serializer, utils/records.py).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from utils.records import dumps
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv(
+    "CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache"),
+)
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with a fixed item limit."""
+
+    def __init__(self, max_items: int = 256) -> None:
+        self.max_items = max_items
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DiskCache:
+    """
+    One JSON file per key under a directory; writes are atomic via rename.
+    With `max_bytes`, the least recently used files are evicted once the directory grows past it
+    (reads refresh a file's mtime, so mtime order is LRU order).
+    """
+
+    def __init__(self, directory: str, max_bytes: Optional[int] = None) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                value = json.load(fh)
+            if self.max_bytes:
+                os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable cache entry for %s: %s", key, exc)
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(dumps(value))
+            path = self._path(key)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except OSError as exc:  # pragma: no cover - read-only or full disk
+            logger.warning("Could not persist cache entry for %s: %s", key, exc)
+            return
+        if self.max_bytes:
+            self._account(os.path.getsize(path) - old_size)
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _account(self, delta: int) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += delta
+            if self._size <= self.max_bytes:
+                return
+            # Evict down to 90% so eviction scans are not triggered on every write.
+            target = int(self.max_bytes * 0.9)
+            for _, size, path in sorted(self._entries()):
+                if self._size <= target:
+                    break
+                try:
+                    os.remove(path)
+                    self._size -= size
+                except FileNotFoundError:
+                    pass
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self._size = None  # Recount on the next write.
@@ -0,0 +1,192 @@
+"""
+Minimal planar geometry helpers for parcels and zoning layers.
+
+Geometries are kept as plain nested lists so they serialise to JSON as-is:
+a geometry is a list of polygons, a polygon is a list of rings (first ring is
+the exterior, the rest are holes) and a ring is a list of [x, y] pairs.
+Only what the local stores need is implemented: WKT/WKB parsing, bounding
+boxes, areas, point-in-polygon tests and scanline spans for overlap estimates.
+"""
+
+import math
+import re
+import struct
+from typing import List, Sequence, Tuple
+
+Ring = List[List[float]]
+Polygon = List[Ring]
+Geometry = List[Polygon]
+BBox = Tuple[float, float, float, float]  # min_x, min_y, max_x, max_y
+Edge = Tuple[float, float, float, float]  # x1, y1, x2, y2
+Spans = List[Tuple[float, float]]  # sorted, disjoint [x_start, x_end) intervals on one scanline
+
+_NUMBER_PAIR_RE = re.compile(r"(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)\s+(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)")
+
+
+def _parse_ring(text: str) -> Ring:
+    return [[float(x), float(y)] for x, y in _NUMBER_PAIR_RE.findall(text)]
+
+
+def parse_wkt(wkt: str) -> Geometry:
+    """Parse POLYGON / MULTIPOLYGON WKT (Z/M ordinates are not supported)."""
+    body = wkt.strip()
+    kind = body.split("(", 1)[0].strip().upper()
+    if kind not in ("POLYGON", "MULTIPOLYGON"):
+        raise ValueError(f"Unsupported WKT geometry: {kind or body[:20]}")
+    inner = body[body.index("(") + 1 : body.rindex(")")]
+    polygon_texts = re.split(r"\)\s*\)\s*,\s*\(\s*\(", inner) if kind == "MULTIPOLYGON" else [inner]
+    geometry: Geometry = []
+    for polygon_text in polygon_texts:
+        rings = [_parse_ring(ring) for ring in re.split(r"\)\s*,\s*\(", polygon_text)]
+        geometry.append([ring for ring in rings if len(ring) >= 3])
+    return [polygon for polygon in geometry if polygon]
+
+
+def parse_wkb(data: bytes) -> Geometry:
+    """Parse 2D Polygon / MultiPolygon WKB (ISO or EWKB with an SRID flag)."""
+    geometry, _ = _read_wkb(data, 0)
+    return geometry
+
+
+def _read_wkb(data: bytes, offset: int) -> Tuple[Geometry, int]:
+    byte_order = "<" if data[offset] == 1 else ">"
+    (geom_type,) = struct.unpack_from(byte_order + "I", data, offset + 1)
+    offset += 5
+    if geom_type & 0x20000000:  # EWKB SRID present
+        offset += 4
+    base_type = geom_type & 0xFFFF
+    dims = 2
+    if base_type > 1000:  # ISO Z/M variants (1003, 2003, 3003 ...)
+        dims = 3 if base_type // 1000 in (1, 2) else 4
+        base_type %= 1000
+    elif geom_type & 0x80000000 or geom_type & 0x40000000:
+        dims = 2 + bool(geom_type & 0x80000000) + bool(geom_type & 0x40000000)
+
+    if base_type == 3:
+        polygon, offset = _read_wkb_polygon(data, offset, byte_order, dims)
+        return [polygon], offset
+    if base_type == 6:
+        (count,) = struct.unpack_from(byte_order + "I", data, offset)
+        offset += 4
+        geometry: Geometry = []
+        for _ in range(count):
+            part, offset = _read_wkb(data, offset)
+            geometry.extend(part)
+        return geometry, offset
+    raise ValueError(f"Unsupported WKB geometry type: {geom_type}")
+
+
+def _read_wkb_polygon(data: bytes, offset: int, byte_order: str, dims: int) -> Tuple[Polygon, int]:
+    (ring_count,) = struct.unpack_from(byte_order + "I", data, offset)
+    offset += 4
+    polygon: Polygon = []
+    for _ in range(ring_count):
+        (point_count,) = struct.unpack_from(byte_order + "I", data, offset)
+        offset += 4
+        values = struct.unpack_from(f"{byte_order}{point_count * dims}d", data, offset)
+        offset += 8 * point_count * dims
+        polygon.append([[values[i], values[i + 1]] for i in range(0, len(values), dims)])
+    return polygon, offset
+
+
+def parse_gpkg_geometry(blob: bytes) -> Geometry:
+    """Strip the GeoPackage binary header (magic, flags, envelope) and parse the WKB body."""
+    if blob[:2] != b"GP":
+        return parse_wkb(blob)
+    flags = blob[3]
+    envelope_size = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}.get((flags >> 1) & 0x07, 0)
+    return parse_wkb(blob[8 + envelope_size :])
+
+
+def bbox(geometry: Geometry) -> BBox:
+    xs = [pt[0] for polygon in geometry for pt in polygon[0]]
+    ys = [pt[1] for polygon in geometry for pt in polygon[0]]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def ring_area(ring: Sequence[Sequence[float]]) -> float:
+    area = 0.0
+    for i in range(len(ring)):
+        x1, y1 = ring[i - 1]
+        x2, y2 = ring[i]
+        area += x1 * y2 - x2 * y1
+    return abs(area) / 2.0
+
+
+def area(geometry: Geometry) -> float:
+    return sum(ring_area(polygon[0]) - sum(ring_area(hole) for hole in polygon[1:]) for polygon in geometry)
+
+
+def _point_in_ring(x: float, y: float, ring: Sequence[Sequence[float]]) -> bool:
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i]
+        xj, yj = ring[j]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def contains_point(geometry: Geometry, x: float, y: float) -> bool:
+    """Even-odd test: inside an exterior ring and outside all of its holes."""
+    for polygon in geometry:
+        if _point_in_ring(x, y, polygon[0]) and not any(_point_in_ring(x, y, hole) for hole in polygon[1:]):
+            return True
+    return False
+
+
+def edges(geometry: Geometry) -> List[Edge]:
+    """All ring edges of a geometry; horizontal edges never cross a scanline and are dropped."""
+    result: List[Edge] = []
+    for polygon in geometry:
+        for ring in polygon:
+            for i in range(len(ring)):
+                x1, y1 = ring[i - 1]
+                x2, y2 = ring[i]
+                if y1 != y2:
+                    result.append((x1, y1, x2, y2))
+    return result
+
+
+def scanline_spans(geometry_edges: Sequence[Edge], y0: float, dy: float, rows: int) -> List[Spans]:
+    """
+    Inside-spans of a geometry on `rows` scanlines at y0 + (k + 0.5) * dy (even-odd rule).
+    Each edge is visited once and only touches the rows it crosses.
+    """
+    crossings: List[List[float]] = [[] for _ in range(rows)]
+    for x1, y1, x2, y2 in geometry_edges:
+        y_min, y_max = (y1, y2) if y1 < y2 else (y2, y1)
+        k_lo = max(0, math.ceil((y_min - y0) / dy - 0.5))
+        k_hi = min(rows - 1, math.ceil((y_max - y0) / dy - 0.5) - 1)
+        if k_lo > k_hi:
+            continue
+        slope = (x2 - x1) / (y2 - y1)
+        for k in range(k_lo, k_hi + 1):
+            crossings[k].append(x1 + (y0 + (k + 0.5) * dy - y1) * slope)
+    spans: List[Spans] = []
+    for xs in crossings:
+        xs.sort()
+        spans.append([(xs[i], xs[i + 1]) for i in range(0, len(xs) - 1, 2)])
+    return spans
+
+
+def spans_length(spans: Spans) -> float:
+    return sum(end - start for start, end in spans)
+
+
+def spans_overlap(a: Spans, b: Spans) -> float:
+    """Total length shared by two sorted span lists (two-pointer merge)."""
+    i = j = 0
+    total = 0.0
+    while i < len(a) and j < len(b):
+        start = max(a[i][0], b[j][0])
+        end = min(a[i][1], b[j][1])
+        if end > start:
+            total += end - start
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return total
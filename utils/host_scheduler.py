@@ -0,0 +1,307 @@
+"""
+Per-host politeness scheduler for every upstream request.
+
+Each host gets a token bucket (requests per second with a burst), a cap on
+requests in flight and a priority-ordered wait queue: an interactive lookup
+waiting for a slot always goes before batch work on the same host, however
+long the batch queue is. utils/http_client.py takes a slot for every attempt,
+so all scrapers are covered; the Urbinfo viewer (scrapers/urbinfo_browser.py)
+takes one per feature-info exchange.
+
+The allowed rate adapts to the host: a 429 or 503 halves it and pauses the
+host for its Retry-After (or an exponential backoff without one); every
+answered request wins a little of it back (AIMD). A request that would have
+to wait longer than its priority's maximum fails at once with ThrottledError
+(a requests.RequestException), so callers fall back instead of queueing
+behind a ban.
+
+Priority is a context variable: `with priority(BATCH): ...` marks everything
+below it, including work submitted with `in_context()` to thread pools.
+
+Limits per host come from HOST_LIMITS ("host=rate:burst:concurrency", comma
+separated, matching the host and its subdomains; 0 means unlimited), with
+HOST_RATE_PER_S / HOST_BURST / HOST_MAX_CONCURRENCY for every other host. For
+streamed responses the slot covers the request up to the response headers.
+"""
+
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+HOST_RATE_PER_S = float(os.getenv("HOST_RATE_PER_S", "4"))
+HOST_BURST = float(os.getenv("HOST_BURST", "8"))
+HOST_MAX_CONCURRENCY = int(os.getenv("HOST_MAX_CONCURRENCY", "4"))
+# Public sources get conservative limits; the summary proxy is our own Worker and is not limited.
+HOST_LIMITS = os.getenv("HOST_LIMITS", "pisrs.si=2:4:2,gis.arso.gov.si=8:16:4,workers.dev=0:0:0")
+# Longest wait for a slot before giving up; interactive lookups have deadlines, batch work can queue.
+HOST_MAX_WAIT_S = float(os.getenv("HOST_MAX_WAIT_S", "10"))
+HOST_BATCH_MAX_WAIT_S = float(os.getenv("HOST_BATCH_MAX_WAIT_S", "300"))
+# Pause after a 429/503 without Retry-After (doubled per consecutive one), and the cap on any pause.
+HOST_BACKOFF_S = float(os.getenv("HOST_BACKOFF_S", "1"))
+HOST_MAX_PAUSE_S = float(os.getenv("HOST_MAX_PAUSE_S", "300"))
+# Share of the configured rate won back per answered request after a throttle; the rate never drops below HOST_MIN_RATE_SHARE.
+HOST_RATE_RECOVERY = float(os.getenv("HOST_RATE_RECOVERY", "0.05"))
+HOST_MIN_RATE_SHARE = float(os.getenv("HOST_MIN_RATE_SHARE", "0.1"))
+
+THROTTLE_STATUSES = {429, 503}
+
+_PRIORITY: "contextvars.ContextVar[int]" = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+
+class ThrottledError(requests.RequestException):
+    """Raised instead of waiting longer than the priority's maximum for a host slot."""
+
+
+def current_priority() -> int:
+    return _PRIORITY.get()
+
+
+@contextmanager
+def priority(level: int) -> Iterator[None]:
+    """Run the block's upstream requests (and work it submits via `in_context`) at `level`."""
+    token = _PRIORITY.set(level)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def in_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """`fn` bound to the current context, for thread pools: the priority travels with the work."""
+    context = contextvars.copy_context()
+    # A context can only be entered by one thread at a time, so each call gets its own copy (pool.map).
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date); None when absent or invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class HostLimiter:
+    """Token bucket, concurrency cap, adaptive rate and priority wait queue for one host."""
+
+    def __init__(self, host: str, rate: float, burst: float, max_concurrency: int) -> None:
+        self.host = host
+        self.rate = rate
+        self.burst = max(1.0, burst) if rate > 0 else 0.0
+        self.max_concurrency = max_concurrency
+        self.tokens = self.burst
+        self.rate_share = 1.0
+        self.paused_until = 0.0
+        self.throttles = 0
+        self.in_flight = 0
+        self._refilled = time.monotonic()
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    @property
+    def effective_rate(self) -> float:
+        return self.rate * self.rate_share
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self._refilled) * self.effective_rate)
+        self._refilled = now
+
+    def _delay(self, now: float) -> float:
+        """Seconds until a request could start, ignoring the concurrency cap; caller holds the lock."""
+        delay = max(0.0, self.paused_until - now)
+        if self.rate > 0 and self.tokens < 1:
+            delay = max(delay, (1 - self.tokens) / self.effective_rate)
+        return delay
+
+    def delay(self) -> float:
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            return self._delay(now)
+
+    def acquire(self, level: int, max_wait: float) -> float:
+        """Wait for a slot in priority order; returns the seconds waited or raises ThrottledError."""
+        started = time.monotonic()
+        deadline = started + max_wait
+        entry = (level, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = self._delay(now)
+                    remaining = deadline - now
+                    if delay > remaining:
+                        raise ThrottledError(f"No slot for {self.host} within {max_wait:.1f}s")
+                    head = self._waiters[0] == entry
+                    capped = bool(self.max_concurrency) and self.in_flight >= self.max_concurrency
+                    if head and delay <= 0 and not capped:
+                        break
+                    if remaining <= 0:
+                        raise ThrottledError(f"No slot for {self.host} within {max_wait:.1f}s")
+                    # Behind another waiter or at the cap, acquire()/release() wake us; otherwise the bucket refills.
+                    self._cond.wait(timeout=delay if head and not capped else remaining)
+            except BaseException:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiters)
+            if self.rate > 0:
+                self.tokens -= 1
+            self.in_flight += 1
+            self._cond.notify_all()
+        return time.monotonic() - started
+
+    def release(self, status: Optional[int] = None, retry_after: Optional[str] = None) -> None:
+        """Free the slot; `status` (None when no answer arrived) adapts the host's rate."""
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if status in THROTTLE_STATUSES:
+                self._refill(now)
+                self.throttles += 1
+                pause = parse_retry_after(retry_after)
+                if pause is None:
+                    pause = HOST_BACKOFF_S * 2 ** (self.throttles - 1)
+                self.paused_until = max(self.paused_until, now + min(pause, HOST_MAX_PAUSE_S))
+                self.rate_share = max(HOST_MIN_RATE_SHARE, self.rate_share / 2)
+                self.tokens = min(self.tokens, 0.0)
+                logger.warning(
+                    "%s answered %s; pausing %.1fs, rate now %.2f/s.", self.host, status, pause, self.effective_rate
+                )
+            elif status is not None:
+                self.throttles = 0
+                self.rate_share = min(1.0, self.rate_share + HOST_RATE_RECOVERY)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "rate_per_s": round(self.effective_rate, 3) if self.rate > 0 else None,
+                "tokens": round(self.tokens, 2) if self.rate > 0 else None,
+                "in_flight": self.in_flight,
+                "queued": len(self._waiters),
+                "paused_s": round(max(0.0, self.paused_until - now), 2),
+            }
+
+
+def _parse_limits(spec: str) -> Dict[str, Tuple[float, float, int]]:
+    limits = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        host, values = item.split("=", 1)
+        parts = values.split(":")
+        try:
+            rate = float(parts[0])
+            burst = float(parts[1]) if len(parts) > 1 and parts[1] else max(1.0, rate)
+            concurrency = int(parts[2]) if len(parts) > 2 and parts[2] else HOST_MAX_CONCURRENCY
+        except ValueError:
+            logger.warning("Ignoring malformed HOST_LIMITS entry %r.", item)
+            continue
+        limits[host.strip().lower()] = (rate, burst, concurrency)
+    return limits
+
+
+class HostScheduler:
+    """The HostLimiter per host, created on first use from HOST_LIMITS or the defaults."""
+
+    def __init__(self, limits: str = HOST_LIMITS) -> None:
+        self.limits = _parse_limits(limits)
+        self._hosts: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def _limits_for(self, host: str) -> Tuple[float, float, int]:
+        name = urlsplit(f"//{host}").hostname or host
+        for pattern, limits in self.limits.items():
+            if name == pattern or name.endswith("." + pattern):
+                return limits
+        return HOST_RATE_PER_S, HOST_BURST, HOST_MAX_CONCURRENCY
+
+    def limiter(self, host: str) -> HostLimiter:
+        with self._lock:
+            limiter = self._hosts.get(host)
+            if limiter is None:
+                limiter = self._hosts[host] = HostLimiter(host, *self._limits_for(host))
+            return limiter
+
+    def configure(self, host: str, rate: float, burst: float, max_concurrency: int) -> HostLimiter:
+        """Replace a host's limiter (tests, benchmarks, runtime tuning)."""
+        with self._lock:
+            limiter = self._hosts[host] = HostLimiter(host, rate, burst, max_concurrency)
+            return limiter
+
+    def max_wait(self, level: Optional[int] = None) -> float:
+        level = current_priority() if level is None else level
+        return HOST_MAX_WAIT_S if level == INTERACTIVE else HOST_BATCH_MAX_WAIT_S
+
+    def acquire(self, host: str, level: Optional[int] = None) -> None:
+        """Wait for a slot on `host` at `level` (the context's priority by default)."""
+        level = current_priority() if level is None else level
+        name = PRIORITY_NAMES.get(level, str(level))
+        try:
+            waited = self.limiter(host).acquire(level, self.max_wait(level))
+        except ThrottledError:
+            metrics.observe("schedule", host, "throttled", self.max_wait(level))
+            raise
+        metrics.observe("schedule", host, name, waited)
+
+    def release(self, host: str, status: Optional[int] = None, retry_after: Optional[str] = None) -> None:
+        self.limiter(host).release(status, retry_after)
+
+    @contextmanager
+    def slot(self, host: str, level: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Hold a slot for the block; set "status" / "retry_after" on the yielded dict to report the answer."""
+        self.acquire(host, level)
+        answer: Dict[str, Any] = {"status": None, "retry_after": None}
+        try:
+            yield answer
+        finally:
+            self.release(host, answer["status"], answer["retry_after"])
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            limiters = dict(self._hosts)
+        return {host: limiter.snapshot() for host, limiter in sorted(limiters.items())}
+
+
+_SCHEDULER: Optional[HostScheduler] = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_scheduler() -> HostScheduler:
+    """Process-wide scheduler shared by all upstream clients."""
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = HostScheduler()
+        return _SCHEDULER
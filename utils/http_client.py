@@ -0,0 +1,217 @@
+"""
+Shared HTTP client for all upstream calls (eProstor/ARSO WFS, PISRS, CF Worker proxy).
+
+Keeps one pooled keep-alive session per host, retries transient failures with
+jittered backoff, and trips a per-host circuit breaker so a failing upstream
+short-circuits to the caller's fallback instead of costing a full timeout.
+Every attempt takes a slot from the per-host politeness scheduler
+(utils/host_scheduler.py), which rate-limits, caps concurrency, orders waiting
+requests by priority and backs off on 429/503.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from utils.host_scheduler import ThrottledError, get_scheduler
+
+logger = logging.getLogger(__name__)
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_S = float(os.getenv("HTTP_BACKOFF_S", "0.3"))
+HTTP_BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "3"))
+HTTP_BREAKER_COOLDOWN_S = float(os.getenv("HTTP_BREAKER_COOLDOWN_S", "30"))
+
+RETRY_STATUSES = {429, 502, 503, 504}
+# Throttling answers: the scheduler pauses the host for them, so they do not count against the breaker.
+THROTTLE_STATUSES = {429}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling a host whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker: opens after `failure_threshold` failures, rejects calls
+    for `cooldown_s`, then lets a single trial call through to decide whether to close again.
+    """
+
+    def __init__(self, failure_threshold: int, cooldown_s: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown_s:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown_s or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def abandon(self) -> None:
+        """An allowed call got no verdict (no scheduler slot, or throttled): free the half-open trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+_SESSIONS: Dict[str, requests.Session] = {}
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def _session(host: str) -> requests.Session:
+    with _REGISTRY_LOCK:
+        session = _SESSIONS.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _SESSIONS[host] = session
+        return session
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    with _REGISTRY_LOCK:
+        breaker = _BREAKERS.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(HTTP_BREAKER_FAILURES, HTTP_BREAKER_COOLDOWN_S)
+            _BREAKERS[host] = breaker
+        return breaker
+
+
+def breaker_states() -> Dict[str, str]:
+    """Current breaker state per upstream host, for logging/diagnostics."""
+    with _REGISTRY_LOCK:
+        return {host: breaker.state for host, breaker in _BREAKERS.items()}
+
+
+def _record_failure(host: str, breaker: CircuitBreaker) -> None:
+    was_open = breaker.opened_at is not None
+    breaker.record_failure()
+    if not was_open and breaker.opened_at is not None:
+        logger.warning("Circuit opened for %s after %d failures.", host, breaker.failures)
+
+
+def _connect_failed(exc: requests.ConnectionError) -> bool:
+    """True when no connection was made (refused, DNS), so the request was certainly never sent."""
+    reason = exc.args[0] if exc.args else None
+    return isinstance(getattr(reason, "reason", reason), NewConnectionError)
+
+
+def _backoff(attempt: int) -> None:
+    # Full jitter keeps concurrent retries against the same host from synchronising.
+    time.sleep(random.uniform(0, HTTP_BACKOFF_S * (2 ** attempt)))
+
+
+def request(method: str, url: str, retries: Optional[int] = None, **kwargs: Any) -> requests.Response:
+    """
+    Send a request through the pooled session for the URL's host.
+    Refused connections are retried for every method (the request never reached the server); resets
+    and 429/502/503/504 responses only for idempotent methods, and not when the host's Retry-After pause
+    outlasts this request's wait budget. Every final 5xx counts against the host's breaker, a 429 does
+    not (the scheduler backs off instead). Raises CircuitOpenError when the host's breaker is open and
+    ThrottledError when no scheduler slot frees up in time, otherwise behaves like `requests.request`.
+    """
+    method = method.upper()
+    host = _host(url)
+    breaker = get_breaker(host)
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuit open for {host}")
+
+    scheduler = get_scheduler()
+    session = _session(host)
+    attempts = 1 + (HTTP_RETRIES if retries is None else retries)
+    for attempt in range(attempts):
+        last_attempt = attempt == attempts - 1
+        try:
+            scheduler.acquire(host)
+        except ThrottledError:
+            breaker.abandon()
+            raise
+        try:
+            resp = session.request(method, url, **kwargs)
+        except requests.ConnectionError as exc:
+            scheduler.release(host)
+            # A connect timeout already burned the caller's budget; only fast failures are retried, and a
+            # reset after the request went out only when repeating it is safe.
+            retry = _connect_failed(exc) or method in IDEMPOTENT_METHODS
+            if last_attempt or isinstance(exc, requests.Timeout) or not retry:
+                _record_failure(host, breaker)
+                raise
+            _backoff(attempt)
+            continue
+        except requests.RequestException:
+            scheduler.release(host)
+            _record_failure(host, breaker)
+            raise
+        except BaseException:
+            scheduler.release(host)
+            raise
+        scheduler.release(host, resp.status_code, resp.headers.get("Retry-After"))
+
+        if resp.status_code in RETRY_STATUSES:
+            too_long = scheduler.limiter(host).delay() > scheduler.max_wait()
+            if not (last_attempt or method not in IDEMPOTENT_METHODS or too_long):
+                resp.close()
+                _backoff(attempt)
+                continue
+
+        if resp.status_code in THROTTLE_STATUSES:
+            breaker.abandon()
+        elif resp.status_code >= 500:
+            _record_failure(host, breaker)
+        else:
+            breaker.record_success()
+        return resp
+
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs: Any) -> requests.Response:
+    return request("POST", url, **kwargs)
@@ -0,0 +1,125 @@
+"""
+In-process latency metrics with Prometheus text exposition.
+
+Stages (normalize, fetch, summarize, render, request ...) are timed with
+`span()` or `observe()` and recorded in one histogram labelled by stage,
+source and outcome (live / cached / fallback for data sources). `/metrics`
+serves `render_prometheus()`.
+
+Spans observed on a thread that called `start_collecting()` are also kept
+per request, which the profiling hook turns into a Server-Timing header.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Seconds; covers cache hits (sub-ms) up to upstream timeouts.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0)
+METRIC_NAME = "datascraper_stage_duration_seconds"
+
+LabelKey = Tuple[str, str, str]  # stage, source, outcome
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, safe to update from any thread."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = buckets
+        self._series: Dict[LabelKey, List[float]] = {}  # bucket counts..., +Inf count, sum
+        self._lock = threading.Lock()
+
+    def observe(self, labels: LabelKey, value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def snapshot(self) -> Dict[LabelKey, List[float]]:
+        with self._lock:
+            return {labels: list(series) for labels, series in self._series.items()}
+
+
+_HISTOGRAM = Histogram()
+_local = threading.local()
+
+
+def observe(stage: str, source: str, outcome: str, seconds: float) -> None:
+    _HISTOGRAM.observe((stage, source, outcome), seconds)
+    collected: Optional[List[Tuple[str, float]]] = getattr(_local, "collected", None)
+    if collected is not None:
+        collected.append((f"{stage}.{source}" if source else stage, seconds))
+
+
+class Span:
+    def __init__(self, stage: str, source: str, outcome: str) -> None:
+        self.stage = stage
+        self.source = source
+        self.outcome = outcome
+
+
+@contextmanager
+def span(stage: str, source: str = "", outcome: str = "ok") -> Iterator[Span]:
+    """Time a block; set `.outcome` on the yielded span to classify it. Exceptions record "error"."""
+    current = Span(stage, source, outcome)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        current.outcome = "error"
+        raise
+    finally:
+        observe(current.stage, current.source, current.outcome, time.perf_counter() - started)
+
+
+def counts() -> Dict[LabelKey, Tuple[int, float]]:
+    """(observation count, total seconds) per label set; the benchmarks diff two of these."""
+    return {labels: (int(series[-2]), series[-1]) for labels, series in _HISTOGRAM.snapshot().items()}
+
+
+def start_collecting() -> None:
+    _local.collected = []
+
+
+def stop_collecting() -> List[Tuple[str, float]]:
+    collected = getattr(_local, "collected", None) or []
+    _local.collected = None
+    return collected
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def render_prometheus(extra_gauges: Optional[Dict[str, Tuple[str, Dict[Tuple[Tuple[str, str], ...], float]]]] = None) -> str:
+    """
+    Prometheus text format (version 0.0.4). `extra_gauges` maps a metric name to
+    (help text, {((label, value), ...): gauge value}).
+    """
+    lines = [
+        f"# HELP {METRIC_NAME} Time spent per stage, source and outcome.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for (stage, source, outcome), series in sorted(_HISTOGRAM.snapshot().items()):
+        base = {"stage": stage, "source": source, "outcome": outcome}
+        for bound, count in zip(_HISTOGRAM.buckets, series):
+            lines.append(f"{METRIC_NAME}_bucket{_format_labels({**base, 'le': repr(bound)})} {int(count)}")
+        lines.append(f"{METRIC_NAME}_bucket{_format_labels({**base, 'le': '+Inf'})} {int(series[-2])}")
+        lines.append(f"{METRIC_NAME}_count{_format_labels(base)} {int(series[-2])}")
+        lines.append(f"{METRIC_NAME}_sum{_format_labels(base)} {series[-1]:.6f}")
+    for name, (help_text, values) in (extra_gauges or {}).items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in sorted(values.items()):
+            lines.append(f"{name}{_format_labels(dict(labels))} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,100 @@
+"""
+Read-only typed records and the canonical JSON serializer.
+
+A Record is a dict subclass with `__slots__` (no per-instance __dict__) that
+declares its fields, exposes each one as an attribute and refuses mutation,
+so one instance can be shared by coalesced lookups, the summary cache and
+the result store without defensive copies. Being a real dict, it keeps
+`.get()`, `[]`, Jinja access, equality with plain dicts and the C JSON
+encoder's fast path; unknown keys from a fetcher are kept as-is.
+
+`dumps()` is the one JSON encoding used for hashing, logging, caches, the
+result store and the proxy: sorted keys, compact separators, UTF-8 text. A
+record caches its own encoding, so a payload that is logged, posted and
+stored is encoded once, and a dict holding records (a result-store entry, an
+NDJSON row) splices their cached text in.
+"""
+
+import json
+from collections.abc import Mapping
+from typing import Any, Callable, ClassVar, Dict, FrozenSet, NoReturn, Optional, Tuple
+
+_ENCODER = json.JSONEncoder(ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+_setattr = object.__setattr__
+
+
+def dumps(value: Any) -> str:
+    """
+    Canonical JSON text of `value`. A record reuses its cached encoding, and so does a dict
+    holding records that have already been encoded; anything else is one C-encoder pass.
+    """
+    if isinstance(value, Record):
+        return value.canonical()
+    if type(value) is dict and any(isinstance(v, Record) and v._json is not None for v in value.values()):
+        items = sorted((k if isinstance(k, str) else str(k), v) for k, v in value.items())
+        return "{" + ",".join(f"{_ENCODER.encode(k)}:{dumps(v)}" for k, v in items) + "}"
+    return _ENCODER.encode(value)
+
+
+class Record(dict):
+    """
+    Read-only dict with declared FIELDS (readable as attributes) and a cached canonical encoding.
+    Subclasses declare FIELDS and, optionally, `_CONVERT` (field -> callable applied to non-None
+    values, e.g. nested records or tuples).
+    """
+
+    __slots__ = ("_json",)
+    FIELDS: ClassVar[Tuple[str, ...]] = ()
+    _FIELD_SET: ClassVar[FrozenSet[str]] = frozenset()
+    _CONVERT: ClassVar[Dict[str, Callable[[Any], Any]]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+    def __init__(self, data: Optional[Mapping] = None) -> None:
+        data = data or {}
+        convert = self._CONVERT
+        if convert:
+            data = {k: convert[k](v) if v is not None and k in convert else v for k, v in data.items()}
+        dict.__init__(self, data)
+        _setattr(self, "_json", None)
+
+    @classmethod
+    def of(cls, data: Any) -> Any:
+        """`data` as this record type; records (and anything that is not a mapping) are returned as-is."""
+        if type(data) is dict:
+            return cls(data)
+        if isinstance(data, cls) or not isinstance(data, Mapping):
+            return data
+        return cls(data)
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for names that are not dict methods or slots; absent fields behave like
+        # missing keys (AttributeError here, so Jinja falls back to item access and Undefined).
+        if name in self._FIELD_SET and name in self:
+            return self[name]
+        raise AttributeError(f"{type(self).__name__} has no field {name!r}")
+
+    def _read_only(self, *args: Any, **kwargs: Any) -> NoReturn:
+        raise TypeError(f"{type(self).__name__} is read-only")
+
+    __setattr__ = __delattr__ = _read_only
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def canonical(self) -> str:
+        """Canonical JSON of the record, encoded on first use."""
+        text = self._json
+        if text is None:
+            text = _ENCODER.encode(self)
+            _setattr(self, "_json", text)
+        return text
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.canonical()})"
+
+    __str__ = canonical
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (type(self), (dict(self),))
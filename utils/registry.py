@@ -0,0 +1,52 @@
+"""
+Lazily imported registries.
+
+A registry maps a name to a "package.module:attribute" target. The module is
+imported the first time the name is resolved, so optional or heavy backends
+(Playwright, the batch summary client) cost nothing at start-up unless a request actually uses
+them.
+"""
+
+import importlib
+import threading
+from typing import Any, Dict, List
+
+
+class LazyRegistry:
+    """Name -> "module:attribute", resolved with importlib on first use and then cached."""
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self._targets: Dict[str, str] = {}
+        self._loaded: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, target: str) -> None:
+        if ":" not in target:
+            raise ValueError(f"{self.kind} target must look like 'module:attribute', got {target!r}")
+        with self._lock:
+            self._targets[name] = target
+            self._loaded.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        loaded = self._loaded.get(name)
+        if loaded is not None:
+            return loaded
+        try:
+            target = self._targets[name]
+        except KeyError:
+            raise KeyError(f"Unknown {self.kind}: {name}") from None
+        module_name, attribute = target.split(":", 1)
+        # importlib holds its own per-module lock, so concurrent first uses import once.
+        loaded = getattr(importlib.import_module(module_name), attribute)
+        with self._lock:
+            self._loaded[name] = loaded
+        return loaded
+
+    def names(self) -> List[str]:
+        return sorted(self._targets)
+
+    def loaded(self) -> List[str]:
+        """Names resolved so far (their modules are imported)."""
+        with self._lock:
+            return sorted(self._loaded)
@@ -0,0 +1,93 @@
+"""
+Server-side store for lookup results (raw_data + AI summary).
+
+Results live in a small SQLite file keyed by a short random ID, so the session
+cookie only has to carry that ID. Entries expire after RESULT_TTL_S; expired
+rows are ignored on read and purged opportunistically on write.
+"""
+
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from utils.cache import CACHE_DIR
+from utils.records import dumps
+
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", os.path.join(CACHE_DIR, "results.sqlite"))
+RESULT_TTL_S = float(os.getenv("RESULT_TTL_S", "86400"))
+# Purge expired rows at most this often (seconds), piggybacking on writes.
+_PURGE_INTERVAL_S = 300.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_expires ON results (expires_at);
+"""
+
+
+class ResultStore:
+    """SQLite-backed result store with TTL eviction; one connection per thread."""
+
+    def __init__(self, path: str = RESULT_STORE_PATH, ttl_s: float = RESULT_TTL_S) -> None:
+        self.path = path
+        self.ttl_s = ttl_s
+        self._local = threading.local()
+        self._last_purge = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def put(self, payload: Dict[str, Any]) -> str:
+        """Store a JSON-serialisable payload (records are written from their cached encoding) and return its new result ID."""
+        result_id = secrets.token_urlsafe(12)
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO results (id, expires_at, payload) VALUES (?, ?, ?)",
+                (result_id, now + self.ttl_s, dumps(payload)),
+            )
+        if now - self._last_purge > _PURGE_INTERVAL_S:
+            self._last_purge = now
+            self.purge_expired()
+        return result_id
+
+    def get(self, result_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not result_id:
+            return None
+        row = self._conn().execute(
+            "SELECT payload FROM results WHERE id = ? AND expires_at > ?", (result_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def purge_expired(self) -> int:
+        conn = self._conn()
+        with conn:
+            return conn.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),)).rowcount
+
+
+_STORE: Optional[ResultStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = ResultStore()
+        return _STORE
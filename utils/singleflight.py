@@ -0,0 +1,72 @@
+"""
+Single-flight call coalescing.
+
+`SingleFlight.do(key, fn, ...)` runs `fn` once per key at a time: callers that
+arrive while a call for the same key is in flight wait for it and get the same
+result (or the same exception) instead of starting their own. Nothing is kept
+after the call returns; caching stays with the caches.
+
+Calls are only shared between callers at the same scheduler priority
+(utils/host_scheduler.py): the call runs under its leader's host limits and
+wait budget, so an interactive caller never waits on a batch-priority call
+(or a batch caller inherits an interactive one's short budget).
+
+Shared results are the same object for every caller, so treat them as
+read-only; fields that echo the caller's own input are the caller's to
+re-stamp. Each waiting caller is recorded as a "coalesce" observation in
+utils/metrics.py, labelled with the group name.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from utils import metrics
+from utils.host_scheduler import current_priority
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """One in-flight call per key; `name` labels the group in metrics."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, bool]:
+        """Return (result, shared); `shared` is True when the result came from another caller's call."""
+        key = (current_priority(), key)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            started = time.perf_counter()
+            call.done.wait()
+            metrics.observe("coalesce", self.name, "error" if call.error else "shared", time.perf_counter() - started)
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn(*args, **kwargs)
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)